@@ -0,0 +1,85 @@
+"""
+渲染引擎基準測試：比較 matplotlib 與 pil 引擎的每秒頁數
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_processor import DataProcessor
+from src.excel_generator import ExcelGenerator
+from src.visualizer import TimelineVisualizer
+
+
+def make_sample_data(rows, seed=0):
+    """生成隨機里程碑數據"""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2026-01-01') + \
+        pd.to_timedelta(rng.integers(0, 730, rows), unit='D')
+    events = [f"里程碑 {i}" if i % 3 else f"長事件名稱示例 {i}" for i in range(rows)]
+    return pd.DataFrame({'date': dates, 'event': events}).sort_values('date', kind='stable')
+
+
+def bench_engine(engine, pages, stats, profile, repeat):
+    """
+    測量單個引擎的渲染和編碼速度
+
+    Returns:
+        dict: 渲染、渲染+編碼的每秒頁數
+    """
+    excel_gen = ExcelGenerator(profile=profile)
+    visualizer = TimelineVisualizer(engine=engine, dpi=excel_gen.dpi)
+
+    # 預熱（字體快取、模塊載入）
+    excel_gen.encode_figure(visualizer.create_timeline_figure(pages[0], stats))
+
+    render_seconds = 0.0
+    total_seconds = 0.0
+    page_count = 0
+    for _ in range(repeat):
+        for page_num, page_df in enumerate(pages, 1):
+            start = time.perf_counter()
+            fig = visualizer.create_timeline_figure(
+                page_df, stats, page_num, len(pages))
+            rendered = time.perf_counter()
+            # matplotlib 的大部分繪製成本在 savefig 中，因此以「渲染 + 編碼」為準
+            list(excel_gen.encode_figures([fig], close_figures=True))
+            finished = time.perf_counter()
+            render_seconds += rendered - start
+            total_seconds += finished - start
+            page_count += 1
+
+    return {
+        'engine': engine,
+        'pages': page_count,
+        'build_pages_per_sec': page_count / render_seconds,
+        'pages_per_sec': page_count / total_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='渲染引擎基準測試')
+    parser.add_argument('--rows', type=int, default=500, help='里程碑數量')
+    parser.add_argument('--per-page', type=int, default=50, help='每頁里程碑數')
+    parser.add_argument('--profile', default='fast', help='圖片編碼配置')
+    parser.add_argument('--repeat', type=int, default=1, help='重複次數')
+    args = parser.parse_args()
+
+    processor = DataProcessor(milestones_per_page=args.per_page)
+    _, stats, pages = processor.process_all(make_sample_data(args.rows))
+
+    print(f"{len(pages)} 頁 x {args.repeat} 次，編碼配置 {args.profile}")
+    print(f"{'引擎':<12}{'構建 頁/秒':>14}{'渲染+編碼 頁/秒':>20}")
+    results = [bench_engine(engine, pages, stats, args.profile, args.repeat)
+               for engine in ('matplotlib', 'pil')]
+    for result in results:
+        print(f"{result['engine']:<12}{result['build_pages_per_sec']:>14.2f}"
+              f"{result['pages_per_sec']:>20.2f}")
+    print(f"pil / matplotlib 加速比: "
+          f"{results[1]['pages_per_sec'] / results[0]['pages_per_sec']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,8 @@
 配置文件：定義色彩方案、排版參數、常數設定
 """
 
+from pathlib import Path
+
 # ==================== 排版參數 ====================
 MARGIN_MM = 20  # 邊距 mm
 MARGIN_INCH = MARGIN_MM / 25.4  # 轉換為英寸
@@ -42,6 +44,90 @@ STAT_TEXT_COLOR = (0.3, 0.3, 0.3)  # 統計面板文字色
 
 # ==================== 圖表設定 ====================
 DPI = 300  # 圖表解析度（用於 Excel 嵌入圖片）
+RENDER_ENGINE = 'matplotlib'  # 渲染引擎：'matplotlib' 或 'pil'（輕量光柵化，適合大批量）
+OVERVIEW_TOP_CLUSTERS = 8  # 總覽頁標註的密度最高區間數
+
+# ==================== 圖片編碼配置 ====================
+# dpi: 渲染解析度
+# max_size: 縮放上限（像素，None 表示不縮放）
+# quantize_colors: 自適應調色板顏色數（0 表示保留全彩 RGB）
+# compress_level: zlib 壓縮級別 (0-9)
+# zlib_strategy: zlib 壓縮策略 ('default', 'filtered', 'huffman', 'rle', 'fixed')
+#   實測（8 頁時間線，每頁大小 / 編碼耗時）：
+#   fast  L1: default 139 KB 22 ms，rle 205 KB 18 ms（最快）
+#   small L9: default 43 KB 49 ms（最小），filtered 43 KB 46 ms，rle 64 KB 3 ms
+#   print L6: default 486 KB 228 ms，filtered 523 KB 262 ms，rle 707 KB 175 ms
+#   （rle 不如直接用 L1 default：555 KB 143 ms）
+#   PNG 行過濾器由 Pillow 自動選擇（調色板圖片不過濾），不可配置
+ENCODING_PROFILES = {
+    'fast': {  # 最快生成速度
+        'dpi': 100,
+        'max_size': None,
+        'quantize_colors': 0,
+        'compress_level': 1,
+        'zlib_strategy': 'rle',  # 只合併連續相同像素，編碼最快
+    },
+    'small': {  # 最小檔案體積（頁面只含少量顏色，8-bit 調色板幾乎無損）
+        'dpi': 150,
+        'max_size': (1400, 900),
+        'quantize_colors': 256,
+        'compress_level': 9,
+        'zlib_strategy': 'default',
+    },
+    'print': {  # 列印品質
+        'dpi': DPI,
+        'max_size': None,
+        'quantize_colors': 0,
+        'compress_level': 6,
+        'zlib_strategy': 'default',
+    },
+}
+DEFAULT_ENCODING_PROFILE = 'small'
+
+# ==================== 數據處理 ====================
+DATAFRAME_ENGINE = 'pandas'  # 數據框引擎：'pandas' 或 'polars'（需安裝 polars，多線程）
+
+# ==================== 外存處理 ====================
+OUT_OF_CORE_MEMORY_BUDGET_MB = 256  # 外存模式的內存預算（MB）
+OUT_OF_CORE_ROW_BYTES = 512  # 單行數據估算內存（含 pandas 開銷，位元組）
+
+# ==================== 輸入快取 ====================
+INPUT_CACHE_ENABLED = True  # 快取已解析的輸入數據，重複運行時跳過 Excel 解析
+INPUT_CACHE_DIR = Path(__file__).resolve().parent.parent / 'data' / 'cache'
+INPUT_CACHE_MAX_MB = 512  # 快取總大小上限，超出時淘汰最久未使用的項
+
+# ==================== 監視模式 ====================
+WATCH_DEBOUNCE_SECONDS = 2.0  # 最後一次寫入後靜止多久才重新生成
+WATCH_POLL_INTERVAL = 1.0  # 無 inotify 時的輪詢間隔（秒）
+WATCH_MAX_WORKERS = 2  # 後台生成報告的工作進程數
+
+# ==================== 渲染服務 ====================
+SERVICE_HOST = '127.0.0.1'  # 只監聽本機
+SERVICE_PORT = 8765
+SERVICE_WORKERS = None  # 預熱工作進程數，None 表示 CPU 核心數
+
+# ==================== 分片渲染 ====================
+SHARD_DIR = Path(__file__).resolve().parent.parent / 'data' / 'shards'  # 預設共享目錄
+
+# ==================== 拆分輸出 ====================
+SPLIT_MAX_PAGES = 100  # 按頁數拆分時每部分的頁數
+SPLIT_MAX_MB = 50  # 按大小拆分時每部分的圖片總量上限（MB）
+SPLIT_PERIOD = 'Q'  # 按週期拆分時的週期：'M'（月）、'Q'（季）、'Y'（年）
+SPLIT_MAX_WORKERS = None  # 並行渲染和寫入的進程數，None 表示 CPU 核心數
+
+# ==================== 資源調控 ====================
+GOVERNOR_MEMORY_BUDGET_MB = None  # 並行生成的內存預算，None 表示本機內存（含 cgroup 限制）的一定比例
+GOVERNOR_MEMORY_FRACTION = 0.8  # 未配置預算時使用的本機內存比例
+GOVERNOR_CPU_BUDGET = None  # 最多同時運行的工作進程數，None 表示可用 CPU 核心數
+GOVERNOR_HIGH_WATERMARK = 0.85  # 實測 RSS 超過預算的此比例時減少並行數
+GOVERNOR_LOW_WATERMARK = 0.6  # 低於此比例時逐步恢復並行數
+# 內存估算係數（A4 頁面實測）
+GOVERNOR_WORKER_BASE_MB = 110  # 導入 pandas/matplotlib 後單個工作進程的基礎 RSS
+GOVERNOR_FIGURE_BASE_MB = 2.5  # 單頁 matplotlib Figure（未光柵化）的固定開銷
+GOVERNOR_FIGURE_ROW_KB = 40  # 每個里程碑的 Artist 開銷
+GOVERNOR_RASTER_BYTES_PER_PIXEL = 24  # 編碼一頁時的峰值（Agg 緩衝、未壓縮 PNG、PIL 轉換）
+GOVERNOR_PIL_BYTES_PER_PIXEL = 5  # pil 引擎已光柵化的頁面圖片
+GOVERNOR_ENCODED_BYTES_PER_PIXEL = 0.15  # 已編碼 PNG（寫入工作簿前全部持有）
 
 # ==================== 數據驗證 ====================
 DATE_FORMATS = [
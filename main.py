@@ -6,8 +6,20 @@ from src.excel_generator import ExcelGenerator
 from src.visualizer import TimelineVisualizer
 from src.data_processor import DataProcessor
 from src.excel_reader import ExcelReader
+from src.out_of_core import OutOfCoreProcessor
+from src.multi_project import MultiProjectRunner
+from src.date_index import DateIndex
+from src.input_cache import InputCache
+from src.profiling import create_profiler
+from src.report_splitter import ReportSplitter, SPLIT_MODES
+from src.resource_governor import ResourceGovernor, estimate_encode_bytes, estimate_page_bytes
+from config.settings import INPUT_CACHE_ENABLED
+import argparse
+from datetime import datetime
+import itertools
 import logging
 import sys
+import numpy as np
 from pathlib import Path
 
 # 添加項目根目錄到 Python 路徑
@@ -27,7 +39,13 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def main(input_excel_path, output_excel_path=None, title="里程碑時間線"):
+def main(input_excel_path, output_excel_path=None, title="里程碑時間線",
+         out_of_core=False, memory_budget_mb=None,
+         multi_project=False, group_col=None, max_workers=None,
+         encoding_profile=None, render_engine=None, overview=False,
+         start_date=None, end_date=None, date_index_dir=None, use_input_cache=None,
+         profile=False, profile_dir=None, profile_pages=False, dataframe_engine=None,
+         split_by=None, split_size=None, split_sheets=False):
     """
     主流程：從 Excel 生成里程碑時間線 Excel 報告
 
@@ -35,7 +53,37 @@ def main(input_excel_path, output_excel_path=None, title="里程碑時間線"):
         input_excel_path (str): 輸入 Excel 檔案路徑
         output_excel_path (str): 輸出 Excel 檔案路徑，預設為 data/output/timeline_report.xlsx
         title (str): 報告標題
+        out_of_core (bool): 使用外存模式（分塊讀取、溢寫歸併、逐頁渲染），適用於超出內存的輸入
+        memory_budget_mb (int): 外存模式的內存預算（MB），預設取 config.settings
+        multi_project (bool): 多項目模式：每個工作表（或分組列的每個值）為一個項目，
+            並行渲染後輸出到同一個 Excel 檔案（每個項目一個工作表 + 索引工作表）
+        group_col (int): 多項目模式下的項目分組列索引
+        max_workers (int): 多項目模式和拆分輸出的並行工作進程數，預設為 CPU 核心數
+        encoding_profile (str): 圖片編碼配置（'fast'、'small'、'print'），
+            預設取 config.settings.DEFAULT_ENCODING_PROFILE
+        render_engine (str): 渲染引擎（'matplotlib' 或 'pil'），預設取 config.settings.RENDER_ENGINE
+        overview (bool): 在第一頁加入全範圍密度總覽頁
+        start_date: 日期窗口起始日期（含），如 '2026-07-01'
+        end_date: 日期窗口結束日期（含）；指定任一窗口日期時，以持久化的日期索引
+            二分定位窗口，統計、分頁和渲染只處理窗口內的里程碑
+        date_index_dir (str): 日期索引目錄，預設為 data/index
+        use_input_cache (bool): 使用已解析輸入的快取（見 src.input_cache），
+            預設取 config.settings.INPUT_CACHE_ENABLED
+        profile (bool): 按階段收集性能分析數據（.pstats 和火焰圖用的 .folded），
+            結束時輸出每個階段的熱點函數；關閉時不產生任何開銷
+        profile_dir (str): 性能分析輸出目錄，預設為 data/profile/<時間戳>
+        profile_pages (bool): 性能分析時每頁單獨統計
+        dataframe_engine (str): 數據處理引擎（'pandas' 或 'polars'），
+            預設取 config.settings.DATAFRAME_ENGINE
+        split_by (str): 拆分輸出（'pages'、'bytes'、'period'）：報告拆分為多個工作簿並行寫入，
+            output_excel_path 為鏈接到各部分的索引工作簿（見 src.report_splitter）
+        split_size: 每部分頁數、每部分 MB 或週期（'M'、'Q'、'Y'），預設取 config.settings
+        split_sheets (bool): 拆分為同一工作簿的多個工作表，而不是多個工作簿
     """
+    if profile and profile_dir is None:
+        profile_dir = project_root / "data" / "profile" / datetime.now().strftime('%Y%m%d_%H%M%S')
+    profiler = create_profiler(profile, profile_dir, per_page=profile_pages)
+
     try:
         logger.info("=" * 50)
         logger.info("開始生成里程碑時間線 Excel 報告")
@@ -45,30 +93,104 @@ def main(input_excel_path, output_excel_path=None, title="里程碑時間線"):
         if output_excel_path is None:
             output_excel_path = project_root / "data" / "output" / "timeline_report.xlsx"
 
+        if split_by is not None and (
+                multi_project or out_of_core or overview or start_date is not None
+                or end_date is not None):
+            raise ValueError("拆分輸出不支援多項目、外存、總覽頁和日期窗口模式")
+
+        if multi_project:
+            logger.info(f"多項目模式: 讀取 Excel 檔案: {input_excel_path}")
+            runner = MultiProjectRunner(
+                max_workers=max_workers, encoding_profile=encoding_profile,
+                render_engine=render_engine, dataframe_engine=dataframe_engine)
+            # 工作進程內的渲染不在統計範圍內，只統計主進程的讀取、調度與寫入
+            with profiler.stage('multi_project'):
+                output_path = runner.run(
+                    input_excel_path, output_excel_path, title=title, group_col=group_col)
+            logger.info(f"✓ Excel 檔案已保存: {output_path}")
+            return output_path
+
+        if start_date is not None or end_date is not None:
+            return _main_date_window(
+                input_excel_path, output_excel_path, title, start_date, end_date,
+                date_index_dir, out_of_core, memory_budget_mb,
+                encoding_profile, render_engine, overview, use_input_cache, profiler,
+                dataframe_engine)
+
+        if out_of_core:
+            return _main_out_of_core(
+                input_excel_path, output_excel_path, title, memory_budget_mb,
+                encoding_profile, render_engine, overview, profiler)
+
         # 1. 讀取 Excel
         logger.info(f"步驟 1: 讀取 Excel 檔案: {input_excel_path}")
-        reader = ExcelReader(input_excel_path)
-        df = reader.read_milestone_data()
+        with profiler.stage('read'):
+            reader = ExcelReader(input_excel_path, cache=_input_cache(use_input_cache))
+            df = reader.read_milestone_data()
         logger.info(f"✓ 成功讀取 {len(df)} 條記錄")
 
         # 2. 數據處理
         logger.info("步驟 2: 數據處理和統計分析")
-        processor = DataProcessor(milestones_per_page=50)
-        merged_df, stats, pages = processor.process_all(df)
+        with profiler.stage('process'):
+            processor = DataProcessor(milestones_per_page=50, engine=dataframe_engine)
+            merged_df, stats, pages = processor.process_all(df)
         logger.info(f"✓ 合併同日期事件，共 {len(merged_df)} 個里程碑")
         logger.info(f"✓ 分頁完成，共 {len(pages)} 頁")
 
-        # 3. 生成可視化
-        logger.info("步驟 3: 生成可視化圖表")
-        visualizer = TimelineVisualizer()
-        figures = visualizer.generate_pdf(pages, stats, title=title)
-        logger.info(f"✓ 生成 {len(figures)} 頁圖表")
+        if split_by is not None:
+            # 3-4. 拆分為多個部分，並行渲染和寫入
+            logger.info("步驟 3: 拆分輸出，並行生成圖表並導出 Excel 檔案")
+            with profiler.stage('split'):
+                splitter = ReportSplitter(
+                    split_by, split_size, as_sheets=split_sheets, max_workers=max_workers,
+                    encoding_profile=encoding_profile, render_engine=render_engine,
+                    dataframe_engine=dataframe_engine)
+                output_path = splitter.run(merged_df, stats, pages, output_excel_path, title=title)
+            logger.info(f"✓ Excel 檔案已保存: {output_path}")
+            return output_path
 
-        # 4. 導出 Excel 檔案
-        logger.info("步驟 4: 導出 Excel 檔案")
-        excel_gen = ExcelGenerator(dpi=300)
-        output_path = excel_gen.save_excel(
-            figures, output_excel_path, stats, title=title)
+        excel_gen = ExcelGenerator(profile=encoding_profile)
+        # 全部頁面同時持有超出內存預算時，改為逐頁渲染並寫入（在途頁面只有一頁）
+        page_bytes = estimate_page_bytes(
+            processor.milestones_per_page, excel_gen.dpi, render_engine)
+        page_limit = ResourceGovernor().page_limit(
+            page_bytes, reserved=estimate_encode_bytes(excel_gen.dpi))
+        streaming = len(pages) > page_limit
+        if streaming:
+            logger.info(
+                f"{len(pages)} 頁估算需要 {len(pages) * page_bytes / 1024 / 1024:.0f} MB，"
+                f"超出內存預算（最多 {page_limit} 頁），改為逐頁渲染並寫入")
+
+        def iter_figures():
+            visualizer = TimelineVisualizer(engine=render_engine, dpi=excel_gen.dpi)
+            figures = profiler.iter_pages(visualizer.iter_figures(pages, stats, title=title))
+            if overview:
+                dates_ns = merged_df['date'].to_numpy(
+                    dtype='datetime64[ns]').view(np.int64)
+                events = merged_df['event']
+                figures = itertools.chain([visualizer.create_overview_figure(
+                    dates_ns, stats, title=title, weights=merged_df['count'].to_numpy(),
+                    event_lookup=lambda idx: events.iat[idx])], figures)
+            return figures
+
+        if streaming:
+            # 3-4. 逐頁生成圖表並寫入 Excel（渲染發生在寫入過程中，計入同一個階段）
+            logger.info("步驟 3: 逐頁生成可視化圖表並導出 Excel 檔案")
+            with profiler.stage('render_export'):
+                output_path = excel_gen.save_excel(
+                    iter_figures(), output_excel_path, stats, title=title, close_figures=True)
+        else:
+            # 3. 生成可視化
+            logger.info("步驟 3: 生成可視化圖表")
+            with profiler.stage('render'):
+                figures = list(iter_figures())
+            logger.info(f"✓ 生成 {len(figures)} 頁圖表")
+
+            # 4. 導出 Excel 檔案
+            logger.info("步驟 4: 導出 Excel 檔案")
+            with profiler.stage('export'):
+                output_path = excel_gen.save_excel(
+                    figures, output_excel_path, stats, title=title)
         logger.info(f"✓ Excel 檔案已保存: {output_path}")
 
         # 關閉所有圖表，釋放內存
@@ -85,18 +207,186 @@ def main(input_excel_path, output_excel_path=None, title="里程碑時間線"):
         logger.error(f"✗ 錯誤: {str(e)}", exc_info=True)
         raise
 
+    finally:
+        profiler.close()
+
+
+def _input_cache(use_input_cache):
+    """按參數或配置建立輸入快取，停用時返回 None"""
+    if use_input_cache is None:
+        use_input_cache = INPUT_CACHE_ENABLED
+    return InputCache() if use_input_cache else None
+
+
+def _main_out_of_core(input_excel_path, output_excel_path, title, memory_budget_mb,
+                encoding_profile, render_engine, overview, profiler):
+    """外存模式流程：讀取、處理、渲染和寫入均以流式進行，峰值內存受預算約束"""
+    with OutOfCoreProcessor(milestones_per_page=50, memory_budget_mb=memory_budget_mb) as processor:
+        # 1. 分塊讀取 Excel
+        logger.info(f"步驟 1: 分塊讀取 Excel 檔案: {input_excel_path}")
+        reader = ExcelReader(input_excel_path)
+        chunks = reader.iter_milestone_chunks(processor.chunk_rows)
+
+        # 2. 溢寫、歸併和統計
+        logger.info(
+            f"步驟 2: 外存數據處理（內存預算 {processor.memory_budget_mb} MB）")
+        with profiler.stage('read_process'):
+            merged_store, stats, pages = processor.process_chunks(chunks)
+        logger.info(f"✓ 合併同日期事件，共 {len(merged_store)} 個里程碑")
+        logger.info(f"✓ 分頁完成，共 {len(pages)} 頁")
+
+        # 3-4. 逐頁生成圖表並寫入 Excel
+        logger.info("步驟 3: 逐頁生成可視化圖表並導出 Excel 檔案")
+        with profiler.stage('render_export'):
+            excel_gen = ExcelGenerator(profile=encoding_profile)
+            visualizer = TimelineVisualizer(engine=render_engine, dpi=excel_gen.dpi)
+            figures = profiler.iter_pages(visualizer.iter_figures(pages, stats, title=title))
+            if overview:
+                overview_fig = visualizer.create_overview_figure(
+                    merged_store.dates_ns, stats, title=title, weights=merged_store.counts,
+                    event_lookup=merged_store.event)
+                figures = itertools.chain([overview_fig], figures)
+            output_path = excel_gen.save_excel(
+                figures,
+                output_excel_path, stats, title=title, close_figures=True)
+        logger.info(f"✓ Excel 檔案已保存: {output_path}")
+
+    logger.info("=" * 50)
+    logger.info("✓ 報告生成完成!")
+    logger.info("=" * 50)
+
+    return output_path
+
+
+def _main_date_window(input_excel_path, output_excel_path, title, start_date, end_date,
+                      date_index_dir, out_of_core, memory_budget_mb,
+                      encoding_profile, render_engine, overview, use_input_cache, profiler,
+                      dataframe_engine):
+    """日期窗口流程：首次運行建立日期索引，之後每次查詢只讀取窗口內的行"""
+    index = DateIndex(date_index_dir or project_root / "data" / "index")
+
+    # 1-2. 打開日期索引（不存在或輸入已變更時重新讀取並建立）
+    logger.info(f"步驟 1: 打開日期索引: {input_excel_path}")
+    with profiler.stage('index'):
+        store = index.open(input_excel_path)
+        if store is None:
+            reader = ExcelReader(input_excel_path, cache=_input_cache(use_input_cache))
+            if out_of_core:
+                with OutOfCoreProcessor(milestones_per_page=50,
+                                        memory_budget_mb=memory_budget_mb) as ooc:
+                    merged_store, _, _ = ooc.process_chunks(
+                        reader.iter_milestone_chunks(ooc.chunk_rows))
+                    store = index.build_from_store(merged_store, input_excel_path)
+            else:
+                processor = DataProcessor(milestones_per_page=50, engine=dataframe_engine)
+                merged_df = processor.merge_same_date_events(
+                    processor.process_data(reader.read_milestone_data()))
+                store = index.build_from_frame(merged_df, input_excel_path)
+
+    logger.info(f"步驟 2: 日期窗口查詢 {start_date} ~ {end_date}")
+    with profiler.stage('process'):
+        processor = DataProcessor(milestones_per_page=50, engine=dataframe_engine)
+        (start, end), stats, pages = processor.process_window(store, start_date, end_date)
+    logger.info(f"✓ 窗口內共 {end - start} 個里程碑，{len(pages)} 頁")
+
+    # 3-4. 逐頁生成圖表並寫入 Excel
+    logger.info("步驟 3: 逐頁生成可視化圖表並導出 Excel 檔案")
+    with profiler.stage('render_export'):
+        excel_gen = ExcelGenerator(profile=encoding_profile)
+        visualizer = TimelineVisualizer(engine=render_engine, dpi=excel_gen.dpi)
+        figures = profiler.iter_pages(visualizer.iter_figures(pages, stats, title=title))
+        if overview:
+            overview_fig = visualizer.create_overview_figure(
+                np.asarray(store.dates_ns[start:end]), stats, title=title,
+                weights=store.counts[start:end],
+                event_lookup=lambda idx: store.event(start + idx))
+            figures = itertools.chain([overview_fig], figures)
+        output_path = excel_gen.save_excel(
+            figures, output_excel_path, stats, title=title, close_figures=True)
+    logger.info(f"✓ Excel 檔案已保存: {output_path}")
+
+    logger.info("=" * 50)
+    logger.info("✓ 報告生成完成!")
+    logger.info("=" * 50)
+
+    return output_path
+
+
+def parse_args(argv=None):
+    """解析命令列參數"""
+    parser = argparse.ArgumentParser(description='從 Excel 生成里程碑時間線 Excel 報告')
+    parser.add_argument('input', nargs='?', default=None,
+                        help='輸入 Excel 檔案，預設為 data/input/sample_milestones.xlsx')
+    parser.add_argument('-o', '--output', default=None, help='輸出 Excel 檔案')
+    parser.add_argument('--title', default="里程碑時間線", help='報告標題')
+    parser.add_argument('--out-of-core', action='store_true', help='外存模式')
+    parser.add_argument('--memory-budget-mb', type=int, default=None, help='外存模式內存預算（MB）')
+    parser.add_argument('--multi-project', action='store_true', help='多項目模式')
+    parser.add_argument('--group-col', type=int, default=None, help='多項目模式的分組列索引')
+    parser.add_argument('--workers', type=int, default=None, help='多項目、拆分輸出和監視模式的工作進程數')
+    parser.add_argument('--encoding-profile', default=None, help="圖片編碼配置（fast、small、print）")
+    parser.add_argument('--render-engine', default=None, help="渲染引擎（matplotlib、pil）")
+    parser.add_argument('--overview', action='store_true', help='加入總覽頁')
+    parser.add_argument('--dataframe-engine', default=None, help="數據處理引擎（pandas、polars）")
+    parser.add_argument('--start-date', default=None, help='日期窗口起始日期（含）')
+    parser.add_argument('--end-date', default=None, help='日期窗口結束日期（含）')
+    parser.add_argument('--split-by', choices=SPLIT_MODES, default=None,
+                        help='拆分輸出：按頁數（pages）、大小（bytes）或日曆週期（period）')
+    parser.add_argument('--split-size', default=None,
+                        help='每部分頁數、每部分 MB 或週期（M、Q、Y）')
+    parser.add_argument('--split-sheets', action='store_true', help='拆分為工作表而不是工作簿')
+    parser.add_argument('--no-input-cache', action='store_true', help='不使用輸入快取')
+    parser.add_argument('--watch', action='store_true',
+                        help='監視輸入目錄（input 為目錄，預設 data/input），工作簿變更時自動重新生成報告')
+    parser.add_argument('--poll', action='store_true', help='監視模式強制使用輪詢')
+    parser.add_argument('--profile', action='store_true', help='按階段收集性能分析數據')
+    parser.add_argument('--profile-dir', default=None, help='性能分析輸出目錄')
+    parser.add_argument('--profile-pages', action='store_true', help='性能分析時每頁單獨統計')
+    return parser.parse_args(argv)
+
+
+def watch(args):
+    """監視模式：輸出目錄取 -o（預設 data/output）"""
+    from src.watcher import InputWatcher
+
+    input_dir = Path(args.input) if args.input else project_root / "data" / "input"
+    output_dir = Path(args.output) if args.output else project_root / "data" / "output"
+    watcher = InputWatcher(
+        input_dir, output_dir, max_workers=args.workers, use_polling=args.poll,
+        title=args.title, encoding_profile=args.encoding_profile,
+        render_engine=args.render_engine, overview=args.overview,
+        dataframe_engine=args.dataframe_engine, use_input_cache=False if args.no_input_cache else None)
+    watcher.run()
+
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.watch:
+        watch(args)
+        sys.exit(0)
+
     # 示例：使用 data/input 目錄下的 Excel 檔案
-    input_file = project_root / "data" / "input" / "sample_milestones.xlsx"
+    input_file = Path(args.input) if args.input else \
+        project_root / "data" / "input" / "sample_milestones.xlsx"
 
     if input_file.exists():
-        main(str(input_file))
+        main(str(input_file), args.output, title=args.title,
+             out_of_core=args.out_of_core, memory_budget_mb=args.memory_budget_mb,
+             multi_project=args.multi_project, group_col=args.group_col,
+             max_workers=args.workers, encoding_profile=args.encoding_profile,
+             render_engine=args.render_engine, overview=args.overview,
+             start_date=args.start_date, end_date=args.end_date,
+             use_input_cache=False if args.no_input_cache else None,
+             profile=args.profile, profile_dir=args.profile_dir,
+             profile_pages=args.profile_pages, dataframe_engine=args.dataframe_engine,
+             split_by=args.split_by, split_size=args.split_size,
+             split_sheets=args.split_sheets)
     else:
-        print(f"示例檔案不存在: {input_file}")
+        print(f"檔案不存在: {input_file}")
         print("請先在 data/input 目錄下放置 Excel 檔案")
         print("\n用法示例:")
         print("  python main.py")
+        print("  python main.py data/input/milestones.xlsx -o report.xlsx --profile")
         print("\n或在代碼中調用:")
         print("  from main import main")
         print("  main('path/to/your/file.xlsx')")
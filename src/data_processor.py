@@ -14,14 +14,18 @@ logger = logging.getLogger(__name__)
 class DataProcessor:
     """數據處理和統計分析"""
 
-    def __init__(self, milestones_per_page=50):
+    def __init__(self, milestones_per_page=50, engine=None):
         """
         初始化數據處理器
 
         Args:
             milestones_per_page (int): 每頁最大里程碑數
+            engine (str): 數據框引擎（'pandas' 或 'polars'），預設取 config.settings.DATAFRAME_ENGINE
         """
+        from src.dataframe_engine import get_engine
+
         self.milestones_per_page = milestones_per_page
+        self.engine = get_engine(engine)
 
     def process_data(self, df):
         """
@@ -37,7 +41,7 @@ class DataProcessor:
             raise ValueError("數據為空")
 
         # 移除重複項（保留第一個）
-        df = df.drop_duplicates(subset=['date', 'event'], keep='first')
+        df = self.engine.drop_duplicates(df)
 
         return df
 
@@ -51,10 +55,7 @@ class DataProcessor:
         Returns:
             pd.DataFrame: 合併後的 DataFrame
         """
-        merged_df = df.groupby('date', as_index=False).agg(
-            {'event': lambda x: ', '.join(x)}
-        )
-        return merged_df.sort_values('date').reset_index(drop=True)
+        return self.engine.merge_same_date_events(df)
 
     def calculate_statistics(self, df):
         """
@@ -74,12 +75,7 @@ class DataProcessor:
         total_days = (end_date - start_date).days
 
         # 計算月度分佈
-        df['year_month'] = df['date'].dt.to_period('M')
-        monthly_dist = df.groupby('year_month').size().to_dict()
-        monthly_list = [
-            {'period': str(period), 'count': count}
-            for period, count in sorted(monthly_dist.items())
-        ]
+        monthly_list = self.engine.monthly_distribution(df)
 
         # 計算里程碑密度（每月平均）
         total_months = len(monthly_list)
@@ -121,21 +117,71 @@ class DataProcessor:
         logger.info(f"分頁完成: 共 {num_pages} 頁")
         return pages
 
-    def process_all(self, df):
+    def select_window(self, merged_df, start_date=None, end_date=None):
+        """
+        以二分查找截取日期範圍 [start_date, end_date]（merged_df 需已按日期排序）
+
+        Args:
+            merged_df (pd.DataFrame): 合併後的 DataFrame
+            start_date: 起始日期（含），None 表示不限
+            end_date: 結束日期（含），None 表示不限
+
+        Returns:
+            pd.DataFrame: 範圍內的 DataFrame
+        """
+        dates = merged_df['date'].to_numpy(dtype='datetime64[ns]')
+        start = 0 if start_date is None else int(np.searchsorted(
+            dates, np.datetime64(pd.Timestamp(start_date)), side='left'))
+        end = len(dates) if end_date is None else int(np.searchsorted(
+            dates, np.datetime64(pd.Timestamp(end_date)), side='right'))
+        return merged_df.iloc[start:max(start, end)].reset_index(drop=True)
+
+    def process_window(self, store, start_date=None, end_date=None):
+        """
+        日期窗口查詢：在有序的日期索引上二分定位行範圍，統計和分頁只讀取窗口內的數據
+
+        Args:
+            store (MilestoneStore): 合併後的日期索引（見 src.date_index）
+            start_date: 起始日期（含），None 表示不限
+            end_date: 結束日期（含），None 表示不限
+
+        Returns:
+            tuple: ((start, end) 行範圍, 統計信息, SpilledPages 分頁序列)
+        """
+        from src.out_of_core import SpilledPages
+
+        start, end = store.window(start_date, end_date)
+        if start == end:
+            raise ValueError(f"日期範圍 {start_date} ~ {end_date} 內沒有里程碑")
+        logger.info(f"日期窗口 {start_date} ~ {end_date}: 第 {start} - {end} 行，共 {end - start} 個里程碑")
+
+        stats = self.calculate_statistics(pd.DataFrame(
+            {'date': pd.to_datetime(np.asarray(store.dates[start:end]))}))
+
+        pages = SpilledPages(store, self.milestones_per_page, start, end)
+        logger.info(f"分頁完成: 共 {len(pages)} 頁")
+        return (start, end), stats, pages
+
+    def process_all(self, df, start_date=None, end_date=None):
         """
         完整處理流程
 
         Args:
             df (pd.DataFrame): 輸入 DataFrame
+            start_date: 日期窗口起始日期（含），None 表示不限
+            end_date: 日期窗口結束日期（含），None 表示不限
 
         Returns:
             tuple: (合併後的 DataFrame, 統計信息, 分頁列表)
         """
-        # 1. 初步數據驗證
-        df = self.process_data(df)
-
-        # 2. 合併同日期事件
-        merged_df = self.merge_same_date_events(df)
+        # 1-2. 去重並合併同日期事件（Polars 引擎融合為一個查詢）
+        if df.empty:
+            raise ValueError("數據為空")
+        merged_df = self.engine.dedup_and_merge(df)
+        if start_date is not None or end_date is not None:
+            merged_df = self.select_window(merged_df, start_date, end_date)
+            if merged_df.empty:
+                raise ValueError(f"日期範圍 {start_date} ~ {end_date} 內沒有里程碑")
 
         # 3. 計算統計信息
         stats = self.calculate_statistics(merged_df)
@@ -0,0 +1,131 @@
+"""
+數據框引擎模塊：DataProcessor 的去重、同日期合併和月度統計實現（pandas 預設，Polars 可選）
+"""
+
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DATAFRAME_ENGINES = ('pandas', 'polars')
+
+
+class PandasEngine:
+    """pandas 實現（預設）"""
+
+    name = 'pandas'
+
+    def drop_duplicates(self, df):
+        """移除重複的 (date, event)，保留第一個"""
+        return df.drop_duplicates(subset=['date', 'event'], keep='first')
+
+    def merge_same_date_events(self, df):
+        """同日期事件以 ', ' 合併，按日期排序；'count' 列為每個日期合併的事件數"""
+        merged_df = df.groupby('date', as_index=False).agg(
+            event=('event', lambda x: ', '.join(x)),
+            count=('event', 'size'),
+        )
+        return merged_df.sort_values('date').reset_index(drop=True)
+
+    def dedup_and_merge(self, df):
+        """去重後合併同日期事件"""
+        return self.merge_same_date_events(self.drop_duplicates(df))
+
+    def monthly_distribution(self, df):
+        """
+        月度分佈
+
+        Returns:
+            list: 按月份排序的 {'period': 'YYYY-MM', 'count': int}
+        """
+        monthly_dist = df['date'].dt.to_period('M').value_counts().sort_index()
+        return [
+            {'period': str(period), 'count': int(count)}
+            for period, count in monthly_dist.items()
+        ]
+
+
+class PolarsEngine(PandasEngine):
+    """
+    Polars 實現：去重與合併融合為一個惰性查詢，由 Polars 多線程執行
+
+    輸入和輸出仍為 pandas DataFrame，結果與 PandasEngine 完全相同
+    """
+
+    name = 'polars'
+
+    def __init__(self):
+        try:
+            import polars
+        except ImportError:
+            raise ImportError("Polars 引擎需要安裝 polars: pip install polars") from None
+        self.pl = polars
+
+    def _to_polars(self, df):
+        # 不經 pyarrow：日期直接取 numpy 陣列，事件取 Python 字串
+        return self.pl.DataFrame({
+            'date': df['date'].to_numpy(),
+            'event': self.pl.Series(df['event'].tolist(), dtype=self.pl.String),
+        })
+
+    def _to_pandas(self, frame, like):
+        return pd.DataFrame({
+            'date': frame['date'].to_numpy().astype(like['date'].dtype, copy=False),
+            'event': pd.array(frame['event'].to_list(), dtype=like['event'].dtype),
+            **({'count': frame['count'].to_numpy()} if 'count' in frame.columns else {}),
+        })
+
+    def _merge_plan(self, lazy):
+        pl = self.pl
+        return (
+            lazy.group_by('date', maintain_order=True)
+            .agg(pl.col('event').str.join(', '), pl.len().cast(pl.Int64).alias('count'))
+            .sort('date')
+        )
+
+    def drop_duplicates(self, df):
+        frame = self._to_polars(df).lazy().unique(
+            subset=['date', 'event'], keep='first', maintain_order=True).collect()
+        return self._to_pandas(frame, df)
+
+    def merge_same_date_events(self, df):
+        frame = self._merge_plan(self._to_polars(df).lazy()).collect()
+        return self._to_pandas(frame, df)
+
+    def dedup_and_merge(self, df):
+        lazy = self._to_polars(df).lazy().unique(
+            subset=['date', 'event'], keep='first', maintain_order=True)
+        return self._to_pandas(self._merge_plan(lazy).collect(), df)
+
+    def monthly_distribution(self, df):
+        pl = self.pl
+        counts = (
+            pl.DataFrame({'date': df['date'].to_numpy()}).lazy()
+            .group_by(pl.col('date').dt.strftime('%Y-%m').alias('period'))
+            .len()
+            .sort('period')
+            .collect()
+        )
+        return [
+            {'period': period, 'count': int(count)}
+            for period, count in zip(counts['period'].to_list(), counts['len'].to_list())
+        ]
+
+
+def get_engine(name=None):
+    """
+    取得數據框引擎
+
+    Args:
+        name (str): 'pandas' 或 'polars'，預設取 config.settings.DATAFRAME_ENGINE
+
+    Returns:
+        PandasEngine 或 PolarsEngine
+    """
+    from config.settings import DATAFRAME_ENGINE
+
+    name = name or DATAFRAME_ENGINE
+    if name not in DATAFRAME_ENGINES:
+        raise ValueError(f"未知的數據框引擎: {name}")
+    return PolarsEngine() if name == 'polars' else PandasEngine()
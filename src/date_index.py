@@ -0,0 +1,130 @@
+"""
+日期索引模塊：將合併後的里程碑持久化為有序的記憶體映射存儲，支援日期窗口查詢
+"""
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+import shutil
+
+from src.milestone_store import MilestoneStore, publish_store
+
+logger = logging.getLogger(__name__)
+
+
+def source_fingerprint(input_path):
+    """
+    輸入檔案指紋（路徑、大小、修改時間），用於判斷索引是否過期
+
+    Args:
+        input_path (str): 輸入檔案路徑
+
+    Returns:
+        dict: {'path', 'size', 'mtime_ns'}
+    """
+    path = Path(input_path).resolve()
+    stat = path.stat()
+    return {'path': str(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class DateIndex:
+    """
+    持久化的日期索引目錄
+
+    每個輸入檔案對應 root 下的一個 MilestoneStore（按日期排序、同日期事件已合併），
+    meta.json 記錄來源檔案指紋；輸入檔案變更後索引自動重建
+    """
+
+    def __init__(self, root):
+        """
+        初始化日期索引
+
+        Args:
+            root (str or Path): 索引根目錄
+        """
+        self.root = Path(root)
+
+    def path_for(self, input_path):
+        """輸入檔案對應的索引目錄"""
+        resolved = str(Path(input_path).resolve())
+        return self.root / hashlib.sha1(resolved.encode('utf-8')).hexdigest()[:16]
+
+    def open(self, input_path):
+        """
+        打開輸入檔案的索引
+
+        Args:
+            input_path (str): 輸入檔案路徑
+
+        Returns:
+            MilestoneStore: 索引存儲；不存在或已過期時返回 None
+        """
+        directory = self.path_for(input_path)
+        try:
+            store = MilestoneStore(directory)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"日期索引無效，需要重建: {directory}（{e}）")
+            return None
+
+        if store.meta.get('source') != source_fingerprint(input_path):
+            logger.info(f"日期索引已過期: {directory}")
+            return None
+        if not store.has_counts:
+            logger.info(f"日期索引缺少每行事件數，需要重建: {directory}")
+            return None
+
+        logger.info(f"使用日期索引: {directory}（{len(store)} 個里程碑）")
+        return store
+
+    def build_from_frame(self, merged_df, input_path):
+        """
+        由合併後的 DataFrame 建立索引
+
+        Args:
+            merged_df (pd.DataFrame): 已按日期排序、同日期事件已合併的 DataFrame
+            input_path (str): 輸入檔案路徑
+
+        Returns:
+            MilestoneStore: 索引存儲
+        """
+        return self._build(
+            input_path,
+            lambda tmp_dir, meta: MilestoneStore.from_frame(merged_df, tmp_dir, meta))
+
+    def build_from_store(self, merged_store, input_path):
+        """
+        由外存模式的合併結果建立索引（按批次複製，不整體載入內存）
+
+        Args:
+            merged_store (MilestoneStore): 已合併的存儲
+            input_path (str): 輸入檔案路徑
+
+        Returns:
+            MilestoneStore: 索引存儲
+        """
+        return self._build(input_path, merged_store.copy_to)
+
+    def _build(self, input_path, write):
+        """
+        寫入臨時目錄後再發佈（見 publish_store），中途失敗不會留下半成品索引或臨時目錄
+
+        多個進程同時建立同一個索引時，先發佈的一方生效，其餘進程丟棄自己的臨時目錄並
+        使用已發佈的索引；只有過期或無效的舊索引會被刪除
+        """
+        directory = self.path_for(input_path)
+        tmp_dir = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        try:
+            write(tmp_dir, {'source': source_fingerprint(input_path)})
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        store, published = publish_store(tmp_dir, directory, lambda: self.open(input_path))
+        if published:
+            logger.info(f"日期索引已建立: {directory}（{len(store)} 個里程碑）")
+        return store
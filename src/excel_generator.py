@@ -4,35 +4,119 @@ Excel 生成模塊：將圖表保存到 Excel 檔案
 
 from openpyxl import Workbook
 from openpyxl.drawing.image import Image as XLImage
+from openpyxl.packaging.relationship import get_rels_path
 from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.writer.excel import ExcelWriter
+from openpyxl.xml.functions import tostring
+from datetime import datetime, timezone
 from pathlib import Path
+from zipfile import ZipFile, ZIP_DEFLATED
+import hashlib
+import io
 import logging
-import tempfile
 import os
+import re
+import time
+import zlib
 from PIL import Image as PILImage
+import matplotlib.pyplot as plt
 
 logger = logging.getLogger(__name__)
 
+# Excel 工作表名稱限制
+SHEET_TITLE_MAX_LEN = 31
+SHEET_TITLE_INVALID_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+# 編碼配置中 zlib_strategy 對應的 zlib 常數
+ZLIB_STRATEGIES = {
+    'default': zlib.Z_DEFAULT_STRATEGY,
+    'filtered': zlib.Z_FILTERED,
+    'huffman': zlib.Z_HUFFMAN_ONLY,
+    'rle': zlib.Z_RLE,
+    'fixed': zlib.Z_FIXED,
+}
+
+
+class _DedupExcelWriter(ExcelWriter):
+    """
+    內容相同的圖片只寫入一份 xl/media，所有繪圖關係引用同一個媒體部件
+
+    圖片以 content_digest 屬性（由 ExcelGenerator 設定）識別內容
+    """
+
+    def __init__(self, workbook, archive):
+        super().__init__(workbook, archive)
+        self._media_ids = {}
+        self.image_count = 0
+
+    def _write_drawing(self, drawing):
+        """與 ExcelWriter._write_drawing 相同，但重複的圖片沿用已寫入媒體的編號"""
+        self._drawings.append(drawing)
+        drawing._id = len(self._drawings)
+        for chart in drawing.charts:
+            self._charts.append(chart)
+            chart._id = len(self._charts)
+        for img in drawing.images:
+            self.image_count += 1
+            digest = getattr(img, 'content_digest', None) or id(img)
+            media_id = self._media_ids.get(digest)
+            if media_id is None:
+                self._images.append(img)
+                media_id = self._media_ids[digest] = len(self._images)
+            img._id = media_id
+        rels_path = get_rels_path(drawing.path)[1:]
+        self._archive.writestr(drawing.path[1:], tostring(drawing._write()))
+        self._archive.writestr(rels_path, tostring(drawing._write_rels()))
+        self.manifest.append(drawing)
+
 
 class ExcelGenerator:
     """Excel 檔案生成器"""
 
-    def __init__(self, dpi=300):
+    def __init__(self, dpi=None, profile=None):
         """
         初始化 Excel 生成器
 
         Args:
-            dpi (int): 圖表 DPI 解析度
+            dpi (int): 圖表 DPI 解析度，預設取編碼配置中的 dpi
+            profile (str): 圖片編碼配置名稱（'fast'、'small'、'print'），
+                預設取 config.settings.DEFAULT_ENCODING_PROFILE
         """
-        self.dpi = dpi
-        self.temp_images = []  # 暫存圖片路徑列表
+        from config.settings import ENCODING_PROFILES, DEFAULT_ENCODING_PROFILE
+
+        self.profile = profile or DEFAULT_ENCODING_PROFILE
+        if self.profile not in ENCODING_PROFILES:
+            raise ValueError(f"未知的圖片編碼配置: {self.profile}")
+        self.profile_settings = ENCODING_PROFILES[self.profile]
+        self.dpi = dpi or self.profile_settings['dpi']
+        self.encode_stats = []  # 每頁編碼耗時和大小
 
-    def save_excel(self, figures, output_path, stats, title="里程碑時間線"):
+    def save_excel(self, figures, output_path, stats, title="里程碑時間線", close_figures=False):
         """
         將圖表和統計信息保存為 Excel 檔案
 
         Args:
-            figures (list): matplotlib Figure 物件列表
+            figures (iterable): matplotlib Figure 物件列表或迭代器
+            output_path (str): 輸出檔案路徑
+            stats (dict): 統計信息字典
+            title (str): 報告標題
+            close_figures (bool): 每頁轉為圖片後立即關閉 Figure，配合迭代器可限制內存
+
+        Returns:
+            Path: 輸出檔案路徑
+        """
+        self.encode_stats = []
+        output_path = self.save_encoded_excel(
+            self.encode_figures(figures, close_figures), output_path, stats, title=title)
+        self.log_encoding_summary()
+        return output_path
+
+    def save_encoded_excel(self, images, output_path, stats, title="里程碑時間線"):
+        """
+        將已編碼的頁面圖片和統計信息保存為 Excel 檔案
+
+        Args:
+            images (iterable): PNG 位元組迭代器，每個元素對應一頁（按頁序）
             output_path (str): 輸出檔案路徑
             stats (dict): 統計信息字典
             title (str): 報告標題
@@ -49,143 +133,398 @@ class ExcelGenerator:
             ws = wb.active
             ws.title = "時間線"
 
-            # 設定欄寬和行高
-            ws.column_dimensions['A'].width = 40
-            ws.row_dimensions[1].height = 30
-
-            # 標題
-            ws['A1'] = title
-            ws['A1'].font = Font(name='SimHei', size=20,
-                                 bold=True, color='FFFFFF')
-            ws['A1'].fill = PatternFill(
-                start_color='4472C4', end_color='4472C4', fill_type='solid')
-            ws['A1'].alignment = Alignment(
-                horizontal='center', vertical='center')
-            ws.merge_cells('A1:D1')
-
-            # 統計信息
-            current_row = 3
-            stats_style = Font(name='SimHei', size=12)
-
-            ws[f'A{current_row}'] = "統計信息"
-            ws[f'A{current_row}'].font = Font(
-                name='SimHei', size=14, bold=True)
-            current_row += 1
+            page_count = self._write_report_sheet(ws, images, stats, title)
 
-            # 統計數據表格
-            stat_items = [
-                ('里程碑總數', f"{stats['total_milestones']}"),
-                ('開始日期', f"{stats['start_date'].strftime('%Y-%m-%d')}"),
-                ('結束日期', f"{stats['end_date'].strftime('%Y-%m-%d')}"),
-                ('時間跨度', f"{stats['total_days']} 天"),
-                ('里程碑密度', f"{stats['milestone_density']:.2f} 個/月"),
-            ]
-
-            for label, value in stat_items:
-                ws[f'A{current_row}'] = label
-                ws[f'B{current_row}'] = value
-                ws[f'A{current_row}'].font = stats_style
-                ws[f'B{current_row}'].font = stats_style
-                ws[f'A{current_row}'].fill = PatternFill(
-                    start_color='FFF2CC', end_color='FFF2CC', fill_type='solid')
-                ws[f'B{current_row}'].fill = PatternFill(
-                    start_color='FFF2CC', end_color='FFF2CC', fill_type='solid')
-                current_row += 1
-
-            # 圖表
-            current_row += 2
-            ws[f'A{current_row}'] = "時間線圖表"
-            ws[f'A{current_row}'].font = Font(
-                name='SimHei', size=14, bold=True)
-            current_row += 1
+            # 保存工作簿
+            self._save_workbook(wb, output_path)
 
-            # 將每個 Figure 保存為圖片並插入到 Excel
-            for idx, fig in enumerate(figures, 1):
-                # 暫存圖片（DPI=150 + 增加 Figure 尺寸）
-                temp_image_path = self._save_figure_as_image(fig, idx, dpi=150)
+            logger.info(f"Excel 生成成功: {output_path}")
+            logger.info(f"總共 {page_count} 頁")
 
-                # 設定行高以適應圖片
-                ws.row_dimensions[current_row].height = 380  # 約 5 英寸高度
+            return output_path
 
-                # 插入圖片
-                img = XLImage(temp_image_path)
-                img.width = 700  # 像素寬度，約 9.3 英寸
-                img.height = 380  # 像素高度
-                ws.add_image(img, f'A{current_row}')
+        except Exception as e:
+            logger.error(f"Excel 生成失敗: {str(e)}", exc_info=True)
+            raise
 
-                current_row += 21  # 每張圖片佔用約 21 行
-                if idx < len(figures):
-                    current_row += 2
+    def save_multi_project_excel(self, projects, output_path, title="里程碑時間線",
+                                 name_header='項目'):
+        """
+        將多個項目保存到同一個 Excel 檔案：索引工作表 + 每個項目一個工作表
 
-            # 保存工作簿
-            wb.save(str(output_path))
+        Args:
+            projects (list): 項目列表，每個元素為 {'name', 'stats', 'images'} 字典，
+                images 為已編碼的 PNG 位元組列表
+            output_path (str): 輸出檔案路徑
+            title (str): 報告標題（顯示在索引工作表）
+            name_header (str): 索引工作表名稱列的表頭
 
-            # 清理暫存圖片
-            self._cleanup_temp_images()
+        Returns:
+            Path: 輸出檔案路徑
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
 
-            logger.info(f"Excel 生成成功: {output_path}")
-            logger.info(f"總共 {len(figures)} 頁")
+        try:
+            wb = Workbook()
+            ws_index = wb.active
+            ws_index.title = "索引"
+
+            used_titles = {ws_index.title}
+            sheet_titles = []
+            for project in projects:
+                sheet_title = self._safe_sheet_title(
+                    project['name'], used_titles)
+                used_titles.add(sheet_title)
+                sheet_titles.append(sheet_title)
+
+                ws = wb.create_sheet(sheet_title)
+                self._write_report_sheet(
+                    ws, project['images'], project['stats'], project['name'])
+
+            links = [f"#'{sheet_title}'!A1" for sheet_title in sheet_titles]
+            self._write_index_sheet(ws_index, projects, links, title, name_header)
+
+            self._save_workbook(wb, output_path)
+
+            logger.info(f"多項目 Excel 生成成功: {output_path}")
+            logger.info(f"總共 {len(projects)} 個項目")
 
             return output_path
 
         except Exception as e:
-            self._cleanup_temp_images()
             logger.error(f"Excel 生成失敗: {str(e)}", exc_info=True)
             raise
 
-    def _save_figure_as_image(self, fig, page_num, dpi=150):
+    def _write_report_sheet(self, ws, images, stats, title):
         """
-        將 matplotlib Figure 保存為臨時圖片
+        在工作表中寫入標題、統計信息和時間線圖片
 
         Args:
-            fig (matplotlib.figure.Figure): 圖表物件
-            page_num (int): 頁碼
-            dpi (int): 圖片解析度
+            ws (Worksheet): 目標工作表
+            images (iterable): PNG 位元組迭代器，每個元素對應一頁
+            stats (dict): 統計信息字典
+            title (str): 報告標題
 
         Returns:
-            str: 圖片檔案路徑
-        """
-        # 建立暫存目錄
-        temp_dir = tempfile.gettempdir()
-        temp_image_path = os.path.join(
-            temp_dir,
-            f'timeline_page_{page_num}_{os.getpid()}.png'
-        )
-
-        # 先以 150 DPI 保存
-        fig.savefig(
-            temp_image_path,
-            dpi=150,
-            bbox_inches='tight',
-            facecolor='white',
-            edgecolor='none',
-            pad_inches=0.1
-        )
-
-        # 調整圖片大小以確保符合 PIL 限制
+            int: 寫入的頁數
+        """
+        # 設定欄寬和行高
+        ws.column_dimensions['A'].width = 40
+        ws.row_dimensions[1].height = 30
+
+        # 標題
+        ws['A1'] = title
+        ws['A1'].font = Font(name='SimHei', size=20,
+                             bold=True, color='FFFFFF')
+        ws['A1'].fill = PatternFill(
+            start_color='4472C4', end_color='4472C4', fill_type='solid')
+        ws['A1'].alignment = Alignment(
+            horizontal='center', vertical='center')
+        ws.merge_cells('A1:D1')
+
+        # 統計信息
+        current_row = 3
+        stats_style = Font(name='SimHei', size=12)
+
+        ws[f'A{current_row}'] = "統計信息"
+        ws[f'A{current_row}'].font = Font(
+            name='SimHei', size=14, bold=True)
+        current_row += 1
+
+        # 統計數據表格
+        stat_items = [
+            ('里程碑總數', f"{stats['total_milestones']}"),
+            ('開始日期', f"{stats['start_date'].strftime('%Y-%m-%d')}"),
+            ('結束日期', f"{stats['end_date'].strftime('%Y-%m-%d')}"),
+            ('時間跨度', f"{stats['total_days']} 天"),
+            ('里程碑密度', f"{stats['milestone_density']:.2f} 個/月"),
+        ]
+
+        for label, value in stat_items:
+            ws[f'A{current_row}'] = label
+            ws[f'B{current_row}'] = value
+            ws[f'A{current_row}'].font = stats_style
+            ws[f'B{current_row}'].font = stats_style
+            ws[f'A{current_row}'].fill = PatternFill(
+                start_color='FFF2CC', end_color='FFF2CC', fill_type='solid')
+            ws[f'B{current_row}'].fill = PatternFill(
+                start_color='FFF2CC', end_color='FFF2CC', fill_type='solid')
+            current_row += 1
+
+        # 圖表
+        current_row += 2
+        ws[f'A{current_row}'] = "時間線圖表"
+        ws[f'A{current_row}'].font = Font(
+            name='SimHei', size=14, bold=True)
+        current_row += 1
+
+        # 插入每頁圖片
+        page_count = 0
+        for idx, image_bytes in enumerate(images, 1):
+            if idx > 1:
+                current_row += 2
+
+            # 設定行高以適應圖片
+            ws.row_dimensions[current_row].height = 380  # 約 5 英寸高度
+
+            # 插入圖片
+            img = XLImage(io.BytesIO(image_bytes))
+            img.content_digest = hashlib.blake2b(image_bytes, digest_size=16).digest()
+            img.width = 700  # 像素寬度，約 9.3 英寸
+            img.height = 380  # 像素高度
+            ws.add_image(img, f'A{current_row}')
+
+            current_row += 21  # 每張圖片佔用約 21 行
+            page_count = idx
+
+        return page_count
+
+    def _save_workbook(self, wb, output_path):
+        """
+        保存工作簿（同 openpyxl.writer.excel.save_workbook，但重複圖片只寫入一次）
+
+        先寫入同目錄的臨時檔案再原子替換，讀取方不會看到寫到一半的工作簿
+
+        Args:
+            wb (Workbook): 工作簿
+            output_path (Path): 輸出檔案路徑
+        """
+        tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
         try:
-            img = PILImage.open(temp_image_path)
-            # 限制圖片最大尺寸，防止超過 PIL 限制
-            max_size = (1400, 900)
-            img.thumbnail(max_size, PILImage.Resampling.LANCZOS)
-            img.save(temp_image_path, 'PNG', optimize=True)
-            img.close()
-        except Exception as e:
-            logger.warning(f"調整圖片大小失敗: {str(e)}")
+            with ZipFile(tmp_path, 'w', ZIP_DEFLATED, allowZip64=True) as archive:
+                wb.properties.modified = datetime.now(tz=timezone.utc).replace(tzinfo=None)
+                writer = _DedupExcelWriter(wb, archive)
+                writer.save()
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
 
-        self.temp_images.append(temp_image_path)
-        logger.debug(f"暫存圖片: {temp_image_path}")
+        unique = len(writer._images)
+        if writer.image_count > unique:
+            logger.info(
+                f"圖片去重: {writer.image_count} 張圖片，寫入 {unique} 個媒體檔案")
 
-        return temp_image_path
+    def save_index_excel(self, parts, links, output_path, title="里程碑時間線",
+                         name_header='部分'):
+        """
+        保存只含索引工作表的 Excel 檔案，每行鏈接到一個外部工作簿（拆分輸出）
 
-    def _cleanup_temp_images(self):
-        """清理暫存圖片"""
-        for temp_image_path in self.temp_images:
-            try:
-                if os.path.exists(temp_image_path):
-                    os.remove(temp_image_path)
-                    logger.debug(f"刪除暫存圖片: {temp_image_path}")
-            except Exception as e:
-                logger.warning(f"無法刪除暫存圖片 {temp_image_path}: {str(e)}")
+        Args:
+            parts (list): 每個元素為 {'name', 'stats', 'page_count'} 字典
+            links (list): 與 parts 對應的鏈接目標（相對於索引檔案的路徑）
+            output_path (str): 輸出檔案路徑
+            title (str): 報告標題
+            name_header (str): 名稱列的表頭
 
-        self.temp_images.clear()
+        Returns:
+            Path: 輸出檔案路徑
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "索引"
+        self._write_index_sheet(ws, parts, links, title, name_header)
+        self._save_workbook(wb, output_path)
+
+        logger.info(f"索引 Excel 生成成功: {output_path}（{len(parts)} 個部分）")
+        return output_path
+
+    def _write_index_sheet(self, ws, projects, links, title, name_header='項目'):
+        """
+        寫入索引工作表，每行鏈接到對應的工作表或工作簿
+
+        Args:
+            ws (Worksheet): 索引工作表
+            projects (list): 項目列表
+            links (list): 與 projects 對應的超鏈接目標
+            title (str): 報告標題
+            name_header (str): 名稱列的表頭
+        """
+        ws.column_dimensions['A'].width = 40
+        for col in 'BCDE':
+            ws.column_dimensions[col].width = 16
+        ws.row_dimensions[1].height = 30
+
+        ws['A1'] = title
+        ws['A1'].font = Font(name='SimHei', size=20,
+                             bold=True, color='FFFFFF')
+        ws['A1'].fill = PatternFill(
+            start_color='4472C4', end_color='4472C4', fill_type='solid')
+        ws['A1'].alignment = Alignment(
+            horizontal='center', vertical='center')
+        ws.merge_cells('A1:E1')
+
+        headers = [name_header, '里程碑總數', '開始日期', '結束日期', '頁數']
+        for col, header in enumerate(headers, 1):
+            cell = ws.cell(row=3, column=col, value=header)
+            cell.font = Font(name='SimHei', size=12, bold=True)
+            cell.fill = PatternFill(
+                start_color='FFF2CC', end_color='FFF2CC', fill_type='solid')
+
+        for row, (project, link) in enumerate(zip(projects, links), 4):
+            stats = project['stats']
+            name_cell = ws.cell(row=row, column=1, value=project['name'])
+            name_cell.hyperlink = link
+            name_cell.font = Font(name='SimHei', size=12,
+                                  color='0563C1', underline='single')
+            ws.cell(row=row, column=2, value=stats['total_milestones'])
+            ws.cell(row=row, column=3,
+                    value=stats['start_date'].strftime('%Y-%m-%d'))
+            ws.cell(row=row, column=4,
+                    value=stats['end_date'].strftime('%Y-%m-%d'))
+            page_count = project['page_count'] if 'page_count' in project else len(project['images'])
+            ws.cell(row=row, column=5, value=page_count)
+
+    @staticmethod
+    def _safe_sheet_title(name, used_titles):
+        """
+        轉換為合法且不重複的 Excel 工作表名稱
+
+        Args:
+            name (str): 原始名稱
+            used_titles (set): 已使用的名稱
+
+        Returns:
+            str: 合法的工作表名稱
+        """
+        base = SHEET_TITLE_INVALID_CHARS.sub(
+            '_', str(name)).strip("'") or "項目"
+        base = base[:SHEET_TITLE_MAX_LEN]
+        candidate = base
+        suffix = 2
+        while candidate.lower() in {t.lower() for t in used_titles}:
+            tail = f"_{suffix}"
+            candidate = base[:SHEET_TITLE_MAX_LEN - len(tail)] + tail
+            suffix += 1
+        return candidate
+
+    def encode_figures(self, figures, close_figures=False):
+        """
+        逐個將 Figure 編碼為 PNG 位元組
+
+        Args:
+            figures (iterable): matplotlib Figure 或 PIL 頁面圖片迭代器
+            close_figures (bool): 編碼後立即關閉 Figure
+
+        Yields:
+            bytes: PNG 位元組
+        """
+        for fig in figures:
+            image_bytes = self.encode_figure(fig)
+            if close_figures and not isinstance(fig, PILImage.Image):
+                plt.close(fig)
+            yield image_bytes
+
+    def encode_figure(self, fig):
+        """
+        按編碼配置將 matplotlib Figure 編碼為 PNG 位元組（可跨進程傳遞）
+
+        Args:
+            fig (matplotlib.figure.Figure or PIL.Image.Image): 圖表物件，
+                pil 引擎已光柵化的頁面圖片直接進入編碼步驟
+
+        Returns:
+            bytes: PNG 位元組
+        """
+        profile = self.profile_settings
+        start = time.perf_counter()
+        buffer = io.BytesIO()
+
+        if isinstance(fig, PILImage.Image):
+            source = fig
+        else:
+            # 中間結果不壓縮，只在最終編碼時壓縮一次
+            fig.savefig(
+                buffer,
+                format='png',
+                dpi=self.dpi,
+                bbox_inches='tight',
+                facecolor='white',
+                edgecolor='none',
+                pad_inches=0.1,
+                pil_kwargs={'compress_level': 0}
+            )
+            buffer.seek(0)
+            source = PILImage.open(buffer)
+        rendered = time.perf_counter()
+
+        try:
+            # 白底圖片不需要透明通道
+            img = source.convert('RGB')
+
+            if profile['max_size']:
+                img.thumbnail(profile['max_size'],
+                              PILImage.Resampling.LANCZOS)
+
+            # 頁面只有少量顏色（漸變色、灰階、面板色），自適應調色板即可表達
+            if profile['quantize_colors']:
+                img = img.quantize(
+                    colors=profile['quantize_colors'],
+                    method=PILImage.Quantize.FASTOCTREE,
+                    dither=PILImage.Dither.NONE
+                )
+
+            encoded = io.BytesIO()
+            img.save(
+                encoded, 'PNG',
+                compress_level=profile['compress_level'],
+                compress_type=ZLIB_STRATEGIES[profile['zlib_strategy']]
+            )
+            size = img.size
+            data = encoded.getvalue()
+        except Exception as e:
+            if source is fig:
+                raise
+            logger.warning(f"圖片編碼失敗，使用原始圖片: {str(e)}")
+            data = buffer.getvalue()
+            size = None
+        finally:
+            if source is not fig:
+                source.close()
+
+        finished = time.perf_counter()
+        self.encode_stats.append({
+            'page': len(self.encode_stats) + 1,
+            'size': size,
+            'bytes': len(data),
+            'render_seconds': rendered - start,
+            'encode_seconds': finished - rendered,
+        })
+        logger.debug(
+            f"第 {len(self.encode_stats)} 頁編碼完成: {len(data) / 1024:.1f} KB，"
+            f"渲染 {rendered - start:.3f}s，編碼 {finished - rendered:.3f}s")
+
+        return data
+
+    def encoding_summary(self):
+        """
+        匯總圖片編碼統計
+
+        Returns:
+            dict: 編碼配置、頁數、總位元組、平均每頁位元組和耗時
+        """
+        pages = len(self.encode_stats)
+        total_bytes = sum(item['bytes'] for item in self.encode_stats)
+        return {
+            'profile': self.profile,
+            'dpi': self.dpi,
+            'pages': pages,
+            'total_bytes': total_bytes,
+            'bytes_per_page': total_bytes / pages if pages else 0,
+            'render_seconds': sum(item['render_seconds'] for item in self.encode_stats),
+            'encode_seconds': sum(item['encode_seconds'] for item in self.encode_stats),
+        }
+
+    def log_encoding_summary(self):
+        """輸出圖片編碼統計日誌"""
+        summary = self.encoding_summary()
+        if not summary['pages']:
+            return
+        logger.info(
+            f"圖片編碼 [{summary['profile']}, {summary['dpi']} DPI]: "
+            f"{summary['pages']} 頁，平均 {summary['bytes_per_page'] / 1024:.1f} KB/頁，"
+            f"渲染 {summary['render_seconds']:.2f}s，編碼 {summary['encode_seconds']:.2f}s")
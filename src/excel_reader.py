@@ -9,18 +9,23 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# 項目分組列為空白的行歸入的項目名稱
+UNGROUPED_PROJECT = '未分組'
+
 
 class ExcelReader:
     """讀取 Excel 檔案中的里程碑數據"""
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, cache=None):
         """
         初始化 Excel 讀取器
 
         Args:
             file_path (str): Excel 檔案路徑
+            cache (InputCache): 已解析輸入的快取（見 src.input_cache），None 表示不使用
         """
         self.file_path = Path(file_path)
+        self.cache = cache
         if not self.file_path.exists():
             raise FileNotFoundError(f"檔案不存在: {file_path}")
 
@@ -39,38 +44,178 @@ class ExcelReader:
         Returns:
             pd.DataFrame: 包含 'date' 和 'event' 列的 DataFrame
         """
+        options = {'sheet_name': sheet_name, 'date_col': date_col, 'event_col': event_col}
+        if self.cache is not None:
+            df = self.cache.load(self.file_path, options)
+            if df is not None:
+                return df
+
         try:
             df = pd.read_excel(self.file_path, sheet_name=sheet_name)
             logger.info(f"讀取 Excel 成功，共 {len(df)} 行")
 
-            # 重命名列
-            df.columns = ['date', 'event']
-
-            # 移除全空行
-            df = df.dropna(how='all')
-
-            # 轉換日期列
-            df['date'] = pd.to_datetime(df['date'], errors='coerce')
-
-            # 移除日期無效的行
-            invalid_count = df['date'].isna().sum()
-            if invalid_count > 0:
-                logger.warning(f"發現 {invalid_count} 行無效日期，已移除")
-                df = df.dropna(subset=['date'])
-
-            # 確保事件為字符串
-            df['event'] = df['event'].astype(str).str.strip()
-
-            # 移除空事件
-            df = df[df['event'] != '']
-            df = df[df['event'] != 'nan']
+            df = self._validate_frame(df)
 
             # 按日期排序
-            df = df.sort_values('date').reset_index(drop=True)
+            df = df.sort_values('date', kind='stable').reset_index(drop=True)
 
             logger.info(f"數據驗證完成，有效數據 {len(df)} 行")
+
+            if self.cache is not None:
+                try:
+                    self.cache.store(df, self.file_path, options)
+                except OSError as e:
+                    logger.warning(f"寫入輸入快取失敗: {e}")
             return df
 
         except Exception as e:
             logger.error(f"讀取檔案失敗: {str(e)}")
             raise
+
+    def iter_milestone_chunks(self, chunk_rows, sheet_name=0, date_col=0, event_col=1):
+        """
+        以固定行數分塊串流讀取里程碑數據（不將整個工作表載入內存）
+
+        Args:
+            chunk_rows (int): 每塊最大行數
+            sheet_name (int or str): 工作表名稱或索引，預設為 0
+            date_col (int): 日期列索引，預設為 0
+            event_col (int): 事件列索引，預設為 1
+
+        Yields:
+            pd.DataFrame: 已驗證、包含 'date' 和 'event' 列的數據塊（未排序）
+        """
+        if self.file_path.suffix.lower() != '.xlsx':
+            # .xls 不支援串流讀取，退回整表讀取後再分塊
+            df = self.read_milestone_data(sheet_name, date_col, event_col)
+            for start in range(0, len(df), chunk_rows):
+                yield df.iloc[start:start + chunk_rows]
+            return
+
+        from openpyxl import load_workbook
+
+        wb = load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            ws = wb.worksheets[sheet_name] if isinstance(
+                sheet_name, int) else wb[sheet_name]
+
+            total = 0
+            buffer = []
+            # 第一行為表頭，與 pd.read_excel 的預設行為一致
+            for row in ws.iter_rows(min_row=2, values_only=True):
+                buffer.append((
+                    row[date_col] if len(row) > date_col else None,
+                    row[event_col] if len(row) > event_col else None,
+                ))
+                if len(buffer) >= chunk_rows:
+                    chunk = self._validate_frame(
+                        pd.DataFrame(buffer, columns=['date', 'event']))
+                    total += len(buffer)
+                    buffer = []
+                    yield chunk
+
+            if buffer:
+                total += len(buffer)
+                yield self._validate_frame(pd.DataFrame(buffer, columns=['date', 'event']))
+
+            logger.info(f"串流讀取 Excel 完成，共 {total} 行")
+        finally:
+            wb.close()
+
+    def iter_projects(self, date_col=0, event_col=1, group_col=None):
+        """
+        只打開一次工作簿，逐個串流讀取每個工作表（或項目分組列）中的項目數據
+
+        Args:
+            date_col (int): 日期列索引，預設為 0
+            event_col (int): 事件列索引，預設為 1
+            group_col (int): 項目分組列索引；指定時每個工作表按該列的值拆分為多個項目，
+                分組列為空白的行歸入 UNGROUPED_PROJECT 項目
+
+        Yields:
+            tuple: (項目名稱, 包含 'date' 和 'event' 列並按日期排序的 DataFrame)
+        """
+        with pd.ExcelFile(self.file_path) as xls:
+            sheet_names = xls.sheet_names
+            logger.info(f"打開 Excel 成功，共 {len(sheet_names)} 個工作表")
+
+            for sheet_name in sheet_names:
+                raw = xls.parse(sheet_name)
+                if raw.shape[1] <= max(date_col, event_col):
+                    logger.warning(f"工作表 {sheet_name} 欄位不足，已跳過")
+                    continue
+
+                if group_col is None:
+                    groups = [(sheet_name, raw)]
+                else:
+                    key = self._group_key(raw.iloc[:, group_col], sheet_name)
+                    prefix = f"{sheet_name}-" if len(sheet_names) > 1 else ''
+                    groups = [
+                        (f"{prefix}{group}", group_df)
+                        for group, group_df in raw.groupby(key, sort=False)
+                    ]
+
+                for name, group_df in groups:
+                    df = self._validate_frame(
+                        group_df.iloc[:, [date_col, event_col]].copy())
+                    if df.empty:
+                        logger.warning(f"項目 {name} 沒有有效數據，已跳過")
+                        continue
+                    df = df.sort_values(
+                        'date', kind='stable').reset_index(drop=True)
+                    logger.info(f"讀取項目 {name}，有效數據 {len(df)} 行")
+                    yield str(name), df
+
+    def _group_key(self, key, sheet_name):
+        """
+        將空白（NaN 或只有空白字元）的項目分組值替換為 UNGROUPED_PROJECT
+
+        Args:
+            key (pd.Series): 項目分組列
+            sheet_name (str): 工作表名稱（用於日誌）
+
+        Returns:
+            pd.Series: 沒有空值的項目分組列
+        """
+        blank = key.isna() | (key.astype(str).str.strip() == '')
+        if blank.any():
+            logger.warning(
+                f"工作表 {sheet_name} 有 {int(blank.sum())} 行項目分組為空，"
+                f"歸入項目「{UNGROUPED_PROJECT}」")
+            key = key.astype(object).where(~blank, UNGROUPED_PROJECT)
+        return key
+
+    def _validate_frame(self, df):
+        """
+        驗證並清理原始數據
+
+        Args:
+            df (pd.DataFrame): 只包含日期和事件兩列的原始數據
+
+        Returns:
+            pd.DataFrame: 包含 'date' 和 'event' 列的有效數據
+        """
+        # 重命名列
+        df.columns = ['date', 'event']
+
+        # 移除全空行
+        df = df.dropna(how='all')
+
+        # 轉換日期列
+        df['date'] = pd.to_datetime(df['date'], errors='coerce')
+
+        # 移除日期無效的行
+        invalid_count = df['date'].isna().sum()
+        if invalid_count > 0:
+            logger.warning(f"發現 {invalid_count} 行無效日期，已移除")
+            df = df.dropna(subset=['date'])
+
+        # 確保事件為字符串（空單元格在串流讀取時為 None）
+        df = df.dropna(subset=['event'])
+        df['event'] = df['event'].astype(str).str.strip()
+
+        # 移除空事件
+        df = df[df['event'] != '']
+        df = df[df['event'] != 'nan']
+
+        return df
@@ -0,0 +1,269 @@
+"""
+輸入快取模塊：以來源檔案指紋為鍵，快取已驗證的 date/event 數據（記憶體映射存儲）
+
+用法:
+    python -m src.input_cache info     # 列出快取項
+    python -m src.input_cache clear    # 清空快取
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import shutil
+import time
+
+from src.milestone_store import MilestoneStore, publish_store
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(path):
+    """計算檔案內容的 SHA-256（按 1 MB 分塊讀取）"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fp:
+        for block in iter(lambda: fp.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class InputCache:
+    """
+    已解析輸入的快取目錄
+
+    每個快取項為 root 下的一個 MilestoneStore，以來源檔案的路徑、大小、修改時間和讀取參數
+    為鍵（命中時無需讀取整個檔案）；meta.json 另記錄內容 SHA-256，檔案只被 touch 或複製回原處
+    （修改時間變化、內容不變）時按內容找回已有的快取項。總大小超過上限時按最近使用時間淘汰
+    """
+
+    def __init__(self, root=None, max_mb=None):
+        """
+        初始化輸入快取
+
+        Args:
+            root (str or Path): 快取目錄，預設取 config.settings.INPUT_CACHE_DIR
+            max_mb (int): 快取總大小上限（MB），預設取 config.settings.INPUT_CACHE_MAX_MB
+        """
+        from config.settings import INPUT_CACHE_DIR, INPUT_CACHE_MAX_MB
+
+        self.root = Path(root or INPUT_CACHE_DIR)
+        self.max_bytes = (max_mb or INPUT_CACHE_MAX_MB) * 1024 * 1024
+        self._hashes = {}
+
+    def key(self, input_path, options):
+        """
+        計算快取鍵（只用檔案元數據，不讀取內容）
+
+        Args:
+            input_path (str): 來源檔案路徑
+            options (dict): 讀取參數（工作表、列索引等）
+
+        Returns:
+            str: 快取鍵
+        """
+        path = Path(input_path).resolve()
+        stat = path.stat()
+        payload = json.dumps(
+            [str(path), stat.st_size, stat.st_mtime_ns, options],
+            sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def content_hash(self, input_path):
+        """來源檔案內容的 SHA-256（同一版本的檔案只計算一次）"""
+        path = Path(input_path).resolve()
+        stat = path.stat()
+        version = (str(path), stat.st_size, stat.st_mtime_ns)
+        if version not in self._hashes:
+            self._hashes[version] = content_hash(path)
+        return self._hashes[version]
+
+    def _open(self, directory):
+        """打開快取項；不存在或無效（如正被其他進程淘汰）時返回 None"""
+        try:
+            return MilestoneStore(directory)
+        except (FileNotFoundError, ValueError, OSError, KeyError):
+            return None
+
+    def _find_by_content(self, key, input_path, options):
+        """
+        按內容 SHA-256 查找修改時間變化前的快取項，找到時改名為新的鍵
+
+        Returns:
+            MilestoneStore: 快取項；未找到時返回 None
+        """
+        source = str(Path(input_path).resolve())
+        for entry in self.entries():
+            store = self._open(self.root / entry['key'])
+            if store is None or (store.meta.get('source'), store.meta.get('options')) != (source, options):
+                continue
+            if store.meta.get('sha256') != self.content_hash(input_path):
+                continue
+            try:
+                os.replace(self.root / entry['key'], self.root / key)
+            except OSError:
+                continue
+            logger.info(f"輸入快取按內容命中（修改時間已變更）: {input_path}")
+            return self._open(self.root / key)
+        return None
+
+    def load(self, input_path, options):
+        """
+        讀取快取
+
+        Args:
+            input_path (str): 來源檔案路徑
+            options (dict): 讀取參數
+
+        Returns:
+            pd.DataFrame: 包含 'date' 和 'event' 列的 DataFrame；未命中時返回 None
+        """
+        key = self.key(input_path, options)
+        directory = self.root / key
+        store = self._open(directory) or self._find_by_content(key, input_path, options)
+        if store is None:
+            return None
+
+        # 讀取期間快取項可能被其他進程淘汰，視為未命中
+        try:
+            # 目錄修改時間即最近使用時間（淘汰順序）
+            os.utime(directory)
+            df = store.to_frame()
+        except (FileNotFoundError, ValueError, OSError):
+            logger.info(f"輸入快取項已失效: {input_path}")
+            return None
+        df['date'] = df['date'].astype(store.meta.get('date_dtype', 'datetime64[ns]'))
+        logger.info(f"輸入快取命中: {input_path}（{len(df)} 行）")
+        return df
+
+    def store(self, df, input_path, options):
+        """
+        寫入快取並按大小上限淘汰舊項
+
+        其他進程已寫入同一個鍵的有效快取項時保留已有的項（見 publish_store）
+
+        Args:
+            df (pd.DataFrame): 已驗證的 DataFrame
+            input_path (str): 來源檔案路徑
+            options (dict): 讀取參數
+        """
+        key = self.key(input_path, options)
+        directory = self.root / key
+        tmp_dir = directory.with_name(f"{key}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        try:
+            MilestoneStore.from_frame(df, tmp_dir, {
+                'source': str(Path(input_path).resolve()),
+                'options': options,
+                'sha256': self.content_hash(input_path),
+                'date_dtype': str(df['date'].dtype),
+                'created': time.time(),
+            })
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        _, published = publish_store(tmp_dir, directory, lambda: self._open(directory))
+        if published:
+            logger.info(f"輸入已快取: {input_path}（{len(df)} 行）")
+
+        self.evict(keep=key)
+
+    def entries(self):
+        """
+        列出快取項（最近使用的在前）
+
+        Returns:
+            list: 字典 {'key', 'source', 'rows', 'bytes', 'last_used'}
+        """
+        if not self.root.exists():
+            return []
+
+        entries = []
+        for directory in self.root.iterdir():
+            if not directory.is_dir() or '.tmp-' in directory.name:
+                continue
+            store = self._open(directory)
+            if store is None:
+                continue
+            try:
+                entries.append({
+                    'key': directory.name,
+                    'source': store.meta.get('source'),
+                    'rows': len(store),
+                    'bytes': store.nbytes(),
+                    'last_used': directory.stat().st_mtime,
+                })
+            except FileNotFoundError:
+                # 已被其他進程淘汰
+                continue
+        return sorted(entries, key=lambda e: e['last_used'], reverse=True)
+
+    def evict(self, keep=None):
+        """
+        按最近使用時間淘汰，直到總大小不超過上限
+
+        Args:
+            keep (str): 不淘汰的鍵（剛寫入的項）
+
+        Returns:
+            int: 淘汰的項數
+        """
+        entries = self.entries()
+        total = sum(e['bytes'] for e in entries)
+        evicted = 0
+        for entry in reversed(entries):
+            if total <= self.max_bytes:
+                break
+            if entry['key'] == keep:
+                continue
+            # 先改名移開再刪除：正在讀取的進程看到的是完整的項或不存在的項
+            doomed = self.root / f"{entry['key']}.tmp-{os.getpid()}-evicted"
+            try:
+                os.replace(self.root / entry['key'], doomed)
+            except OSError:
+                continue
+            shutil.rmtree(doomed, ignore_errors=True)
+            total -= entry['bytes']
+            evicted += 1
+            logger.info(f"輸入快取淘汰: {entry['source']}")
+        return evicted
+
+    def clear(self):
+        """
+        清空快取
+
+        Returns:
+            int: 刪除的項數
+        """
+        entries = self.entries()
+        shutil.rmtree(self.root, ignore_errors=True)
+        return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DrawFlow 輸入快取管理')
+    parser.add_argument('command', choices=['info', 'clear'], help='info 列出快取項，clear 清空快取')
+    parser.add_argument('--dir', default=None, help='快取目錄')
+    args = parser.parse_args()
+
+    cache = InputCache(args.dir)
+    if args.command == 'clear':
+        print(f"已清空 {cache.clear()} 個快取項: {cache.root}")
+        return
+
+    entries = cache.entries()
+    total = sum(e['bytes'] for e in entries)
+    print(f"快取目錄: {cache.root}")
+    print(f"共 {len(entries)} 項，{total / 1024 / 1024:.1f} MB / 上限 "
+          f"{cache.max_bytes / 1024 / 1024:.0f} MB")
+    for entry in entries:
+        last_used = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['last_used']))
+        print(f"  {entry['key'][:12]}  {entry['rows']:>10} 行  "
+              f"{entry['bytes'] / 1024:>10.1f} KB  {last_used}  {entry['source']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+"""
+里程碑存儲模塊：以記憶體映射的欄式檔案持久化 (date, event, count) 數據
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+import shutil
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class MilestoneStore:
+    """
+    以記憶體映射陣列保存的里程碑數據（唯讀）
+
+    目錄結構:
+        dates.i8    - int64 日期（納秒時間戳）
+        offsets.i8  - int64 事件位移表，長度為 rows + 1
+        events.bin  - UTF-8 編碼的事件文字（依位移表切分）
+        counts.i8   - int64 每行包含的原始事件數（同日期合併前），未合併的數據均為 1
+        meta.json   - 行數等元數據
+    """
+
+    DATES_FILE = 'dates.i8'
+    OFFSETS_FILE = 'offsets.i8'
+    EVENTS_FILE = 'events.bin'
+    COUNTS_FILE = 'counts.i8'
+    META_FILE = 'meta.json'
+
+    def __init__(self, directory):
+        """
+        打開已存在的存儲目錄
+
+        Args:
+            directory (str or Path): 存儲目錄
+        """
+        self.directory = Path(directory)
+        meta_path = self.directory / self.META_FILE
+        if not meta_path.exists():
+            raise FileNotFoundError(f"存儲不存在: {self.directory}")
+
+        self.meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        self.rows = int(self.meta['rows'])
+
+        self._dates = self._map(self.DATES_FILE, np.int64, self.rows)
+        self._offsets = self._map(self.OFFSETS_FILE, np.int64, self.rows + 1)
+        self._events = self._map(
+            self.EVENTS_FILE, np.uint8, int(self._offsets[-1]))
+        # 舊版存儲沒有事件數檔案
+        self._counts = (self._map(self.COUNTS_FILE, np.int64, self.rows)
+                        if (self.directory / self.COUNTS_FILE).exists() else None)
+
+    def _map(self, name, dtype, count):
+        """以唯讀方式映射檔案（空檔案無法 mmap，改用空陣列）"""
+        if count == 0:
+            return np.zeros(1 if name == self.OFFSETS_FILE else 0, dtype=dtype)
+        return np.memmap(self.directory / name, dtype=dtype, mode='r', shape=(count,))
+
+    @classmethod
+    def writer(cls, directory, extra_meta=None):
+        """
+        建立追加寫入器
+
+        Args:
+            directory (str or Path): 存儲目錄
+            extra_meta (dict): 附加寫入 meta.json 的信息
+
+        Returns:
+            MilestoneStoreWriter: 寫入器
+        """
+        return MilestoneStoreWriter(directory, extra_meta)
+
+    @classmethod
+    def from_frame(cls, df, directory, extra_meta=None):
+        """
+        將包含 'date' 和 'event' 列的 DataFrame 寫入存儲
+
+        Args:
+            df (pd.DataFrame): 輸入 DataFrame，合併後的 DataFrame 另含 'count' 列
+            directory (str or Path): 存儲目錄
+            extra_meta (dict): 附加元數據
+
+        Returns:
+            MilestoneStore: 已打開的存儲
+        """
+        with cls.writer(directory, extra_meta) as writer:
+            writer.append(
+                df['date'].to_numpy(dtype='datetime64[ns]').astype(np.int64),
+                df['event'].tolist(),
+                df['count'].to_numpy() if 'count' in df.columns else None
+            )
+        return cls(directory)
+
+    def copy_to(self, directory, extra_meta=None, batch_rows=1_000_000):
+        """
+        按批次複製到另一個存儲目錄（不整體載入內存）
+
+        Args:
+            directory (str or Path): 目標目錄
+            extra_meta (dict): 附加元數據
+            batch_rows (int): 每批行數
+
+        Returns:
+            MilestoneStore: 已打開的副本
+        """
+        counts = self.counts
+        with self.writer(directory, extra_meta) as writer:
+            for lo, (dates, events) in zip(range(0, self.rows, batch_rows),
+                                           self.iter_batches(batch_rows)):
+                writer.append(dates, events, counts[lo:lo + len(dates)])
+        return MilestoneStore(directory)
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def dates_ns(self):
+        """int64 納秒日期陣列（記憶體映射）"""
+        return self._dates
+
+    @property
+    def dates(self):
+        """datetime64[ns] 日期陣列（記憶體映射視圖）"""
+        return self._dates.view('datetime64[ns]')
+
+    @property
+    def counts(self):
+        """int64 每行事件數陣列（記憶體映射）；舊版存儲沒有此檔案時全部計 1"""
+        if self._counts is None:
+            return np.ones(self.rows, dtype=np.int64)
+        return self._counts
+
+    @property
+    def has_counts(self):
+        """存儲是否保存了每行事件數"""
+        return self._counts is not None
+
+    def window(self, start_date=None, end_date=None):
+        """
+        以二分查找定位日期範圍 [start_date, end_date] 的行範圍，成本為 O(log n)
+
+        Args:
+            start_date: 起始日期（含），None 表示不限
+            end_date: 結束日期（含），None 表示不限
+
+        Returns:
+            tuple: (start, end) 行範圍，左閉右開
+        """
+        start = 0 if start_date is None else int(np.searchsorted(
+            self._dates, pd.Timestamp(start_date).value, side='left'))
+        end = self.rows if end_date is None else int(np.searchsorted(
+            self._dates, pd.Timestamp(end_date).value, side='right'))
+        return start, max(start, end)
+
+    def event(self, idx):
+        """讀取單個事件文字"""
+        start, end = self._offsets[idx], self._offsets[idx + 1]
+        return bytes(self._events[start:end]).decode('utf-8')
+
+    def events_slice(self, start, end):
+        """讀取 [start, end) 範圍的事件文字列表"""
+        offsets = self._offsets[start:end + 1]
+        if len(offsets) < 2:
+            return []
+        blob = bytes(self._events[offsets[0]:offsets[-1]])
+        rel = offsets - offsets[0]
+        return [blob[rel[i]:rel[i + 1]].decode('utf-8') for i in range(len(rel) - 1)]
+
+    def to_frame(self, start=0, end=None):
+        """
+        讀取 [start, end) 範圍為 DataFrame，索引保持全局行號
+
+        Returns:
+            pd.DataFrame: 包含 'date' 和 'event' 列的 DataFrame
+        """
+        end = self.rows if end is None else min(end, self.rows)
+        start = max(0, min(start, end))
+        return pd.DataFrame(
+            {
+                'date': pd.to_datetime(np.asarray(self.dates[start:end])),
+                'event': self.events_slice(start, end),
+            },
+            index=pd.RangeIndex(start, end)
+        )
+
+    def iter_batches(self, batch_rows, start=0, end=None):
+        """
+        按批次遍歷 (日期陣列, 事件列表)
+
+        Args:
+            batch_rows (int): 每批行數
+            start, end (int): 行範圍
+
+        Yields:
+            tuple: (np.ndarray int64 日期, list 事件)
+        """
+        end = self.rows if end is None else min(end, self.rows)
+        batch_rows = max(1, int(batch_rows))
+        for lo in range(start, end, batch_rows):
+            hi = min(lo + batch_rows, end)
+            yield np.asarray(self._dates[lo:hi]), self.events_slice(lo, hi)
+
+    def nbytes(self):
+        """存儲在磁碟上佔用的位元組數"""
+        return sum(p.stat().st_size for p in self.directory.iterdir() if p.is_file())
+
+
+class MilestoneStoreWriter:
+    """按批次追加寫入 MilestoneStore"""
+
+    def __init__(self, directory, extra_meta=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.extra_meta = extra_meta or {}
+        self.rows = 0
+        self._offset = 0
+
+        self._dates_fp = open(self.directory / MilestoneStore.DATES_FILE, 'wb')
+        self._offsets_fp = open(
+            self.directory / MilestoneStore.OFFSETS_FILE, 'wb')
+        self._events_fp = open(
+            self.directory / MilestoneStore.EVENTS_FILE, 'wb')
+        self._counts_fp = open(
+            self.directory / MilestoneStore.COUNTS_FILE, 'wb')
+        self._offsets_fp.write(np.zeros(1, dtype=np.int64).tobytes())
+
+    def append(self, dates_ns, events, counts=None):
+        """
+        追加一批記錄
+
+        Args:
+            dates_ns (np.ndarray): int64 納秒日期
+            events (list): 事件文字列表，長度與 dates_ns 相同
+            counts (array-like): 每行包含的原始事件數，None 表示每行計 1
+        """
+        if len(dates_ns) != len(events):
+            raise ValueError("日期與事件數量不一致")
+        if counts is not None and len(counts) != len(events):
+            raise ValueError("每行事件數與事件數量不一致")
+        if len(events) == 0:
+            return
+
+        encoded = [e.encode('utf-8') for e in events]
+        lengths = np.fromiter((len(b) for b in encoded),
+                              dtype=np.int64, count=len(encoded))
+        offsets = self._offset + np.cumsum(lengths)
+
+        self._dates_fp.write(np.asarray(dates_ns, dtype=np.int64).tobytes())
+        self._offsets_fp.write(offsets.tobytes())
+        self._events_fp.write(b''.join(encoded))
+        self._counts_fp.write(
+            (np.ones(len(encoded), dtype=np.int64) if counts is None
+             else np.asarray(counts, dtype=np.int64)).tobytes())
+
+        self._offset = int(offsets[-1])
+        self.rows += len(encoded)
+
+    def close(self):
+        """關閉檔案並寫入元數據"""
+        for fp in (self._dates_fp, self._offsets_fp, self._events_fp, self._counts_fp):
+            fp.close()
+        meta = dict(self.extra_meta)
+        meta['rows'] = self.rows
+        (self.directory / MilestoneStore.META_FILE).write_text(
+            json.dumps(meta, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def publish_store(tmp_dir, directory, open_existing, attempts=3):
+    """
+    將已寫好的臨時存儲目錄發佈為 directory（多個進程同時發佈同一個目錄時安全）
+
+    - directory 已是有效的存儲（例如另一進程剛發佈）：丟棄臨時目錄，使用已有的存儲
+    - 否則先嘗試 os.replace；目標目錄非空導致失敗時，再次確認目標無效（過期或不完整）後
+      先將其改名移開再刪除，然後重試。有效的存儲不會被刪除，改名是原子操作，
+      刪除失敗（如 Windows 上仍被映射）也不會留下半刪除的 directory
+
+    Args:
+        tmp_dir (Path): 已寫好的臨時目錄（無論成功與否都會被刪除）
+        directory (Path): 目標目錄
+        open_existing (callable): 返回 directory 中有效的 MilestoneStore，
+            不存在、無效或已過期時返回 None
+        attempts (int): 最多嘗試次數
+
+    Returns:
+        tuple: (MilestoneStore, bool 是否由本進程發佈)
+    """
+    directory = Path(directory)
+    try:
+        for attempt in range(attempts):
+            store = open_existing()
+            if store is not None:
+                return store, False
+            try:
+                os.replace(tmp_dir, directory)
+            except OSError as e:
+                if attempt == attempts - 1:
+                    raise
+                if open_existing() is not None:
+                    continue
+                stale_dir = directory.with_name(f"{directory.name}.tmp-{os.getpid()}-stale")
+                shutil.rmtree(stale_dir, ignore_errors=True)
+                try:
+                    os.replace(directory, stale_dir)
+                except FileNotFoundError:
+                    continue
+                logger.info(f"移除無效的存儲: {directory}（{e.strerror}）")
+                shutil.rmtree(stale_dir, ignore_errors=True)
+                continue
+            return MilestoneStore(directory), True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
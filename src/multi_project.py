@@ -0,0 +1,114 @@
+"""
+多項目模塊：一次讀取工作簿中的所有項目，並行處理和渲染，輸出到同一個 Excel 檔案
+"""
+
+import logging
+
+from src.data_processor import DataProcessor
+from src.excel_generator import ExcelGenerator
+from src.excel_reader import ExcelReader
+from src.resource_governor import ResourceGovernor, estimate_report_bytes
+
+logger = logging.getLogger(__name__)
+
+
+def render_project(name, df, milestones_per_page=50, encoding_profile=None, render_engine=None,
+                   dataframe_engine=None, title=None):
+    """
+    處理並渲染單個項目（在工作進程中執行）
+
+    Args:
+        name (str): 項目名稱
+        df (pd.DataFrame): 包含 'date' 和 'event' 列的 DataFrame
+        milestones_per_page (int): 每頁最大里程碑數
+        encoding_profile (str): 圖片編碼配置名稱
+        render_engine (str): 渲染引擎名稱
+        dataframe_engine (str): 數據處理引擎名稱
+        title (str): 圖表標題，預設為項目名稱
+
+    Returns:
+        dict: {'name', 'stats', 'images'}，images 為 PNG 位元組列表
+    """
+    from src.visualizer import TimelineVisualizer
+
+    processor = DataProcessor(milestones_per_page=milestones_per_page, engine=dataframe_engine)
+    merged_df, stats, pages = processor.process_all(df)
+
+    excel_gen = ExcelGenerator(profile=encoding_profile)
+    visualizer = TimelineVisualizer(engine=render_engine, dpi=excel_gen.dpi)
+    images = list(excel_gen.encode_figures(
+        visualizer.iter_figures(pages, stats, title=title or name), close_figures=True))
+
+    excel_gen.log_encoding_summary()
+    logger.info(f"項目 {name} 渲染完成，共 {len(images)} 頁")
+    return {'name': name, 'stats': stats, 'images': images}
+
+
+class MultiProjectRunner:
+    """多項目報告生成器"""
+
+    def __init__(self, max_workers=None, milestones_per_page=50, encoding_profile=None,
+                 render_engine=None, dataframe_engine=None, governor=None):
+        """
+        初始化多項目生成器
+
+        Args:
+            max_workers (int): 並行工作進程數，預設為 CPU 核心數；1 表示在當前進程中順序執行
+            milestones_per_page (int): 每頁最大里程碑數
+            encoding_profile (str): 圖片編碼配置名稱
+            render_engine (str): 渲染引擎名稱
+            dataframe_engine (str): 數據處理引擎名稱
+            governor (ResourceGovernor): 資源調控器，預設按 config.settings 建立
+        """
+        self.max_workers = max_workers
+        self.milestones_per_page = milestones_per_page
+        self.encoding_profile = encoding_profile
+        self.render_engine = render_engine
+        self.dataframe_engine = dataframe_engine
+        self.governor = governor
+
+    def run(self, input_excel_path, output_excel_path, title="里程碑時間線", group_col=None):
+        """
+        讀取所有項目、並行渲染並寫入單個 Excel 檔案
+
+        Args:
+            input_excel_path (str): 輸入 Excel 檔案路徑
+            output_excel_path (str): 輸出 Excel 檔案路徑
+            title (str): 報告標題（索引工作表）
+            group_col (int): 項目分組列索引，None 表示每個工作表為一個項目
+
+        Returns:
+            Path: 輸出檔案路徑
+        """
+        reader = ExcelReader(input_excel_path)
+        projects = reader.iter_projects(group_col=group_col)
+
+        if self.max_workers == 1:
+            results = [
+                render_project(name, df, self.milestones_per_page,
+                               self.encoding_profile, self.render_engine,
+                               self.dataframe_engine)
+                for name, df in projects
+            ]
+        else:
+            # 讀取與渲染重疊：每讀出一個項目就提交給工作進程；
+            # 在途項目的估算內存超出預算時暫停讀取
+            governor = self.governor or ResourceGovernor()
+            dpi = ExcelGenerator(profile=self.encoding_profile).dpi
+
+            def cost(name, df, *args):
+                return estimate_report_bytes(
+                    len(df), dpi, self.render_engine, self.milestones_per_page)
+
+            results = list(governor.imap(
+                render_project,
+                ((name, df, self.milestones_per_page, self.encoding_profile,
+                  self.render_engine, self.dataframe_engine) for name, df in projects),
+                cost=cost, max_workers=self.max_workers))
+
+        if not results:
+            raise ValueError("工作簿中沒有有效的項目數據")
+
+        logger.info(f"共渲染 {len(results)} 個項目")
+        return ExcelGenerator(profile=self.encoding_profile).save_multi_project_excel(
+            results, output_excel_path, title=title)
@@ -0,0 +1,253 @@
+"""
+外存處理模塊：分塊讀入、排序溢寫、k 路歸併，處理超出內存的數據集
+"""
+
+import heapq
+import logging
+import math
+import shutil
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.milestone_store import MilestoneStore
+
+logger = logging.getLogger(__name__)
+
+
+class SpilledPages:
+    """
+    惰性分頁序列：按需從合併後的存儲讀取每頁數據
+
+    支援 len()、索引和迭代，可直接傳給 TimelineVisualizer.generate_pdf；
+    start/end 限定分頁的行範圍（日期窗口查詢）
+    """
+
+    def __init__(self, store, milestones_per_page, start=0, end=None):
+        self.store = store
+        self.milestones_per_page = milestones_per_page
+        self.start = start
+        self.end = len(store) if end is None else end
+
+    def __len__(self):
+        return math.ceil((self.end - self.start) / self.milestones_per_page)
+
+    def __getitem__(self, page_idx):
+        if page_idx < 0:
+            page_idx += len(self)
+        if not 0 <= page_idx < len(self):
+            raise IndexError(page_idx)
+        start = self.start + page_idx * self.milestones_per_page
+        return self.store.to_frame(start, min(start + self.milestones_per_page, self.end))
+
+    def __iter__(self):
+        for page_idx in range(len(self)):
+            yield self[page_idx]
+
+
+class OutOfCoreProcessor:
+    """
+    外存數據處理器
+
+    與 DataProcessor.process_all 輸出相同的合併結果、統計和分頁，
+    但峰值內存受 memory_budget_mb 約束：
+        1. 輸入按塊讀入，每塊排序後溢寫為有序段（記憶體映射檔案）
+        2. k 路歸併所有有序段，同時去重並合併同日期事件
+        3. 合併結果流式寫入存儲並增量計算統計，分頁按需讀取
+    """
+
+    def __init__(self, milestones_per_page=50, memory_budget_mb=None, spill_dir=None):
+        """
+        初始化外存處理器
+
+        Args:
+            milestones_per_page (int): 每頁最大里程碑數
+            memory_budget_mb (int): 內存預算（MB），預設取 config.settings
+            spill_dir (str): 溢寫目錄，預設為系統臨時目錄下的新目錄
+        """
+        from config.settings import OUT_OF_CORE_MEMORY_BUDGET_MB, OUT_OF_CORE_ROW_BYTES
+
+        self.milestones_per_page = milestones_per_page
+        self.memory_budget_mb = memory_budget_mb or OUT_OF_CORE_MEMORY_BUDGET_MB
+        self.row_bytes = OUT_OF_CORE_ROW_BYTES
+
+        self._own_spill_dir = spill_dir is None
+        self.spill_dir = Path(spill_dir or tempfile.mkdtemp(
+            prefix='drawflow_spill_'))
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def chunk_rows(self):
+        """單個有序段的最大行數（由內存預算推算）"""
+        return max(1000, self.memory_budget_mb * 1024 * 1024 // self.row_bytes)
+
+    def process_chunks(self, chunks):
+        """
+        完整外存處理流程
+
+        Args:
+            chunks (iterable): 數據塊迭代器，每塊為包含 'date' 和 'event' 列的 DataFrame
+
+        Returns:
+            tuple: (合併後的 MilestoneStore, 統計信息, SpilledPages 分頁序列)
+        """
+        runs = self._spill_runs(chunks)
+        if not runs or all(len(run) == 0 for run in runs):
+            raise ValueError("數據為空")
+
+        store, stats = self._merge_runs(runs)
+
+        # 有序段在歸併後即可刪除
+        for run in runs:
+            shutil.rmtree(run.directory, ignore_errors=True)
+
+        pages = SpilledPages(store, self.milestones_per_page)
+        logger.info(f"分頁完成: 共 {len(pages)} 頁")
+        return store, stats, pages
+
+    def _spill_runs(self, chunks):
+        """
+        將輸入塊累積到預算大小後排序並溢寫
+
+        Returns:
+            list: 有序段 MilestoneStore 列表（按輸入順序）
+        """
+        runs = []
+        buffer = []
+        buffered_rows = 0
+
+        def flush():
+            run_df = pd.concat(buffer, ignore_index=True)
+            # 穩定排序，保留同日期事件的輸入順序
+            run_df = run_df.sort_values('date', kind='stable')
+            run_dir = self.spill_dir / f'run_{len(runs):05d}'
+            runs.append(MilestoneStore.from_frame(run_df, run_dir))
+            logger.debug(f"溢寫有序段 {run_dir.name}: {len(run_df)} 行")
+
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            buffer.append(chunk[['date', 'event']])
+            buffered_rows += len(chunk)
+            if buffered_rows >= self.chunk_rows:
+                flush()
+                buffer = []
+                buffered_rows = 0
+
+        if buffer:
+            flush()
+
+        logger.info(
+            f"溢寫完成: {len(runs)} 個有序段，共 {sum(len(r) for r in runs)} 行")
+        return runs
+
+    def _iter_run(self, run, run_idx, batch_rows):
+        """按批次讀取有序段，產生 (日期, 段序號, 事件)"""
+        for dates, events in run.iter_batches(batch_rows):
+            for date_ns, event in zip(dates.tolist(), events):
+                yield date_ns, run_idx, event
+
+    def _merge_runs(self, runs):
+        """
+        k 路歸併有序段，去重並合併同日期事件，同時增量計算統計
+
+        Returns:
+            tuple: (MilestoneStore, 統計信息字典)
+        """
+        # 每個段的讀取緩衝與輸出緩衝共享內存預算
+        batch_rows = max(1, self.chunk_rows // (len(runs) + 1))
+        streams = [self._iter_run(run, idx, batch_rows)
+                   for idx, run in enumerate(runs)]
+
+        month_counts = Counter()
+        out_dates = []
+        out_events = []
+        out_counts = []
+
+        def flush(writer):
+            dates_ns = np.asarray(out_dates, dtype=np.int64)
+            months, counts = np.unique(
+                dates_ns.view('datetime64[ns]').astype('datetime64[M]'), return_counts=True)
+            month_counts.update(dict(zip(months.astype(str), counts.tolist())))
+            writer.append(dates_ns, out_events, out_counts)
+            out_dates.clear()
+            out_events.clear()
+            out_counts.clear()
+
+        merged_dir = self.spill_dir / 'merged'
+        with MilestoneStore.writer(merged_dir) as writer:
+            current_date = None
+            current_events = []
+            seen = set()
+
+            # 鍵為 (日期, 段序號)：同日期事件保持輸入順序
+            for date_ns, _, event in heapq.merge(*streams, key=lambda r: (r[0], r[1])):
+                if date_ns != current_date:
+                    if current_events:
+                        out_dates.append(current_date)
+                        out_events.append(', '.join(current_events))
+                        out_counts.append(len(current_events))
+                        if len(out_dates) >= batch_rows:
+                            flush(writer)
+                    current_date = date_ns
+                    current_events = []
+                    seen = set()
+
+                # 同日期同事件視為重複（保留第一個）
+                if event not in seen:
+                    seen.add(event)
+                    current_events.append(event)
+
+            if current_events:
+                out_dates.append(current_date)
+                out_events.append(', '.join(current_events))
+                out_counts.append(len(current_events))
+            if out_dates:
+                flush(writer)
+
+        store = MilestoneStore(merged_dir)
+        stats = self._build_statistics(store, month_counts)
+        return store, stats
+
+    def _build_statistics(self, store, month_counts):
+        """由增量累計結果組裝與 DataProcessor.calculate_statistics 相同的統計字典"""
+        total = len(store)
+        start_date = pd.Timestamp(int(store.dates_ns[0]))
+        end_date = pd.Timestamp(int(store.dates_ns[-1]))
+        total_days = (end_date - start_date).days
+
+        monthly_list = [
+            {'period': period, 'count': count}
+            for period, count in sorted(month_counts.items())
+        ]
+        total_months = len(monthly_list)
+        milestone_density = total / total_months if total_months > 0 else 0
+
+        stats = {
+            'total_milestones': total,
+            'start_date': start_date,
+            'end_date': end_date,
+            'total_days': total_days,
+            'total_months': total_months,
+            'milestone_density': round(milestone_density, 2),
+            'monthly_distribution': monthly_list,
+        }
+
+        logger.info(
+            f"統計完成: {total} 個里程碑，跨度 {total_days} 天，密度 {stats['milestone_density']}/月")
+        return stats
+
+    def cleanup(self):
+        """刪除溢寫目錄（僅刪除自行建立的臨時目錄）"""
+        if self._own_spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()
+        return False
@@ -0,0 +1,80 @@
+"""
+總覽模塊：按像素寬度對全部里程碑做密度分箱，找出最顯著的聚集區間
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NS_PER_DAY = 86400 * 10**9
+
+
+def density_bins(dates_ns, width_px, start_ns, end_ns, weights=None, batch_rows=1_000_000):
+    """
+    以直方圖統計里程碑密度，分箱數自適應像素寬度（不超過總天數）
+
+    按批次累加，記憶體映射的日期陣列不會被整體載入，成本為 O(n)
+
+    Args:
+        dates_ns (array-like): int64 納秒日期（可為記憶體映射陣列）
+        width_px (int): 繪圖區域像素寬度
+        start_ns, end_ns (int): 日期範圍（納秒）
+        weights (array-like): 每行權重（如合併前的事件數），None 表示每行計 1
+        batch_rows (int): 每批行數
+
+    Returns:
+        tuple: (counts 每箱數量, edges_ns 箱邊界，長度為 counts + 1)
+    """
+    total_days = (end_ns - start_ns) // NS_PER_DAY + 1
+    n_bins = int(max(1, min(width_px, total_days)))
+    # 右邊界延伸一天，使最後一天落在最後一個箱內
+    value_range = (start_ns, start_ns + total_days * NS_PER_DAY)
+
+    counts = np.zeros(n_bins, dtype=np.int64)
+    edges = np.linspace(value_range[0], value_range[1], n_bins + 1)
+    for lo in range(0, len(dates_ns), batch_rows):
+        batch = np.asarray(dates_ns[lo:lo + batch_rows], dtype=np.int64)
+        batch_weights = None if weights is None else np.asarray(
+            weights[lo:lo + batch_rows])
+        hist, _ = np.histogram(batch, bins=n_bins, range=value_range,
+                               weights=batch_weights)
+        counts += hist.astype(np.int64)
+
+    return counts, edges
+
+
+def top_clusters(counts, edges, top_n=8, min_gap_bins=None):
+    """
+    選出最顯著的 top_n 個聚集區間（貪婪非極大值抑制，相鄰區間不重複標註）
+
+    Args:
+        counts (np.ndarray): 每箱數量
+        edges (np.ndarray): 箱邊界（納秒）
+        top_n (int): 最多標註的區間數
+        min_gap_bins (int): 兩個標註之間的最小箱距，預設為總箱數 / (top_n * 2)
+
+    Returns:
+        list: 按日期排序的區間字典 {'bin', 'start_ns', 'end_ns', 'count'}
+    """
+    n_bins = len(counts)
+    if min_gap_bins is None:
+        min_gap_bins = max(1, n_bins // (top_n * 2))
+
+    chosen = []
+    for idx in np.argsort(counts, kind='stable')[::-1]:
+        if counts[idx] == 0 or len(chosen) >= top_n:
+            break
+        if all(abs(int(idx) - c) >= min_gap_bins for c in chosen):
+            chosen.append(int(idx))
+
+    return [
+        {
+            'bin': idx,
+            'start_ns': int(edges[idx]),
+            'end_ns': int(edges[idx + 1]),
+            'count': int(counts[idx]),
+        }
+        for idx in sorted(chosen)
+    ]
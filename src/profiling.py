@@ -0,0 +1,216 @@
+"""
+性能分析模塊：按階段（可選按頁）收集 cProfile 統計與採樣調用棧，輸出 .pstats 和火焰圖用的 collapsed stack 檔案
+"""
+
+import contextlib
+import cProfile
+import io
+import logging
+from collections import Counter, defaultdict
+from pathlib import Path
+import pstats
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class NullProfiler:
+    """停用時使用的空分析器：所有鉤子都是空操作"""
+
+    enabled = False
+    _null_context = contextlib.nullcontext()
+
+    def stage(self, name):
+        return self._null_context
+
+    def iter_pages(self, iterable):
+        return iterable
+
+    def close(self):
+        pass
+
+
+class StageProfiler:
+    """
+    分階段性能分析器
+
+    每個階段以獨立的 cProfile.Profile 統計；嵌套的子階段（如單頁）運行時暫停父階段，
+    結束後其統計併入父階段。另有一個採樣線程定期抓取主線程調用棧，按階段輸出
+    collapsed stack 格式（可用 flamegraph.pl 或 speedscope 繪製火焰圖）。
+
+    輸出目錄結構:
+        01_read.pstats / 01_read.folded
+        03_render_page_001.pstats ...（per_page 時）
+    """
+
+    enabled = True
+
+    def __init__(self, output_dir, per_page=False, sample_interval=0.005, top_n=15):
+        """
+        初始化並開始採樣
+
+        Args:
+            output_dir (str or Path): 輸出目錄
+            per_page (bool): 每頁單獨統計（iter_pages 包裝的迭代器）
+            sample_interval (float): 調用棧採樣間隔（秒）
+            top_n (int): 報告中每個階段列出的熱點函數數
+        """
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.per_page = per_page
+        self.sample_interval = sample_interval
+        self.top_n = top_n
+
+        self._stack = []
+        self._stages = []  # (序號, 名稱, 耗時, 合併後的 pstats.Stats)
+        self._label = None
+        self._samples = defaultdict(Counter)
+
+        self._target_thread = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(
+            target=self._sample_loop, name='stage-profiler-sampler', daemon=True)
+        self._sampler.start()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        統計一個階段
+
+        Args:
+            name (str): 階段名稱（用於檔名）
+        """
+        parent = self._stack[-1] if self._stack else None
+        if parent is not None:
+            parent['profile'].disable()
+
+        entry = {'name': name, 'profile': cProfile.Profile(), 'children': []}
+        self._stack.append(entry)
+        parent_label = self._label
+        self._label = (parent_label or ()) + (name,)
+
+        start = time.perf_counter()
+        entry['profile'].enable()
+        try:
+            yield
+        finally:
+            entry['profile'].disable()
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            self._label = parent_label
+
+            if parent is not None:
+                parent['children'].append((name, entry['profile'], entry['children']))
+                parent['profile'].enable()
+            else:
+                self._finish_stage(entry, elapsed)
+
+    def iter_pages(self, iterable):
+        """
+        包裝頁面迭代器：per_page 時每頁（一次 next()）作為當前階段的子階段統計
+
+        Args:
+            iterable (iterable): 圖表或頁面迭代器
+
+        Returns:
+            iterable: 包裝後的迭代器
+        """
+        if not self.per_page:
+            return iterable
+        return self._iter_pages(iterable)
+
+    def _iter_pages(self, iterable):
+        iterator = iter(iterable)
+        page_num = 0
+        while True:
+            page_num += 1
+            with self.stage(f'page_{page_num:03d}'):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def _finish_stage(self, entry, elapsed):
+        """保存頂層階段的 .pstats（包含子階段）和 .folded 檔案"""
+        idx = len(self._stages) + 1
+        prefix = f"{idx:02d}_{entry['name']}"
+
+        stats = pstats.Stats(entry['profile'])
+        pending = [(entry['name'], child) for child in entry['children']]
+        while pending:
+            parent_name, (name, profile, children) = pending.pop(0)
+            stats.add(profile)
+            child_name = f"{parent_name}_{name}"
+            profile.dump_stats(self.output_dir / f"{idx:02d}_{child_name}.pstats")
+            pending.extend((child_name, child) for child in children)
+
+        stats.dump_stats(self.output_dir / f"{prefix}.pstats")
+        samples = self._samples.pop(entry['name'], Counter())
+        with open(self.output_dir / f"{prefix}.folded", 'w', encoding='utf-8') as fp:
+            for stack, count in samples.most_common():
+                fp.write(f"{stack} {count}\n")
+
+        self._stages.append((idx, entry['name'], elapsed, stats))
+
+    def _sample_loop(self):
+        """採樣線程：記錄主線程當前調用棧（以階段名稱作為棧底）"""
+        while not self._stop.wait(self.sample_interval):
+            label = self._label
+            frame = sys._current_frames().get(self._target_thread)
+            if label is None or frame is None:
+                continue
+
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(
+                    f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            frames.reverse()
+            self._samples[label[0]][';'.join(list(label) + frames)] += 1
+
+    def report(self):
+        """
+        輸出每個階段的耗時和熱點函數（按函數自身耗時排序）
+
+        Returns:
+            str: 報告文字
+        """
+        lines = [f"性能分析結果: {self.output_dir}"]
+        for idx, name, elapsed, stats in self._stages:
+            stream = io.StringIO()
+            stats.stream = stream
+            stats.strip_dirs().sort_stats('tottime').print_stats(self.top_n)
+            body = stream.getvalue()
+            # 只保留表頭和函數列表
+            table = body[body.find('   ncalls'):] if '   ncalls' in body else body
+            lines.append(f"--- 階段 {idx:02d} {name}: {elapsed:.2f}s ---")
+            lines.append(table.rstrip())
+        return '\n'.join(lines)
+
+    def close(self):
+        """停止採樣並輸出報告"""
+        self._stop.set()
+        self._sampler.join()
+        if self._stages:
+            logger.info(self.report())
+
+
+def create_profiler(enabled, output_dir=None, per_page=False):
+    """
+    建立分析器
+
+    Args:
+        enabled (bool): 是否啟用
+        output_dir (str or Path): 輸出目錄
+        per_page (bool): 每頁單獨統計
+
+    Returns:
+        StageProfiler 或 NullProfiler
+    """
+    if not enabled:
+        return NullProfiler()
+    return StageProfiler(output_dir, per_page=per_page)
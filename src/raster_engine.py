@@ -0,0 +1,379 @@
+"""
+輕量光柵化引擎：不經 matplotlib 的 Figure/Axes/Artist 機制，直接以 PIL 繪製時間線頁面
+"""
+
+from functools import lru_cache
+import logging
+
+import matplotlib.pyplot as plt
+from matplotlib import font_manager
+from matplotlib.ticker import MaxNLocator
+import numpy as np
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+# matplotlib '--' 線型的虛線/間隔長度（點，按線寬縮放）
+DASH_PATTERN = (3.7, 1.6)
+# savefig(bbox_inches='tight', pad_inches=0.1) 的留白
+TIGHT_PAD_INCH = 0.1
+
+
+@lru_cache(maxsize=None)
+def _font_path(bold):
+    """按 matplotlib 的 sans-serif 字體列表尋找字體檔案（已包含中文字體設定）"""
+    prop = font_manager.FontProperties(
+        family=plt.rcParams['font.sans-serif'],
+        weight='bold' if bold else 'normal'
+    )
+    return font_manager.findfont(prop)
+
+
+@lru_cache(maxsize=64)
+def get_font(size_px, bold=False):
+    """
+    取得快取的 ImageFont 物件
+
+    Args:
+        size_px (int): 字體像素大小
+        bold (bool): 是否粗體
+
+    Returns:
+        ImageFont.FreeTypeFont: 字體物件
+    """
+    return ImageFont.truetype(_font_path(bold), max(1, int(size_px)))
+
+
+def _to_rgb(color):
+    """將 0-1 浮點 RGB(A) 轉換為 0-255 整數 RGB"""
+    return tuple(int(round(c * 255)) for c in color[:3])
+
+
+class PILTimelineRenderer:
+    """以 PIL ImageDraw 繪製與 TimelineVisualizer 版面一致的頁面"""
+
+    def __init__(self, config, cmap, dpi=150):
+        """
+        初始化光柵化引擎
+
+        Args:
+            config (dict): TimelineVisualizer 配置字典
+            cmap (Colormap): 里程碑漸變色彩映射
+            dpi (int): 輸出解析度
+        """
+        self.config = config
+        self.cmap = cmap
+        self.dpi = dpi
+        self.width_px = int(round(config['page_width'] * dpi))
+        self.height_px = int(round(config['page_height'] * dpi))
+
+    # ==================== 座標換算 ====================
+
+    def _px(self, inches):
+        """英寸轉像素"""
+        return inches * self.dpi
+
+    def _pt(self, points):
+        """點轉像素（線寬、字體大小）"""
+        return points * self.dpi / 72
+
+    def _box(self, x, y, width, height):
+        """頁面座標（英寸，原點在左下）轉換為像素框 (left, top, right, bottom)"""
+        left = self._px(x)
+        right = self._px(x + width)
+        top = self.height_px - self._px(y + height)
+        bottom = self.height_px - self._px(y)
+        return left, top, right, bottom
+
+    # ==================== 繪圖基元 ====================
+
+    def _text(self, draw, image, xy, text, size_pt, color, bold=False,
+              anchor='mm', rotation=0, ha='center', va='top'):
+        """
+        繪製文字；旋轉文字按 matplotlib 的方式以旋轉後外框對齊
+
+        Args:
+            draw (ImageDraw.Draw): 繪圖物件
+            image (Image.Image): 頁面圖片（旋轉文字需貼圖）
+            xy (tuple): 錨點像素座標
+            text (str): 文字
+            size_pt (float): 字體大小（點）
+            color (tuple): 0-255 RGB 顏色
+            bold (bool): 是否粗體
+            anchor (str): 未旋轉時的 PIL 錨點
+            rotation (float): 旋轉角度（逆時針）
+            ha, va (str): 旋轉時外框的水平/垂直對齊方式
+        """
+        font = get_font(self._pt(size_pt), bold)
+        if not rotation:
+            draw.text(xy, text, fill=color, font=font, anchor=anchor)
+            return
+
+        left, top, right, bottom = font.getbbox(text)
+        label = Image.new('L', (int(right - left) + 2,
+                          int(bottom - top) + 2), 0)
+        ImageDraw.Draw(label).text((-left + 1, -top + 1),
+                                   text, fill=255, font=font)
+        label = label.rotate(rotation, resample=Image.Resampling.BICUBIC,
+                             expand=True)
+
+        x, y = xy
+        if ha == 'center':
+            x -= label.width / 2
+        elif ha == 'right':
+            x -= label.width
+        if va == 'center':
+            y -= label.height / 2
+        elif va == 'bottom':
+            y -= label.height
+        image.paste(color, (int(round(x)), int(round(y))), label)
+
+    def _dashed_line(self, draw, start, end, color, width_pt):
+        """繪製虛線（ImageDraw 不支援線型）"""
+        scale = max(width_pt, 1.0)
+        dash, gap = (self._pt(length * scale) for length in DASH_PATTERN)
+        (x0, y0), (x1, y1) = start, end
+        length = float(np.hypot(x1 - x0, y1 - y0))
+        if length == 0:
+            return
+        ux, uy = (x1 - x0) / length, (y1 - y0) / length
+        width = max(1, int(round(self._pt(width_pt))))
+
+        pos = 0.0
+        while pos < length:
+            seg_end = min(pos + dash, length)
+            draw.line([(x0 + ux * pos, y0 + uy * pos),
+                       (x0 + ux * seg_end, y0 + uy * seg_end)],
+                      fill=color, width=width)
+            pos = seg_end + gap
+
+    # ==================== 頁面 ====================
+
+    def render_page(self, page_df, stats, page_num=1, total_pages=1, title="里程碑時間線"):
+        """
+        繪製單頁時間線（版面與 TimelineVisualizer.create_timeline_figure 一致）
+
+        Args:
+            page_df (pd.DataFrame): 當前頁的里程碑數據
+            stats (dict): 統計信息字典
+            page_num (int): 當前頁碼
+            total_pages (int): 總頁數
+            title (str): 圖表標題
+
+        Returns:
+            PIL.Image.Image: RGB 頁面圖片（已按內容裁切留白）
+        """
+        cfg = self.config
+        image = Image.new('RGB', (self.width_px, self.height_px), 'white')
+        draw = ImageDraw.Draw(image)
+
+        # 計算版面尺寸
+        margin = cfg['margin']
+        content_width = cfg['page_width'] - 2 * margin
+        content_height = cfg['page_height'] - 2 * margin
+        title_height = 0.5
+        stat_height = 1.5
+        timeline_height = content_height - title_height - stat_height - 0.3
+
+        # 標題
+        left, top, right, bottom = self._box(
+            margin, cfg['page_height'] - margin - title_height, content_width, title_height)
+        self._text(draw, image, ((left + right) / 2, (top + bottom) / 2), title,
+                   cfg['title_font'], _to_rgb(cfg['text_color']), bold=True)
+
+        # 統計面板 + 月度圖表
+        stat_top = cfg['page_height'] - margin - title_height - stat_height
+        self._draw_stat_panel(image, draw, margin, stat_top,
+                              content_width, stat_height, stats)
+
+        # 時間線
+        timeline_top = stat_top - 0.3 - timeline_height
+        self._draw_timeline(image, draw, margin, timeline_top,
+                            content_width, timeline_height, page_df)
+
+        # 頁碼
+        left, top, right, bottom = self._box(
+            margin, margin - 0.3, content_width, 0.2)
+        self._text(draw, image, ((left + right) / 2, (top + bottom) / 2),
+                   f"第 {page_num} 頁，共 {total_pages} 頁",
+                   cfg['label_font'], _to_rgb(cfg['text_color']))
+
+        return self._crop_tight(image)
+
+    def _crop_tight(self, image):
+        """等同 savefig(bbox_inches='tight')：裁切到內容外框並保留留白"""
+        background = Image.new('RGB', image.size, 'white')
+        bbox = ImageChops.difference(image, background).getbbox()
+        if bbox is None:
+            return image
+        pad = int(round(self._px(TIGHT_PAD_INCH)))
+        left, top, right, bottom = bbox
+        return image.crop((max(0, left - pad), max(0, top - pad),
+                           min(image.width, right + pad), min(image.height, bottom + pad)))
+
+    def _draw_stat_panel(self, image, draw, x, y, width, height, stats):
+        """繪製統計面板（文字 + 月度分佈圖）"""
+        cfg = self.config
+        left, top, right, bottom = self._box(x, y, width, height)
+
+        # 背景和邊框（round,pad=0.01）
+        pad_x = 0.01 * (right - left)
+        pad_y = 0.01 * (bottom - top)
+        draw.rounded_rectangle(
+            [left - pad_x, top - pad_y, right + pad_x, bottom + pad_y],
+            radius=min(pad_x, pad_y),
+            fill=_to_rgb(cfg['stat_panel_color']),
+            outline=_to_rgb(cfg['stat_panel_edge_color']),
+            width=max(1, int(round(self._pt(2))))
+        )
+
+        # 統計文字區域（左側）
+        stat_text_width = 0.55
+        stat_lines = [
+            f"里程碑總數: {stats.get('total_milestones', 0)}",
+            f"開始日期: {stats.get('start_date', '').strftime('%Y-%m-%d') if stats.get('start_date') else 'N/A'}",
+            f"結束日期: {stats.get('end_date', '').strftime('%Y-%m-%d') if stats.get('end_date') else 'N/A'}",
+            f"時間跨度: {stats.get('total_days', 0)} 天",
+            f"里程碑密度: {stats.get('milestone_density', 0):.2f} 個/月",
+        ]
+
+        y_pos = 0.85
+        for line in stat_lines:
+            self._text(draw, image,
+                       (left + 0.05 * (right - left),
+                        bottom - y_pos * (bottom - top)),
+                       line, cfg['stat_font'], _to_rgb(cfg['stat_text_color']),
+                       bold=True, anchor='lt')
+            y_pos -= 0.16
+
+        # 月度分佈小圖表（右側）
+        if stats.get('monthly_distribution'):
+            self._draw_monthly_chart(
+                image, draw, x + width * stat_text_width, y + height * 0.1,
+                width * (1 - stat_text_width) - 0.05, height * 0.8,
+                stats['monthly_distribution']
+            )
+
+    def _draw_monthly_chart(self, image, draw, x, y, width, height, monthly_data):
+        """繪製月度分佈柱狀圖（座標範圍和刻度與 matplotlib 自動縮放一致）"""
+        left, top, right, bottom = self._box(x, y, width, height)
+
+        months = [item['period'][-2:] for item in monthly_data]
+        counts = [item['count'] for item in monthly_data]
+        n = len(months)
+
+        # 與 matplotlib bar() 的自動範圍一致：x 兩側留 5% 邊距，y 從 0 開始
+        bar_width = 0.8
+        x_min, x_max = -bar_width / 2, n - 1 + bar_width / 2
+        x_margin = (x_max - x_min) * 0.05
+        x_min, x_max = x_min - x_margin, x_max + x_margin
+        y_max = max(counts) * 1.05
+        y_ticks = MaxNLocator(nbins=4, steps=[1, 2, 2.5, 5, 10]).tick_values(0, y_max)
+
+        def to_px(data_x, data_y):
+            px = left + (data_x - x_min) / (x_max - x_min) * (right - left)
+            py = bottom - data_y / y_max * (bottom - top)
+            return px, py
+
+        draw.rectangle([left, top, right, bottom], fill='white')
+
+        # 網格線
+        grid_color = (int(255 * 0.7 + 0.3 * 176),) * 3
+        for tick in y_ticks:
+            if 0 <= tick <= y_max:
+                _, py = to_px(0, tick)
+                self._dashed_line(draw, (left, py), (right, py),
+                                  grid_color, 0.8)
+
+        # 柱狀圖
+        colors = plt.cm.Blues(np.linspace(0.4, 0.8, n))
+        for i, count in enumerate(counts):
+            x0, y0 = to_px(i - bar_width / 2, count)
+            x1, y1 = to_px(i + bar_width / 2, 0)
+            draw.rectangle([x0, y0, x1, y1], fill=_to_rgb(colors[i]),
+                           outline=(0, 0, 128), width=max(1, int(round(self._pt(0.5)))))
+
+        # 座標框
+        draw.rectangle([left, top, right, bottom], outline='black',
+                       width=max(1, int(round(self._pt(0.8)))))
+
+        # 刻度標籤
+        tick_len = self._pt(3.5)
+        for i, month in enumerate(months):
+            px, _ = to_px(i, 0)
+            draw.line([(px, bottom), (px, bottom + tick_len)], fill='black')
+            self._text(draw, image, (px, bottom + tick_len * 1.5), month, 9,
+                       (0, 0, 0), bold=True, rotation=45, ha='center', va='top')
+        for tick in y_ticks:
+            if 0 <= tick <= y_max:
+                _, py = to_px(0, tick)
+                draw.line([(left - tick_len, py), (left, py)], fill='black')
+                self._text(draw, image, (left - tick_len * 1.5, py), f"{tick:g}", 9,
+                           (0, 0, 0), anchor='rm')
+
+        # y 軸標題
+        self._text(draw, image, (left - self._pt(24), (top + bottom) / 2), '里程碑數', 10,
+                   (0, 0, 0), bold=True, rotation=90, ha='center', va='center')
+
+    def _draw_timeline(self, image, draw, x, y, width, height, page_df):
+        """繪製水平時間線（資料座標與 matplotlib 版本一致）"""
+        cfg = self.config
+        left, top, right, bottom = self._box(x, y, width, height)
+        n = len(page_df)
+
+        # 與 ax.set_xlim(-0.05, 1.05) / ax.set_ylim(-0.5, n + 0.5) 一致
+        x_min, x_max = -0.05, 1.05
+        y_min, y_max = -0.5, n + 0.5
+
+        def to_px(data_x, data_y):
+            px = left + (data_x - x_min) / (x_max - x_min) * (right - left)
+            py = bottom - (data_y - y_min) / (y_max - y_min) * (bottom - top)
+            return px, py
+
+        min_date = page_df['date'].min()
+        max_date = page_df['date'].max()
+        date_range = (max_date - min_date).days
+        if date_range == 0:
+            date_range = 1  # 避免除以零
+
+        # 主軸線
+        axis_y = n - 1
+        draw.line([to_px(0.05, axis_y), to_px(0.95, axis_y)],
+                  fill=_to_rgb(cfg['timeline_axis_color']),
+                  width=max(1, int(round(self._pt(cfg['timeline_axis_width'])))))
+
+        # 色彩映射
+        colors = self.cmap(np.linspace(0, 1, n)) if n > 1 else self.cmap([0.0])
+        text_color = _to_rgb(cfg['text_color'])
+
+        # 圓點在資料座標中半徑為 0.015（x、y 比例不同，實際為橢圓）
+        radius_x = 0.015 / (x_max - x_min) * (right - left)
+        radius_y = 0.015 / (y_max - y_min) * (bottom - top)
+
+        days = (page_df['date'] - min_date).dt.days.to_numpy()
+        x_positions = 0.05 + (days / date_range) * 0.9
+        date_texts = page_df['date'].dt.strftime('%Y-%m-%d').tolist()
+
+        for idx, (x_pos, event, date_text) in enumerate(zip(x_positions, page_df['event'], date_texts)):
+            # 垂直虛線
+            self._dashed_line(draw, to_px(x_pos, axis_y), to_px(x_pos, axis_y - 0.3),
+                              (211, 211, 211), 0.5)
+
+            # 圓點
+            cx, cy = to_px(x_pos, axis_y)
+            draw.ellipse([cx - radius_x, cy - radius_y, cx + radius_x, cy + radius_y],
+                         fill=_to_rgb(colors[idx]), outline=(169, 169, 169))
+
+            # 事件標籤
+            label_y = n - 2 if idx % 2 == 0 else n - 1.6
+            rotation = 45 if len(event) > 8 else 0
+            lx, ly = to_px(x_pos, label_y)
+            self._text(draw, image, (lx, ly), event, cfg['label_font'] + 1, text_color,
+                       bold=True, anchor='mt', rotation=rotation, ha='center', va='top')
+
+            # 日期標籤
+            dx, dy = to_px(x_pos, n - 0.3)
+            self._text(draw, image, (dx, dy), date_text, cfg['label_font'], text_color,
+                       anchor='mt')
+
+        logger.info(f"時間線繪製完成，共 {n} 個里程碑")
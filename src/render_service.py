@@ -0,0 +1,384 @@
+"""
+本地渲染服務：常駐的預熱工作進程池 + HTTP 請求佇列，重用 main.main() 工作流
+
+用法:
+    python -m src.render_service --port 8765 --workers 4
+
+接口:
+    POST /render   JSON {"input_path": ..., "title": ..., 其他 main() 參數}，返回 xlsx 檔案
+    GET  /stats    佇列深度、請求數和延遲百分位數
+    GET  /health   健康檢查
+"""
+
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import os
+from pathlib import Path
+import shutil
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+# 允許經由服務傳給 main.main() 的參數
+ALLOWED_OPTIONS = {
+    'title', 'out_of_core', 'memory_budget_mb', 'multi_project', 'group_col',
+    'encoding_profile', 'render_engine', 'overview', 'start_date', 'end_date',
+    'use_input_cache', 'dataframe_engine',
+}
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+STREAM_CHUNK_BYTES = 64 * 1024
+LATENCY_WINDOW = 1000  # 計算百分位數的最近請求數
+
+
+def _warm_worker():
+    """工作進程初始化：預先導入 pandas/matplotlib/openpyxl、完成字體設定並渲染一次"""
+    import main  # noqa: F401  導入即完成日誌和字體設定
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(1, 1), dpi=50)
+    fig.text(0.5, 0.5, '預熱', family='sans-serif')
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+def _ping():
+    """空任務，用於啟動時拉起全部工作進程"""
+    return os.getpid()
+
+
+def _render_job(input_path, output_path, options):
+    """
+    在工作進程中執行一次完整的報告生成
+
+    Returns:
+        str: 輸出檔案路徑
+    """
+    import main
+
+    return str(main.main(input_path, output_path, **options))
+
+
+class _Job:
+    """一次渲染任務，相同請求的並發調用共享同一個任務"""
+
+    def __init__(self, key, future, output_path):
+        self.key = key
+        self.future = future
+        self.output_path = output_path
+        self.waiters = 0
+
+
+class RenderService:
+    """渲染服務：請求去重、提交到預熱進程池並統計延遲"""
+
+    def __init__(self, workers=None, output_dir=None):
+        """
+        初始化渲染服務
+
+        Args:
+            workers (int): 工作進程數，預設取 config.settings.SERVICE_WORKERS；
+                受資源調控器的內存/CPU 預算約束
+            output_dir (str): 輸出暫存目錄，預設為新的臨時目錄
+        """
+        from config.settings import SERVICE_WORKERS
+        from src.resource_governor import ResourceGovernor
+
+        self.workers = ResourceGovernor().worker_limit(requested=workers or SERVICE_WORKERS)
+        self._own_output_dir = output_dir is None
+        self.output_dir = Path(output_dir or tempfile.mkdtemp(
+            prefix='drawflow_service_'))
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_warm_worker)
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._counters = {'requests': 0, 'deduplicated': 0,
+                          'completed': 0, 'failed': 0}
+
+    def warm_up(self):
+        """拉起並預熱全部工作進程"""
+        start = time.perf_counter()
+        pids = {f.result() for f in [self._executor.submit(_ping)
+                                     for _ in range(self.workers)]}
+        logger.info(
+            f"工作進程預熱完成: {len(pids)} 個進程，耗時 {time.perf_counter() - start:.2f}s")
+
+    @staticmethod
+    def request_key(input_path, options):
+        """
+        以輸入檔案指紋和參數計算請求鍵（相同鍵的並發請求只渲染一次）
+
+        Args:
+            input_path (str): 輸入檔案路徑
+            options (dict): main() 參數
+
+        Returns:
+            str: 請求鍵
+        """
+        path = Path(input_path).resolve()
+        stat = path.stat()
+        payload = json.dumps(
+            [str(path), stat.st_size, stat.st_mtime_ns, options],
+            sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def acquire(self, input_path, options):
+        """
+        提交或加入一個渲染任務
+
+        Args:
+            input_path (str): 輸入檔案路徑
+            options (dict): main() 參數
+
+        Returns:
+            _Job: 渲染任務（調用方完成後需 release）
+        """
+        key = self.request_key(input_path, options)
+        with self._lock:
+            self._counters['requests'] += 1
+            job = self._jobs.get(key)
+            if job is None:
+                output_path = self.output_dir / f"{key[:16]}.xlsx"
+                future = self._executor.submit(
+                    _render_job, str(input_path), str(output_path), options)
+                job = _Job(key, future, output_path)
+                self._jobs[key] = job
+            else:
+                self._counters['deduplicated'] += 1
+            job.waiters += 1
+        return job
+
+    def release(self, job, latency, ok):
+        """
+        釋放任務；最後一個等待者離開時刪除輸出檔案
+
+        Args:
+            job (_Job): 渲染任務
+            latency (float): 請求延遲（秒）
+            ok (bool): 是否成功
+        """
+        with self._lock:
+            self._latencies.append(latency)
+            self._counters['completed' if ok else 'failed'] += 1
+            job.waiters -= 1
+            if job.waiters == 0:
+                self._jobs.pop(job.key, None)
+                try:
+                    job.output_path.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def stats(self):
+        """
+        服務統計
+
+        Returns:
+            dict: 佇列深度、等待中的請求數、計數器和延遲百分位數（毫秒）
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            queue_depth = sum(
+                1 for job in self._jobs.values() if not job.future.done())
+            waiting = sum(job.waiters for job in self._jobs.values())
+            counters = dict(self._counters)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            idx = min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))
+            return round(latencies[idx] * 1000, 1)
+
+        return {
+            'workers': self.workers,
+            'queue_depth': queue_depth,
+            'waiting_requests': waiting,
+            **counters,
+            'latency_ms': {'p50': percentile(50), 'p90': percentile(90), 'p99': percentile(99)},
+        }
+
+    def shutdown(self):
+        """關閉進程池並清理暫存目錄（尚未開始的任務被取消）"""
+        # 等同 Python 3.9+ 的 shutdown(cancel_futures=True)
+        with self._lock:
+            for job in self._jobs.values():
+                job.future.cancel()
+        self._executor.shutdown(wait=True)
+        if self._own_output_dir:
+            shutil.rmtree(self.output_dir, ignore_errors=True)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """HTTP 請求處理（self.server.service 為 RenderService）"""
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send_json(200, self.server.service.stats())
+        elif self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': f"未知路徑: {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/render':
+            self._send_json(404, {'error': f"未知路徑: {self.path}"})
+            return
+
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            input_path = request.pop('input_path')
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {'error': f"請求格式錯誤: {e}"})
+            return
+
+        unknown = set(request) - ALLOWED_OPTIONS
+        if unknown:
+            self._send_json(400, {'error': f"不支援的參數: {sorted(unknown)}"})
+            return
+        if not Path(input_path).exists():
+            self._send_json(404, {'error': f"檔案不存在: {input_path}"})
+            return
+
+        service = self.server.service
+        job = service.acquire(input_path, request)
+        ok = False
+        try:
+            output_path = Path(job.future.result())
+            size = output_path.stat().st_size
+            self.send_response(200)
+            self.send_header('Content-Type', XLSX_CONTENT_TYPE)
+            self.send_header('Content-Length', str(size))
+            self.send_header('X-Render-Key', job.key)
+            self.end_headers()
+            with open(output_path, 'rb') as fp:
+                shutil.copyfileobj(fp, self.wfile, STREAM_CHUNK_BYTES)
+            ok = True
+        except Exception as e:
+            logger.error(f"渲染失敗: {e}", exc_info=True)
+            self._send_json(500, {'error': str(e)})
+        finally:
+            service.release(job, time.perf_counter() - start, ok)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def create_server(host=None, port=None, workers=None, output_dir=None):
+    """
+    建立渲染服務（尚未開始監聽循環）
+
+    Args:
+        host (str): 監聽地址，預設取 config.settings.SERVICE_HOST
+        port (int): 監聽端口，預設取 config.settings.SERVICE_PORT；0 表示隨機端口
+        workers (int): 工作進程數
+        output_dir (str): 輸出暫存目錄
+
+    Returns:
+        ThreadingHTTPServer: 伺服器物件，server.service 為 RenderService
+    """
+    from config.settings import SERVICE_HOST, SERVICE_PORT
+
+    service = RenderService(workers=workers, output_dir=output_dir)
+    service.warm_up()
+    server = ThreadingHTTPServer(
+        (host or SERVICE_HOST, SERVICE_PORT if port is None else port), _RequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+class RenderServiceClient:
+    """渲染服務客戶端"""
+
+    def __init__(self, base_url, timeout=600):
+        """
+        初始化客戶端
+
+        Args:
+            base_url (str): 服務地址，例如 http://127.0.0.1:8765
+            timeout (float): 請求逾時（秒）
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def render(self, input_path, output_path, **options):
+        """
+        請求渲染並以串流方式保存返回的 xlsx
+
+        Args:
+            input_path (str): 輸入 Excel 檔案路徑（服務端可訪問的路徑）
+            output_path (str): 本地保存路徑
+            **options: main() 參數，例如 title、encoding_profile
+
+        Returns:
+            Path: 保存的檔案路徑
+        """
+        payload = json.dumps({'input_path': str(input_path), **options},
+                             ensure_ascii=False).encode('utf-8')
+        request = urllib.request.Request(
+            f"{self.base_url}/render", data=payload,
+            headers={'Content-Type': 'application/json'}, method='POST')
+
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response, \
+                    open(output_path, 'wb') as fp:
+                shutil.copyfileobj(response, fp, STREAM_CHUNK_BYTES)
+        except urllib.error.HTTPError as e:
+            detail = json.loads(e.read() or b'{}').get('error', e.reason)
+            raise RuntimeError(f"渲染服務錯誤 {e.code}: {detail}") from None
+        return output_path
+
+    def stats(self):
+        """取得服務統計"""
+        with urllib.request.urlopen(f"{self.base_url}/stats", timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DrawFlow 本地渲染服務')
+    parser.add_argument('--host', default=None, help='監聽地址')
+    parser.add_argument('--port', type=int, default=None, help='監聽端口')
+    parser.add_argument('--workers', type=int, default=None, help='工作進程數')
+    parser.add_argument('--output-dir', default=None, help='輸出暫存目錄')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    server = create_server(args.host, args.port, args.workers, args.output_dir)
+    host, port = server.server_address[:2]
+    logger.info(f"渲染服務已啟動: http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
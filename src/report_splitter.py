@@ -0,0 +1,300 @@
+"""
+拆分輸出模塊：將頁數很多的報告按頁數、位元組預算或日曆週期拆分為多個工作簿（或工作表），
+各部分在獨立進程中並行渲染和寫入，另寫一個鏈接到各部分的索引工作簿
+"""
+
+import glob
+import logging
+import math
+from pathlib import Path
+import re
+
+import pandas as pd
+
+from src.data_processor import DataProcessor
+from src.excel_generator import ExcelGenerator
+from src.resource_governor import ResourceGovernor, estimate_report_bytes
+
+logger = logging.getLogger(__name__)
+
+SPLIT_MODES = ('pages', 'bytes', 'period')
+SPLIT_PERIODS = ('M', 'Q', 'Y')
+
+
+def split_by_bytes(sizes, max_bytes):
+    """
+    按位元組預算將連續頁面分組（單頁超出預算時獨立成組）
+
+    Args:
+        sizes (list): 每頁圖片位元組數
+        max_bytes (int): 每組位元組上限
+
+    Returns:
+        list: [(start, end), ...] 頁索引範圍，左閉右開
+    """
+    ranges = []
+    start, total = 0, 0
+    for idx, size in enumerate(sizes):
+        if idx > start and total + size > max_bytes:
+            ranges.append((start, idx))
+            start, total = idx, 0
+        total += size
+    if start < len(sizes):
+        ranges.append((start, len(sizes)))
+    return ranges
+
+
+def _render_part(job):
+    """
+    渲染一個部分的頁面（在工作進程中執行）
+
+    Args:
+        job (dict): 'pages' 為 [(頁碼, 頁面 DataFrame), ...]，'total_pages' 為頁碼分母，
+            'render_stats' 為統計面板使用的統計信息
+
+    Returns:
+        list: PNG 位元組列表
+    """
+    from src.visualizer import TimelineVisualizer
+
+    excel_gen = ExcelGenerator(profile=job['encoding_profile'])
+    visualizer = TimelineVisualizer(engine=job['render_engine'], dpi=excel_gen.dpi)
+    figures = (
+        visualizer.create_timeline_figure(
+            page_df, job['render_stats'], page_num, job['total_pages'], job['title'])
+        for page_num, page_df in job['pages']
+    )
+    images = list(excel_gen.encode_figures(figures, close_figures=True))
+    excel_gen.log_encoding_summary()
+    return images
+
+
+def _write_part(job):
+    """
+    渲染（如尚未渲染）並寫入一個部分的工作簿（在工作進程中執行）
+
+    Returns:
+        int: 寫入的頁數
+    """
+    images = job.get('images')
+    if images is None:
+        images = _render_part(job)
+    ExcelGenerator(profile=job['encoding_profile']).save_encoded_excel(
+        images, job['path'], job['stats'], title=job['title'])
+    return len(images)
+
+
+class ReportSplitter:
+    """
+    拆分輸出生成器
+
+    拆分方式:
+        pages  - 每 split_size 頁一個部分（預設 config.settings.SPLIT_MAX_PAGES）
+        bytes  - 按已編碼圖片大小，每部分不超過 split_size MB（預設 SPLIT_MAX_MB）
+        period - 按日曆週期 'M'（月）、'Q'（季）、'Y'（年）拆分（預設 SPLIT_PERIOD），
+                 每個週期獨立分頁和統計
+    pages 和 bytes 方式保留全局頁碼和統計面板，每個部分的工作表表頭和索引顯示該部分的統計
+    """
+
+    def __init__(self, split_by, split_size=None, as_sheets=False, max_workers=None,
+                 milestones_per_page=50, encoding_profile=None, render_engine=None,
+                 dataframe_engine=None, governor=None):
+        """
+        初始化拆分輸出生成器
+
+        Args:
+            split_by (str): 拆分方式（'pages'、'bytes'、'period'）
+            split_size: 每部分頁數、每部分 MB 或週期代碼，預設取 config.settings
+            as_sheets (bool): 輸出為單個工作簿的多個工作表（索引工作表 + 每部分一個工作表），
+                預設為多個工作簿 + 索引工作簿
+            max_workers (int): 並行工作進程數上限，預設取 config.settings.SPLIT_MAX_WORKERS，
+                實際並行數受資源調控器的預算約束；1 表示在當前進程中順序執行
+            milestones_per_page (int): 每頁最大里程碑數
+            encoding_profile (str): 圖片編碼配置名稱
+            render_engine (str): 渲染引擎名稱
+            dataframe_engine (str): 數據處理引擎名稱
+            governor (ResourceGovernor): 資源調控器，預設按 config.settings 建立
+        """
+        from config.settings import SPLIT_MAX_MB, SPLIT_MAX_PAGES, SPLIT_MAX_WORKERS, SPLIT_PERIOD
+
+        if split_by not in SPLIT_MODES:
+            raise ValueError(f"未知的拆分方式: {split_by}")
+        if split_by == 'pages':
+            split_size = int(split_size or SPLIT_MAX_PAGES)
+        elif split_by == 'bytes':
+            split_size = float(split_size or SPLIT_MAX_MB)
+        else:
+            split_size = str(split_size or SPLIT_PERIOD).upper()
+            if split_size not in SPLIT_PERIODS:
+                raise ValueError(f"未知的拆分週期: {split_size}（可用 M、Q、Y）")
+        if split_by != 'period' and split_size <= 0:
+            raise ValueError(f"拆分大小必須為正數: {split_size}")
+
+        self.split_by = split_by
+        self.split_size = split_size
+        self.as_sheets = as_sheets
+        self.max_workers = max_workers or SPLIT_MAX_WORKERS
+        self.milestones_per_page = milestones_per_page
+        self.encoding_profile = encoding_profile
+        self.render_engine = render_engine
+        self.dpi = ExcelGenerator(profile=encoding_profile).dpi
+        self.governor = governor or ResourceGovernor()
+        self.processor = DataProcessor(
+            milestones_per_page=milestones_per_page, engine=dataframe_engine)
+
+    def _job(self, name, stats, title, **fields):
+        return {
+            'name': name, 'stats': stats, 'title': title,
+            'encoding_profile': self.encoding_profile, 'render_engine': self.render_engine,
+            **fields,
+        }
+
+    def _page_range_job(self, pages, start, end, stats, title):
+        """全局分頁中第 start - end 頁（左閉右開）組成的部分"""
+        part_stats = self.processor.calculate_statistics(pd.concat(pages[start:end]))
+        return self._job(
+            f"第 {start + 1}-{end} 頁", part_stats, title,
+            pages=[(idx + 1, pages[idx]) for idx in range(start, end)],
+            total_pages=len(pages), render_stats=stats)
+
+    def _job_cost(self, job):
+        """部分在工作進程中的估算內存"""
+        if 'images' in job:
+            # 傳入的圖片和工作簿中的副本
+            return 2 * sum(len(image) for image in job['images'])
+        rows = sum(len(page_df) for _, page_df in job['pages'])
+        return estimate_report_bytes(rows, self.dpi, self.render_engine, self.milestones_per_page)
+
+    def _map(self, fn, jobs):
+        """按提交順序並行執行；max_workers 為 1 時在當前進程中順序執行"""
+        if self.max_workers == 1:
+            return map(fn, jobs)
+        return self.governor.imap(
+            fn, ((job,) for job in jobs), cost=self._job_cost, max_workers=self.max_workers)
+
+    def plan(self, merged_df, stats, pages, title):
+        """
+        劃分各部分
+
+        Args:
+            merged_df (pd.DataFrame): 合併後的 DataFrame
+            stats (dict): 全局統計信息
+            pages (list): 全局分頁
+            title (str): 報告標題
+
+        Returns:
+            list: 部分描述列表，每個元素含 'name'、'stats'、'title'，以及待渲染的
+                'pages' 或已渲染的 'images'
+        """
+        if self.split_by == 'pages':
+            return [
+                self._page_range_job(pages, start, min(start + self.split_size, len(pages)),
+                                     stats, title)
+                for start in range(0, len(pages), self.split_size)
+            ]
+
+        if self.split_by == 'period':
+            jobs = []
+            periods = merged_df['date'].dt.to_period(self.split_size)
+            for period, part_df in merged_df.groupby(periods, sort=True):
+                part_df = part_df.reset_index(drop=True)
+                part_stats = self.processor.calculate_statistics(part_df)
+                part_pages = self.processor.paginate_data(part_df)
+                jobs.append(self._job(
+                    str(period), part_stats, f"{title} {period}",
+                    pages=list(enumerate(part_pages, 1)),
+                    total_pages=len(part_pages), render_stats=part_stats))
+            return jobs
+
+        # bytes: 先並行渲染全部頁面，再按實際圖片大小分組
+        workers = self.max_workers or self.governor.cpu_budget
+        chunk = math.ceil(len(pages) / workers)
+        render_jobs = [
+            self._job(None, None, title,
+                      pages=[(idx + 1, pages[idx])
+                             for idx in range(start, min(start + chunk, len(pages)))],
+                      total_pages=len(pages), render_stats=stats)
+            for start in range(0, len(pages), chunk)
+        ]
+        images = [image for part in self._map(_render_part, render_jobs) for image in part]
+
+        jobs = []
+        max_bytes = int(self.split_size * 1024 * 1024)
+        for start, end in split_by_bytes([len(image) for image in images], max_bytes):
+            job = self._page_range_job(pages, start, end, stats, title)
+            del job['pages']
+            job['images'] = images[start:end]
+            jobs.append(job)
+        return jobs
+
+    def part_path(self, output_path, idx):
+        """第 idx 個部分（從 1 開始）的工作簿路徑"""
+        return output_path.with_name(f"{output_path.stem}_part{idx:02d}{output_path.suffix}")
+
+    def remove_stale_parts(self, output_path, keep=()):
+        """
+        刪除以前運行留下、本次計劃不會生成的 <檔名>_partNN.xlsx
+
+        Args:
+            output_path (Path): 索引工作簿路徑
+            keep (iterable): 本次會寫入的部分路徑
+
+        Returns:
+            list: 已刪除的路徑
+        """
+        pattern = re.compile(
+            rf"{re.escape(output_path.stem)}_part\d+{re.escape(output_path.suffix)}")
+        keep = {Path(path).name for path in keep}
+        removed = []
+        for path in sorted(output_path.parent.glob(f"{glob.escape(output_path.stem)}_part*")):
+            if pattern.fullmatch(path.name) and path.name not in keep:
+                path.unlink()
+                removed.append(path)
+        if removed:
+            logger.info(f"已刪除 {len(removed)} 個舊的部分工作簿: {', '.join(p.name for p in removed)}")
+        return removed
+
+    def run(self, merged_df, stats, pages, output_excel_path, title="里程碑時間線"):
+        """
+        拆分、並行渲染和寫入
+
+        Args:
+            merged_df (pd.DataFrame): 合併後的 DataFrame
+            stats (dict): 全局統計信息
+            pages (list): 全局分頁
+            output_excel_path (str): 索引工作簿路徑（as_sheets 時為唯一的輸出工作簿），
+                各部分寫入同目錄的 <檔名>_partNN.xlsx；全部寫入成功後刪除以前運行留下的多餘部分
+            title (str): 報告標題
+
+        Returns:
+            Path: 索引工作簿路徑
+        """
+        output_path = Path(output_excel_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        jobs = self.plan(merged_df, stats, pages, title)
+        logger.info(f"拆分輸出: 按 {self.split_by}（{self.split_size}）分為 {len(jobs)} 個部分")
+
+        excel_gen = ExcelGenerator(profile=self.encoding_profile)
+        if self.as_sheets:
+            # 同一個工作簿只能由一個進程寫入，各部分仍並行渲染
+            pending = [job for job in jobs if 'images' not in job]
+            for job, images in zip(pending, self._map(_render_part, pending)):
+                job['images'] = images
+            result = excel_gen.save_multi_project_excel(
+                jobs, output_path, title=title, name_header='部分')
+            self.remove_stale_parts(output_path)
+            return result
+
+        for idx, job in enumerate(jobs, 1):
+            job['path'] = self.part_path(output_path, idx)
+        for job, page_count in zip(jobs, self._map(_write_part, jobs)):
+            job['page_count'] = page_count
+            job.pop('images', None)
+            logger.info(f"✓ 部分 {job['name']} 已保存: {job['path']}（{page_count} 頁）")
+
+        result = excel_gen.save_index_excel(
+            jobs, [job['path'].name for job in jobs], output_path, title=title)
+        # 全部部分和索引寫入成功後才刪除舊的部分，失敗時舊索引指向的檔案仍然存在
+        self.remove_stale_parts(output_path, keep=[job['path'] for job in jobs])
+        return result
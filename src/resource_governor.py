@@ -0,0 +1,326 @@
+"""
+資源調控模塊：估算報告生成的內存成本，按內存/CPU 預算限制並行的工作進程和在途頁面，
+並根據實測 RSS 調整並行數；上游生產者在預算用盡時被阻塞（背壓）
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def page_pixels(dpi, page_width=None, page_height=None):
+    """
+    頁面光柵化後的像素數
+
+    Args:
+        dpi (int): 渲染解析度
+        page_width, page_height (float): 頁面尺寸（英寸），預設取 config.settings
+
+    Returns:
+        float: 像素數
+    """
+    from config.settings import PAGE_HEIGHT, PAGE_WIDTH
+
+    return (page_width or PAGE_WIDTH) * dpi * (page_height or PAGE_HEIGHT) * dpi
+
+
+def estimate_page_bytes(rows, dpi, render_engine=None):
+    """
+    單頁圖表在編碼前佔用的內存
+
+    matplotlib 引擎為 Figure 和 Artist 物件（與里程碑數成正比，與 DPI 無關）；
+    pil 引擎為已光柵化的頁面圖片（與像素數成正比）
+
+    Args:
+        rows (int): 頁面的里程碑數
+        dpi (int): 渲染解析度
+        render_engine (str): 渲染引擎名稱，預設取 config.settings.RENDER_ENGINE
+
+    Returns:
+        int: 位元組數
+    """
+    from config.settings import (
+        GOVERNOR_FIGURE_BASE_MB, GOVERNOR_FIGURE_ROW_KB, GOVERNOR_PIL_BYTES_PER_PIXEL,
+        RENDER_ENGINE)
+
+    if (render_engine or RENDER_ENGINE) == 'pil':
+        return int(page_pixels(dpi) * GOVERNOR_PIL_BYTES_PER_PIXEL)
+    return int(GOVERNOR_FIGURE_BASE_MB * MB + rows * GOVERNOR_FIGURE_ROW_KB * 1024)
+
+
+def estimate_encode_bytes(dpi):
+    """編碼一頁時的瞬時峰值（Agg 緩衝、未壓縮 PNG、PIL 轉換和縮放）"""
+    from config.settings import GOVERNOR_RASTER_BYTES_PER_PIXEL
+
+    return int(page_pixels(dpi) * GOVERNOR_RASTER_BYTES_PER_PIXEL)
+
+
+def estimate_report_bytes(rows, dpi, render_engine=None, milestones_per_page=50,
+                          pages_in_flight=1):
+    """
+    單份報告在工作進程中的內存成本（不含進程本身的基礎 RSS）
+
+    包括輸入和合併後的 DataFrame、在途頁面、一頁的編碼峰值，以及寫入前
+    持有的全部已編碼圖片
+
+    Args:
+        rows (int): 里程碑行數
+        dpi (int): 渲染解析度
+        render_engine (str): 渲染引擎名稱
+        milestones_per_page (int): 每頁最大里程碑數
+        pages_in_flight (int): 同時存在的未編碼頁面數
+
+    Returns:
+        int: 位元組數
+    """
+    from config.settings import GOVERNOR_ENCODED_BYTES_PER_PIXEL, OUT_OF_CORE_ROW_BYTES
+
+    pages = max(1, -(-rows // milestones_per_page))
+    page_bytes = estimate_page_bytes(min(rows, milestones_per_page), dpi, render_engine)
+    return int(
+        2 * rows * OUT_OF_CORE_ROW_BYTES
+        + min(pages_in_flight, pages) * page_bytes
+        + estimate_encode_bytes(dpi)
+        + pages * page_pixels(dpi) * GOVERNOR_ENCODED_BYTES_PER_PIXEL
+    )
+
+
+def _read_int(path):
+    try:
+        text = Path(path).read_text().strip()
+    except OSError:
+        return None
+    return int(text) if text.isdigit() else None
+
+
+def detect_memory_bytes():
+    """
+    本機可用的內存總量：物理內存與 cgroup 限制（容器）取較小者
+
+    Returns:
+        int: 位元組數；無法檢測時返回 None
+    """
+    limits = []
+    try:
+        limits.append(os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES'))
+    except (ValueError, OSError, AttributeError):
+        pass
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        limit = _read_int(path)
+        if limit:
+            limits.append(limit)
+    return min(limits) if limits else None
+
+
+def process_rss(pid):
+    """
+    進程的常駐內存（讀取 /proc/<pid>/statm）
+
+    Returns:
+        int: 位元組數；非 Linux 或進程已結束時返回 None
+    """
+    try:
+        with open(f'/proc/{pid}/statm') as fp:
+            resident = int(fp.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident * os.sysconf('SC_PAGE_SIZE')
+
+
+def child_pids(parent=None):
+    """直接子進程的 pid 列表（掃描 /proc）"""
+    parent = parent or os.getpid()
+    pids = []
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return pids
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as fp:
+                stat = fp.read()
+        except OSError:
+            continue
+        # 第 4 個欄位為 ppid；進程名可能含空格，從最後一個 ')' 之後解析
+        fields = stat[stat.rfind(')') + 2:].split()
+        if len(fields) > 1 and int(fields[1]) == parent:
+            pids.append(int(entry))
+    return pids
+
+
+class ResourceGovernor:
+    """
+    內存/CPU 預算調控器
+
+    - worker_limit(): 按預算和單個任務的估算成本決定工作進程數
+    - page_limit(): 按預算決定可同時持有的未編碼頁面數
+    - imap(): 在進程池中執行任務並按提交順序返回結果；在途任務數和估算成本
+      受預算約束，超出時暫停從上游迭代器取任務（背壓）。每完成一個任務即讀取
+      本進程和子進程的實測 RSS：高於高水位時減少並行數，低於低水位時逐步恢復
+    """
+
+    def __init__(self, memory_budget_mb=None, cpu_budget=None,
+                 high_watermark=None, low_watermark=None):
+        """
+        初始化調控器
+
+        Args:
+            memory_budget_mb (int): 內存預算（MB），預設取 config.settings.GOVERNOR_MEMORY_BUDGET_MB，
+                未配置時為本機內存（含 cgroup 限制）的 GOVERNOR_MEMORY_FRACTION
+            cpu_budget (int): 最多同時運行的工作進程數，預設取 config.settings.GOVERNOR_CPU_BUDGET，
+                未配置時為可用的 CPU 核心數
+            high_watermark (float): 實測 RSS 佔預算比例超過此值時減少並行數
+            low_watermark (float): 實測 RSS 佔預算比例低於此值時增加並行數
+        """
+        from config.settings import (
+            GOVERNOR_CPU_BUDGET, GOVERNOR_HIGH_WATERMARK, GOVERNOR_LOW_WATERMARK,
+            GOVERNOR_MEMORY_BUDGET_MB, GOVERNOR_MEMORY_FRACTION, GOVERNOR_WORKER_BASE_MB)
+
+        memory_budget_mb = memory_budget_mb or GOVERNOR_MEMORY_BUDGET_MB
+        if memory_budget_mb:
+            self.memory_budget = int(memory_budget_mb * MB)
+        else:
+            detected = detect_memory_bytes()
+            self.memory_budget = int(detected * GOVERNOR_MEMORY_FRACTION) if detected else 4096 * MB
+
+        if not cpu_budget:
+            cpu_budget = GOVERNOR_CPU_BUDGET
+        if not cpu_budget:
+            try:
+                cpu_budget = len(os.sched_getaffinity(0))
+            except AttributeError:
+                cpu_budget = os.cpu_count() or 1
+        self.cpu_budget = cpu_budget
+
+        self.high_watermark = high_watermark or GOVERNOR_HIGH_WATERMARK
+        self.low_watermark = low_watermark or GOVERNOR_LOW_WATERMARK
+        self.worker_base = int(GOVERNOR_WORKER_BASE_MB * MB)
+        self.peak_rss = 0
+        self.adjustments = 0
+
+    def rss(self, include_children=True):
+        """
+        本進程（及子進程）的實測 RSS
+
+        Returns:
+            int: 位元組數；無法讀取時返回 None
+        """
+        total = process_rss(os.getpid())
+        if total is None:
+            return None
+        if include_children:
+            total += sum(process_rss(pid) or 0 for pid in child_pids())
+        self.peak_rss = max(self.peak_rss, total)
+        return total
+
+    def available(self):
+        """預算中扣除本進程當前 RSS 後的剩餘位元組數"""
+        return self.memory_budget - (self.rss(include_children=False) or 0)
+
+    def worker_limit(self, task_bytes=0, requested=None):
+        """
+        預算內可同時運行的工作進程數
+
+        Args:
+            task_bytes (int): 單個任務的估算內存成本（見 estimate_report_bytes）
+            requested (int): 調用方要求的進程數上限
+
+        Returns:
+            int: 進程數（至少 1）
+        """
+        by_memory = self.available() // (self.worker_base + task_bytes)
+        limit = max(1, min(by_memory, self.cpu_budget, requested or self.cpu_budget))
+        if requested and limit < requested:
+            logger.info(
+                f"資源預算限制工作進程數: {requested} -> {limit}"
+                f"（內存預算 {self.memory_budget / MB:.0f} MB，CPU {self.cpu_budget}）")
+        return int(limit)
+
+    def page_limit(self, page_bytes, reserved=0):
+        """
+        預算內可同時持有的未編碼頁面數
+
+        Args:
+            page_bytes (int): 單頁估算內存（見 estimate_page_bytes）
+            reserved (int): 需預留的其他內存（如編碼峰值）
+
+        Returns:
+            int: 頁數（至少 1）
+        """
+        return max(1, int((self.available() - reserved) // max(1, page_bytes)))
+
+    def imap(self, fn, arg_tuples, cost=None, max_workers=None):
+        """
+        在受調控的進程池中執行 fn(*args)，按提交順序產出結果
+
+        上游迭代器只在任務被接納時才前進；在途任務數達到當前並行數，或在途任務的
+        估算成本超出預算時，先等待最早的任務完成
+
+        Args:
+            fn (callable): 可 pickle 的模塊級函數
+            arg_tuples (iterable): 參數元組迭代器
+            cost (callable): cost(*args) 返回任務的估算內存（位元組），None 表示不按成本接納
+            max_workers (int): 工作進程數上限
+
+        Yields:
+            fn 的返回值
+        """
+        pool_size = self.worker_limit(requested=max_workers)
+        task_budget = self.available() - pool_size * self.worker_base
+        target = pool_size
+        pending = deque()
+        in_flight = 0
+
+        with ProcessPoolExecutor(max_workers=pool_size) as executor:
+            def finish_oldest():
+                nonlocal in_flight, target
+                future, task_cost = pending.popleft()
+                result = future.result()
+                in_flight -= task_cost
+                target = self._adjust(target, pool_size)
+                return result
+
+            for args in arg_tuples:
+                task_cost = cost(*args) if cost else 0
+                while pending and (len(pending) >= target or in_flight + task_cost > task_budget):
+                    yield finish_oldest()
+                if task_cost > task_budget:
+                    logger.warning(
+                        f"單個任務估算需要 {task_cost / MB:.0f} MB，超出剩餘預算 "
+                        f"{max(task_budget, 0) / MB:.0f} MB，單獨執行")
+                pending.append((executor.submit(fn, *args), task_cost))
+                in_flight += task_cost
+
+            while pending:
+                yield finish_oldest()
+
+        if self.peak_rss:
+            logger.info(
+                f"資源調控: 峰值 RSS {self.peak_rss / MB:.0f} MB / 預算 "
+                f"{self.memory_budget / MB:.0f} MB，並行數調整 {self.adjustments} 次")
+
+    def _adjust(self, target, pool_size):
+        """按實測 RSS 調整並行數"""
+        observed = self.rss()
+        if observed is None:
+            return target
+        usage = observed / self.memory_budget
+        if usage > self.high_watermark and target > 1:
+            self.adjustments += 1
+            logger.warning(
+                f"實測 RSS {observed / MB:.0f} MB（預算的 {usage:.0%}），並行數 {target} -> {target - 1}")
+            return target - 1
+        if usage < self.low_watermark and target < pool_size:
+            self.adjustments += 1
+            logger.info(
+                f"實測 RSS {observed / MB:.0f} MB（預算的 {usage:.0%}），並行數 {target} -> {target + 1}")
+            return target + 1
+        return target
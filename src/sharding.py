@@ -0,0 +1,505 @@
+"""
+分片渲染模塊：將一份報告的頁面分配給多個進程（或多台機器）渲染，再按頁序確定性地合併
+
+流程（所有步驟共用一個共享目錄）:
+    1. plan   - 讀取並處理輸入，寫入合併後的數據和 manifest.json
+                （全局統計、分頁邊界、配置雜湊）
+    2. render - 渲染任意頁面範圍，輸出已編碼圖片和 shard.json 組成的分片
+    3. merge  - 校驗所有分片屬於同一份 manifest、頁面完整且圖片未損壞，
+                按頁序寫入最終工作簿
+
+用法:
+    python -m src.sharding plan data/input/milestones.xlsx --dir shared/
+    python -m src.sharding render --dir shared/ --shard 1/4      # 第 1 個分片（共 4 個）
+    python -m src.sharding render --dir shared/ --pages 11-20    # 或指定頁面範圍
+    python -m src.sharding merge --dir shared/ -o report.xlsx
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import shutil
+import socket
+import time
+
+import pandas as pd
+
+from src.date_index import source_fingerprint
+from src.input_cache import content_hash
+from src.milestone_store import MilestoneStore
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+SHARD_META_FILE = 'shard.json'
+DATA_DIR = 'data'
+SHARDS_DIR = 'shards'
+MANIFEST_VERSION = 1
+
+# 影響頁面內容的配置（白名單），只有這些配置計入配置雜湊；
+# 新增的運行時配置（並行數、內存預算、目錄等）不會改變雜湊
+_CONTENT_SETTINGS = (
+    'PAGE_WIDTH', 'PAGE_HEIGHT', 'MARGIN_MM', 'MARGIN_INCH',
+    'TITLE_FONT_SIZE', 'STAT_FONT_SIZE', 'LABEL_FONT_SIZE', 'SMALL_FONT_SIZE',
+    'MONTHLY_CHART_WIDTH_CM', 'MONTHLY_CHART_HEIGHT_CM',
+    'MONTHLY_CHART_WIDTH_INCH', 'MONTHLY_CHART_HEIGHT_INCH',
+    'COLOR_GRADIENT_START', 'COLOR_GRADIENT_MID', 'COLOR_GRADIENT_END',
+    'STAT_PANEL_COLOR', 'STAT_PANEL_EDGE_COLOR', 'TIMELINE_AXIS_COLOR', 'TIMELINE_AXIS_WIDTH',
+    'TEXT_COLOR', 'STAT_TEXT_COLOR',
+    'DPI', 'RENDER_ENGINE', 'ENCODING_PROFILES', 'DEFAULT_ENCODING_PROFILE',
+)
+_CONTENT_SETTING_PREFIXES = ('OVERVIEW_',)
+
+
+def render_config(title, milestones_per_page, encoding_profile=None, render_engine=None):
+    """
+    決定頁面圖片內容的全部配置：報告參數、編碼配置、渲染引擎、config.settings 中的
+    排版常數（見 _CONTENT_SETTINGS），以及渲染庫版本
+
+    Args:
+        title (str): 報告標題
+        milestones_per_page (int): 每頁最大里程碑數
+        encoding_profile (str): 圖片編碼配置名稱
+        render_engine (str): 渲染引擎名稱
+
+    Returns:
+        dict: 可 JSON 序列化的配置
+    """
+    import matplotlib
+    import PIL
+    from config import settings
+
+    encoding_profile = encoding_profile or settings.DEFAULT_ENCODING_PROFILE
+    if encoding_profile not in settings.ENCODING_PROFILES:
+        raise ValueError(f"未知的圖片編碼配置: {encoding_profile}")
+
+    layout = {
+        name: json.loads(json.dumps(getattr(settings, name)))
+        for name in sorted(dir(settings))
+        if name in _CONTENT_SETTINGS or name.startswith(_CONTENT_SETTING_PREFIXES)
+    }
+
+    return {
+        'title': title,
+        'milestones_per_page': milestones_per_page,
+        'encoding_profile': encoding_profile,
+        'render_engine': render_engine or settings.RENDER_ENGINE,
+        'settings': layout,
+        'versions': {'matplotlib': matplotlib.__version__, 'pillow': PIL.__version__},
+    }
+
+
+def config_hash(config):
+    """配置的 SHA-256（鍵排序後的 JSON）"""
+    payload = json.dumps(config, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _dump_stats(stats):
+    """統計信息轉為 JSON（日期為 ISO 格式）"""
+    dumped = dict(stats)
+    for key in ('start_date', 'end_date'):
+        dumped[key] = stats[key].isoformat()
+    return dumped
+
+
+def _load_stats(dumped):
+    stats = dict(dumped)
+    for key in ('start_date', 'end_date'):
+        stats[key] = pd.Timestamp(dumped[key])
+    return stats
+
+
+def _write_json(path, data):
+    """寫入臨時檔案後原子替換"""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+def parse_page_range(text):
+    """
+    解析頁面範圍 'A-B' 或 'A'（從 1 開始，含兩端）
+
+    Returns:
+        tuple: (first_page, last_page)
+    """
+    first, _, last = text.partition('-')
+    first = int(first)
+    return first, int(last) if last else first
+
+
+def shard_ranges(page_count, shard_count):
+    """
+    將頁面平均分為 shard_count 個連續範圍
+
+    Args:
+        page_count (int): 總頁數
+        shard_count (int): 分片數
+
+    Returns:
+        list: [(first_page, last_page), ...]，頁碼從 1 開始；頁數少於分片數時省略空分片
+    """
+    base, extra = divmod(page_count, shard_count)
+    ranges = []
+    first = 1
+    for idx in range(shard_count):
+        size = base + (1 if idx < extra else 0)
+        if size:
+            ranges.append((first, first + size - 1))
+        first += size
+    return ranges
+
+
+class ShardedReport:
+    """
+    共享目錄中的一份分片報告
+
+    目錄結構:
+        manifest.json                  - 來源指紋、配置與雜湊、全局統計、分頁邊界
+        data/                          - 合併後的里程碑（MilestoneStore，記憶體映射）
+        shards/00001-00010/shard.json  - 分片元數據（所屬 manifest、每頁圖片雜湊）
+        shards/00001-00010/page_00001.png ...
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory (str or Path): 共享目錄
+        """
+        self.directory = Path(directory)
+        self.manifest_path = self.directory / MANIFEST_FILE
+        self.shards_dir = self.directory / SHARDS_DIR
+
+    def plan(self, input_excel_path, title="里程碑時間線", milestones_per_page=50,
+             encoding_profile=None, render_engine=None, out_of_core=False,
+             memory_budget_mb=None, dataframe_engine=None):
+        """
+        讀取並處理輸入，寫入合併後的數據和 manifest；舊的分片會被清除
+
+        Args:
+            input_excel_path (str): 輸入 Excel 檔案路徑
+            title (str): 報告標題
+            milestones_per_page (int): 每頁最大里程碑數
+            encoding_profile (str): 圖片編碼配置名稱
+            render_engine (str): 渲染引擎名稱
+            out_of_core (bool): 以外存模式處理輸入
+            memory_budget_mb (int): 外存模式的內存預算（MB）
+            dataframe_engine (str): 數據處理引擎名稱
+
+        Returns:
+            dict: manifest
+        """
+        from src.data_processor import DataProcessor
+        from src.excel_reader import ExcelReader
+        from src.out_of_core import OutOfCoreProcessor, SpilledPages
+
+        config = render_config(title, milestones_per_page, encoding_profile, render_engine)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data_dir = self.directory / DATA_DIR
+        tmp_dir = data_dir.with_name(f".{DATA_DIR}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        reader = ExcelReader(input_excel_path)
+        if out_of_core:
+            with OutOfCoreProcessor(milestones_per_page=milestones_per_page,
+                                    memory_budget_mb=memory_budget_mb) as processor:
+                merged_store, stats, _ = processor.process_chunks(
+                    reader.iter_milestone_chunks(processor.chunk_rows))
+                merged_store.copy_to(tmp_dir)
+        else:
+            processor = DataProcessor(
+                milestones_per_page=milestones_per_page, engine=dataframe_engine)
+            merged_df, stats, _ = processor.process_all(reader.read_milestone_data())
+            MilestoneStore.from_frame(merged_df, tmp_dir)
+
+        # 新數據就位前先移除 manifest 和舊分片，避免舊分片被合併到新數據上
+        self.manifest_path.unlink(missing_ok=True)
+        shutil.rmtree(self.shards_dir, ignore_errors=True)
+        shutil.rmtree(data_dir, ignore_errors=True)
+        os.replace(tmp_dir, data_dir)
+
+        store = MilestoneStore(data_dir)
+        pages = SpilledPages(store, milestones_per_page)
+        boundaries = []
+        for page_idx in range(len(pages)):
+            start = page_idx * milestones_per_page
+            end = min(start + milestones_per_page, len(store))
+            boundaries.append({
+                'page': page_idx + 1,
+                'start_row': start,
+                'end_row': end,
+                'first_date': pd.Timestamp(int(store.dates_ns[start])).isoformat(),
+                'last_date': pd.Timestamp(int(store.dates_ns[end - 1])).isoformat(),
+            })
+
+        source = source_fingerprint(input_excel_path)
+        source['sha256'] = content_hash(input_excel_path)
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'source': source,
+            'config': config,
+            'config_hash': config_hash(config),
+            'rows': len(store),
+            'stats': _dump_stats(stats),
+            'page_count': len(pages),
+            'pages': boundaries,
+        }
+        _write_json(self.manifest_path, manifest)
+        logger.info(
+            f"分片計劃已寫入: {self.manifest_path}（{len(store)} 個里程碑，{len(pages)} 頁，"
+            f"配置雜湊 {manifest['config_hash'][:12]}）")
+        return manifest
+
+    def load_manifest(self):
+        """
+        讀取 manifest
+
+        Returns:
+            tuple: (manifest dict, manifest 檔案的 SHA-256)
+        """
+        if not self.manifest_path.exists():
+            raise FileNotFoundError(f"分片計劃不存在，請先執行 plan: {self.manifest_path}")
+        raw = self.manifest_path.read_bytes()
+        manifest = json.loads(raw)
+        if manifest.get('version') != MANIFEST_VERSION:
+            raise ValueError(f"不支援的 manifest 版本: {manifest.get('version')}")
+        return manifest, hashlib.sha256(raw).hexdigest()
+
+    def shard_path(self, first_page, last_page):
+        """頁面範圍對應的分片目錄"""
+        return self.shards_dir / f"{first_page:05d}-{last_page:05d}"
+
+    def render(self, first_page, last_page):
+        """
+        渲染頁面範圍 [first_page, last_page]（從 1 開始，含兩端）為一個分片
+
+        本機配置（編碼配置、排版常數、渲染庫版本）必須與 manifest 的配置雜湊一致，
+        否則不同進程渲染出的頁面會不一致
+
+        Args:
+            first_page (int): 起始頁
+            last_page (int): 結束頁
+
+        Returns:
+            Path: 分片目錄
+        """
+        from src.excel_generator import ExcelGenerator
+        from src.out_of_core import SpilledPages
+        from src.visualizer import TimelineVisualizer
+
+        manifest, manifest_digest = self.load_manifest()
+        config = manifest['config']
+        page_count = manifest['page_count']
+        if not 1 <= first_page <= last_page <= page_count:
+            raise ValueError(f"頁面範圍 {first_page}-{last_page} 超出 1-{page_count}")
+
+        local_config = render_config(
+            config['title'], config['milestones_per_page'],
+            config['encoding_profile'], config['render_engine'])
+        if config_hash(local_config) != manifest['config_hash']:
+            changed = sorted(k for k in config if config[k] != local_config.get(k))
+            raise ValueError(f"本機渲染配置與分片計劃不一致: {', '.join(changed)}")
+
+        store = MilestoneStore(self.directory / DATA_DIR)
+        if len(store) != manifest['rows']:
+            raise ValueError(f"數據行數 {len(store)} 與 manifest 記錄的 {manifest['rows']} 不一致")
+        pages = SpilledPages(store, config['milestones_per_page'])
+        stats = _load_stats(manifest['stats'])
+
+        target = self.shard_path(first_page, last_page)
+        tmp_dir = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        start = time.perf_counter()
+        excel_gen = ExcelGenerator(profile=config['encoding_profile'])
+        visualizer = TimelineVisualizer(engine=config['render_engine'], dpi=excel_gen.dpi)
+        entries = []
+        try:
+            for page_num in range(first_page, last_page + 1):
+                page_df = pages[page_num - 1]
+                bounds = manifest['pages'][page_num - 1]
+                if (page_df.index[0], page_df.index[-1] + 1) != (bounds['start_row'], bounds['end_row']):
+                    raise ValueError(f"第 {page_num} 頁的分頁邊界與 manifest 不一致")
+
+                fig = visualizer.create_timeline_figure(
+                    page_df, stats, page_num, page_count, config['title'])
+                image_bytes = next(excel_gen.encode_figures([fig], close_figures=True))
+                name = f"page_{page_num:05d}.png"
+                (tmp_dir / name).write_bytes(image_bytes)
+                entries.append({
+                    'page': page_num,
+                    'file': name,
+                    'bytes': len(image_bytes),
+                    'sha256': hashlib.sha256(image_bytes).hexdigest(),
+                })
+                logger.info(f"分片 {target.name}: 第 {page_num}/{page_count} 頁")
+
+            _write_json(tmp_dir / SHARD_META_FILE, {
+                'manifest_sha256': manifest_digest,
+                'config_hash': manifest['config_hash'],
+                'first_page': first_page,
+                'last_page': last_page,
+                'pages': entries,
+                'host': socket.gethostname(),
+                'pid': os.getpid(),
+                'seconds': round(time.perf_counter() - start, 3),
+            })
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(tmp_dir, target)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        excel_gen.log_encoding_summary()
+        logger.info(f"✓ 分片已寫入: {target}（第 {first_page}-{last_page} 頁）")
+        return target
+
+    def collect(self):
+        """
+        收集並校驗屬於當前 manifest 的分片
+
+        同一頁出現在多個分片中（例如重跑）時，圖片雜湊必須相同
+
+        Returns:
+            tuple: (manifest dict, list 按頁序的 (頁碼, 圖片路徑, sha256))
+
+        Raises:
+            ValueError: manifest 的配置雜湊與其配置不符、分片屬於其他 manifest 或以其他配置渲染、
+                頁面內容衝突或有頁面缺失
+        """
+        manifest, manifest_digest = self.load_manifest()
+        if config_hash(manifest['config']) != manifest['config_hash']:
+            raise ValueError("manifest 的配置雜湊與其配置不一致，請重新執行 plan")
+        pages = {}
+        shard_dirs = sorted(self.shards_dir.glob('[0-9]*-[0-9]*')) if self.shards_dir.exists() else []
+        for shard_dir in shard_dirs:
+            meta_path = shard_dir / SHARD_META_FILE
+            if not meta_path.exists():
+                continue
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            if meta['manifest_sha256'] != manifest_digest:
+                raise ValueError(f"分片 {shard_dir.name} 屬於另一份分片計劃")
+            if meta['config_hash'] != manifest['config_hash']:
+                raise ValueError(f"分片 {shard_dir.name} 的配置雜湊與分片計劃不一致")
+            for entry in meta['pages']:
+                page = (entry['page'], shard_dir / entry['file'], entry['sha256'])
+                existing = pages.setdefault(entry['page'], page)
+                if existing[2] != page[2]:
+                    raise ValueError(
+                        f"第 {entry['page']} 頁在分片 {existing[1].parent.name} 和 "
+                        f"{shard_dir.name} 中內容不同")
+
+        missing = [page for page in range(1, manifest['page_count'] + 1) if page not in pages]
+        if missing:
+            raise ValueError(f"缺少 {len(missing)} 頁: {_format_pages(missing)}")
+        return manifest, [pages[page] for page in sorted(pages)]
+
+    def merge(self, output_excel_path):
+        """
+        按頁序合併所有分片為最終工作簿（寫入前逐頁校驗圖片雜湊）
+
+        Args:
+            output_excel_path (str): 輸出 Excel 檔案路徑
+
+        Returns:
+            Path: 輸出檔案路徑
+        """
+        from src.excel_generator import ExcelGenerator
+
+        manifest, pages = self.collect()
+        config = manifest['config']
+
+        def images():
+            for page, path, digest in pages:
+                image_bytes = path.read_bytes()
+                if hashlib.sha256(image_bytes).hexdigest() != digest:
+                    raise ValueError(f"第 {page} 頁圖片已損壞: {path}")
+                yield image_bytes
+
+        output_path = ExcelGenerator(profile=config['encoding_profile']).save_encoded_excel(
+            images(), output_excel_path, _load_stats(manifest['stats']), title=config['title'])
+        logger.info(f"✓ 已合併 {len(pages)} 頁: {output_path}")
+        return output_path
+
+
+def _format_pages(pages):
+    """[1, 2, 3, 7] -> '1-3, 7'"""
+    ranges = []
+    for page in pages:
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    return ', '.join(f"{a}-{b}" if a != b else f"{a}" for a, b in ranges)
+
+
+def main():
+    from config.settings import SHARD_DIR
+
+    parser = argparse.ArgumentParser(description='DrawFlow 分片渲染')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    plan = sub.add_parser('plan', help='處理輸入並寫入 manifest')
+    plan.add_argument('input', help='輸入 Excel 檔案')
+    plan.add_argument('--title', default="里程碑時間線", help='報告標題')
+    plan.add_argument('--per-page', type=int, default=50, help='每頁里程碑數')
+    plan.add_argument('--encoding-profile', default=None, help="圖片編碼配置（fast、small、print）")
+    plan.add_argument('--render-engine', default=None, help="渲染引擎（matplotlib、pil）")
+    plan.add_argument('--dataframe-engine', default=None, help="數據處理引擎（pandas、polars）")
+    plan.add_argument('--out-of-core', action='store_true', help='外存模式')
+    plan.add_argument('--memory-budget-mb', type=int, default=None, help='外存模式內存預算（MB）')
+    plan.add_argument('--shards', type=int, default=None, help='列出按此數量平均分配的頁面範圍')
+
+    render = sub.add_parser('render', help='渲染一個頁面範圍')
+    target = render.add_mutually_exclusive_group(required=True)
+    target.add_argument('--pages', help="頁面範圍，如 '1-10'（從 1 開始，含兩端）")
+    target.add_argument('--shard', help="第 i 個分片（共 n 個），如 '2/4'")
+
+    merge = sub.add_parser('merge', help='校驗並合併分片為工作簿')
+    merge.add_argument('-o', '--output', required=True, help='輸出 Excel 檔案')
+
+    for command in (plan, render, merge):
+        command.add_argument('--dir', default=str(SHARD_DIR), help='共享目錄')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    report = ShardedReport(args.dir)
+    if args.command == 'plan':
+        manifest = report.plan(
+            args.input, title=args.title, milestones_per_page=args.per_page,
+            encoding_profile=args.encoding_profile, render_engine=args.render_engine,
+            out_of_core=args.out_of_core, memory_budget_mb=args.memory_budget_mb,
+            dataframe_engine=args.dataframe_engine)
+        if args.shards:
+            for idx, (first, last) in enumerate(shard_ranges(manifest['page_count'], args.shards), 1):
+                print(f"分片 {idx}/{args.shards}: --pages {first}-{last}")
+    elif args.command == 'render':
+        if args.shard:
+            index, _, count = args.shard.partition('/')
+            index, count = int(index), int(count)
+            if not 1 <= index <= count:
+                parser.error(f"無效的分片編號: {args.shard}")
+            manifest, _ = report.load_manifest()
+            ranges = shard_ranges(manifest['page_count'], count)
+            if index > len(ranges):
+                logger.info(f"分片 {args.shard} 沒有頁面")
+                return
+            first, last = ranges[index - 1]
+        else:
+            first, last = parse_page_range(args.pages)
+        report.render(first, last)
+    else:
+        report.merge(args.output)
+
+
+if __name__ == '__main__':
+    main()
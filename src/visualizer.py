@@ -62,20 +62,39 @@ def setup_chinese_fonts():
 
 setup_chinese_fonts()
 
+# 可用的渲染引擎
+RENDER_ENGINES = ('matplotlib', 'pil')
+
 
 class TimelineVisualizer:
     """時間線可視化生成器"""
 
-    def __init__(self, config=None):
+    def __init__(self, config=None, engine=None, dpi=None):
         """
         初始化可視化器
 
         Args:
             config (dict): 配置參數字典，包含排版和色彩設定
+            engine (str): 渲染引擎，'matplotlib' 或 'pil'，預設取 config.settings.RENDER_ENGINE
+            dpi (int): 輸出解析度（pil 引擎的畫布和總覽頁的分箱數），預設取默認編碼配置的 dpi
         """
+        from config.settings import RENDER_ENGINE, ENCODING_PROFILES, DEFAULT_ENCODING_PROFILE
+
         self.config = config or self._default_config()
         self._setup_colors()
 
+        self.engine = engine or RENDER_ENGINE
+        if self.engine not in RENDER_ENGINES:
+            raise ValueError(f"未知的渲染引擎: {self.engine}")
+
+        self.dpi = dpi or ENCODING_PROFILES[DEFAULT_ENCODING_PROFILE]['dpi']
+
+        self._raster = None
+        if self.engine == 'pil':
+            from src.raster_engine import PILTimelineRenderer
+            self._raster = PILTimelineRenderer(
+                self.config, self.cmap, dpi=self.dpi)
+
     def _default_config(self):
         """取得預設配置"""
         from config.settings import (
@@ -129,8 +148,11 @@ class TimelineVisualizer:
             title (str): 圖表標題
 
         Returns:
-            matplotlib.figure.Figure: 圖表物件
+            matplotlib.figure.Figure: 圖表物件（pil 引擎返回 PIL.Image.Image 頁面圖片）
         """
+        if self._raster is not None:
+            return self._raster.render_page(page_df, stats, page_num, total_pages, title)
+
         cfg = self.config
         fig = plt.figure(
             figsize=(cfg['page_width'], cfg['page_height']), dpi=100)
@@ -149,8 +171,8 @@ class TimelineVisualizer:
         timeline_height = content_height - title_height - stat_height - 0.3
 
         # 標題
-        ax_title = fig.add_axes(
-            [margin, cfg['page_height'] - margin - title_height, content_width, title_height])
+        ax_title = self._add_axes_inches(
+            fig, [margin, cfg['page_height'] - margin - title_height, content_width, title_height])
         ax_title.axis('off')
         ax_title.text(0.5, 0.5, title, fontsize=cfg['title_font'], weight='bold',
                       ha='center', va='center', color=cfg['text_color'],
@@ -167,7 +189,8 @@ class TimelineVisualizer:
                             content_width, timeline_height, page_df)
 
         # 頁碼
-        ax_footer = fig.add_axes([margin, margin - 0.3, content_width, 0.2])
+        ax_footer = self._add_axes_inches(
+            fig, [margin, margin - 0.3, content_width, 0.2])
         ax_footer.axis('off')
         page_text = f"第 {page_num} 頁，共 {total_pages} 頁"
         ax_footer.text(0.5, 0.5, page_text, fontsize=cfg['label_font'],
@@ -176,6 +199,22 @@ class TimelineVisualizer:
 
         return fig
 
+    def _add_axes_inches(self, fig, rect):
+        """
+        以英寸為單位新增座標軸（add_axes 需要的是相對於頁面的比例）
+
+        Args:
+            fig (matplotlib.figure.Figure): 圖表物件
+            rect (list): [x, y, width, height]（英寸）
+
+        Returns:
+            matplotlib.axes.Axes: 座標軸物件
+        """
+        page_width, page_height = fig.get_size_inches()
+        x, y, width, height = rect
+        return fig.add_axes([x / page_width, y / page_height,
+                             width / page_width, height / page_height])
+
     def _draw_stat_panel(self, fig, x, y, width, height, stats, page_df):
         """
         繪製統計面板（文字 + 月度分佈圖）
@@ -190,7 +229,7 @@ class TimelineVisualizer:
         cfg = self.config
 
         # 統計面板背景
-        ax_stat = fig.add_axes([x, y, width, height])
+        ax_stat = self._add_axes_inches(fig, [x, y, width, height])
         ax_stat.axis('off')
 
         # 繪製背景和邊框
@@ -240,7 +279,7 @@ class TimelineVisualizer:
             height (float): 高度 (英寸)
             monthly_data (list): 月度數據列表
         """
-        ax_monthly = fig.add_axes([x, y, width, height])
+        ax_monthly = self._add_axes_inches(fig, [x, y, width, height])
 
         months = [item['period'][-2:] for item in monthly_data]  # 取月份
         counts = [item['count'] for item in monthly_data]
@@ -270,7 +309,7 @@ class TimelineVisualizer:
             page_df(pd.DataFrame): 里程碑數據
         """
         cfg = self.config
-        ax_timeline = fig.add_axes([x, y, width, height])
+        ax_timeline = self._add_axes_inches(fig, [x, y, width, height])
         ax_timeline.set_xlim(-0.05, 1.05)
         ax_timeline.set_ylim(-0.5, len(page_df) + 0.5)
 
@@ -328,6 +367,130 @@ class TimelineVisualizer:
 
         logger.info(f"時間線繪製完成，共 {len(page_df)} 個里程碑")
 
+    def create_overview_figure(self, dates_ns, stats, title="里程碑時間線", weights=None,
+                               event_lookup=None, top_n=None):
+        """
+        創建總覽頁：全部日期範圍的密度火花線 + 熱度條，只標註最顯著的聚集區間
+
+        分箱數自適應繪圖區域的像素寬度，數據成本為 O(n)，繪圖成本為 O(像素)，與里程碑數量無關
+
+        Args:
+            dates_ns (array-like): 已排序的 int64 納秒日期（可為記憶體映射陣列）
+            stats (dict): 統計信息字典
+            title (str): 圖表標題
+            weights (array-like): 每行的事件數（合併前），None 表示每行計 1
+            event_lookup (callable): 按行號取得事件文字的函數，用於標註聚集區間的代表事件
+            top_n (int): 標註的聚集區間數，預設取 config.settings.OVERVIEW_TOP_CLUSTERS
+
+        Returns:
+            matplotlib.figure.Figure: 圖表物件
+        """
+        from config.settings import OVERVIEW_TOP_CLUSTERS
+        from src.overview import density_bins, top_clusters
+
+        cfg = self.config
+        fig = plt.figure(
+            figsize=(cfg['page_width'], cfg['page_height']), dpi=100)
+        fig.patch.set_facecolor('white')
+
+        margin = cfg['margin']
+        content_width = cfg['page_width'] - 2 * margin
+        title_height = 0.5
+        stat_height = 1.5
+        spark_height = 2.5
+        strip_height = 0.4
+
+        # 標題
+        ax_title = self._add_axes_inches(
+            fig, [margin, cfg['page_height'] - margin - title_height, content_width, title_height])
+        ax_title.axis('off')
+        ax_title.text(0.5, 0.5, f"{title} - 總覽", fontsize=cfg['title_font'], weight='bold',
+                      ha='center', va='center', color=cfg['text_color'],
+                      transform=ax_title.transAxes, family='sans-serif')
+
+        # 統計面板 + 月度圖表
+        stat_top = cfg['page_height'] - margin - title_height - stat_height
+        self._draw_stat_panel(fig, margin, stat_top,
+                              content_width, stat_height, stats, None)
+
+        # 密度分箱（每個像素列至多一箱）
+        start_ns = stats['start_date'].value
+        end_ns = stats['end_date'].value
+        counts, edges = density_bins(
+            dates_ns, int(content_width * self.dpi), start_ns, end_ns, weights=weights)
+        clusters = top_clusters(
+            counts, edges, top_n or OVERVIEW_TOP_CLUSTERS)
+        n_bins = len(counts)
+        x = np.arange(n_bins)
+
+        # 火花線
+        spark_bottom = stat_top - 0.6 - spark_height
+        ax_spark = self._add_axes_inches(
+            fig, [margin, spark_bottom, content_width, spark_height])
+        ax_spark.fill_between(x, counts, step='mid',
+                              color=cfg['color_gradient'][0], alpha=0.35, linewidth=0)
+        ax_spark.step(x, counts, where='mid',
+                      color=cfg['timeline_axis_color'], linewidth=0.6)
+        ax_spark.set_xlim(-0.5, n_bins - 0.5)
+        ax_spark.set_ylim(0, max(1, counts.max()) * 1.6)
+        ax_spark.set_xticks([])
+        ax_spark.set_ylabel('事件數', fontsize=10,
+                            family='sans-serif', weight='bold')
+        ax_spark.tick_params(labelsize=9)
+        ax_spark.spines['top'].set_visible(False)
+        ax_spark.spines['right'].set_visible(False)
+
+        # 標註聚集區間
+        cluster_lines = []
+        for rank, cluster in enumerate(clusters):
+            start = np.datetime64(cluster['start_ns'], 'ns').astype('datetime64[D]')
+            end = np.datetime64(cluster['end_ns'] - 1, 'ns').astype('datetime64[D]')
+            period = str(start) if start == end else f"{start} ~ {end}"
+            label = f"{start}\n{cluster['count']} 個"
+            if event_lookup is not None:
+                first_idx = int(np.searchsorted(dates_ns, cluster['start_ns']))
+                event = event_lookup(first_idx)
+                label += f"\n{event[:10]}{'…' if len(event) > 10 else ''}"
+            cluster_lines.append(f"{period}: {cluster['count']} 個")
+
+            ax_spark.annotate(
+                label, xy=(cluster['bin'], cluster['count']),
+                xytext=(0, 10 + (rank % 3) * 26), textcoords='offset points',
+                ha='center', va='bottom', fontsize=8, color=cfg['text_color'],
+                family='sans-serif',
+                arrowprops={'arrowstyle': '-', 'color': 'gray', 'linewidth': 0.5}
+            )
+
+        # 熱度條
+        ax_strip = self._add_axes_inches(
+            fig, [margin, spark_bottom - 0.1 - strip_height, content_width, strip_height])
+        heat_cmap = self.cmap.copy()
+        heat_cmap.set_bad('white')
+        ax_strip.imshow(np.ma.masked_equal(counts, 0)[np.newaxis, :], aspect='auto',
+                        cmap=heat_cmap, interpolation='nearest',
+                        extent=(-0.5, n_bins - 0.5, 0, 1))
+        ax_strip.set_yticks([])
+
+        tick_bins = np.linspace(0, n_bins - 1, min(n_bins, 8)).astype(int)
+        ax_strip.set_xticks(tick_bins)
+        ax_strip.set_xticklabels(
+            [str(np.datetime64(int(edges[b]), 'ns').astype('datetime64[D]')) for b in tick_bins],
+            fontsize=9, rotation=30, family='sans-serif')
+
+        # 聚集區間列表
+        ax_list = self._add_axes_inches(
+            fig, [margin, margin, content_width, spark_bottom - strip_height - 1.2 - margin])
+        ax_list.axis('off')
+        ax_list.text(0.0, 1.0, "密度最高的區間", fontsize=cfg['stat_font'], weight='bold',
+                     va='top', color=cfg['stat_text_color'], transform=ax_list.transAxes,
+                     family='sans-serif')
+        ax_list.text(0.0, 0.88, '\n'.join(cluster_lines), fontsize=cfg['label_font'],
+                     va='top', color=cfg['text_color'], transform=ax_list.transAxes,
+                     family='sans-serif', linespacing=1.6)
+
+        logger.info(f"總覽頁繪製完成，{n_bins} 個分箱，標註 {len(clusters)} 個聚集區間")
+        return fig
+
     def generate_pdf(self, pages_data, stats, title="里程碑時間線", output_path=None):
         """
         生成多頁 PDF
@@ -341,14 +504,25 @@ class TimelineVisualizer:
         Returns:
             list: 生成的圖表列表
         """
-        figures = []
+        return list(self.iter_figures(pages_data, stats, title))
+
+    def iter_figures(self, pages_data, stats, title="里程碑時間線"):
+        """
+        逐頁生成圖表（惰性），配合 ExcelGenerator 可邊生成邊寫入，避免同時持有所有頁面
+
+        Args:
+            pages_data(sequence): 分頁數據序列，需支援 len() 和迭代
+            stats(dict): 統計信息字典
+            title(str): 圖表標題
+
+        Yields:
+            matplotlib.figure.Figure: 單頁圖表（pil 引擎為 PIL.Image.Image）
+        """
         total_pages = len(pages_data)
 
         for page_num, page_df in enumerate(pages_data, 1):
             fig = self.create_timeline_figure(
                 page_df, stats, page_num, total_pages, title
             )
-            figures.append(fig)
             logger.info(f"生成第 {page_num}/{total_pages} 頁")
-
-        return figures
+            yield fig
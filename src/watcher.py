@@ -0,0 +1,296 @@
+"""
+監視模塊：輸入工作簿變更時自動重新生成報告
+
+Linux 上使用 inotify（經由 ctypes 調用 libc，無額外依賴），其他平台退回定時輪詢。
+連續寫入經過防抖合併，以內容雜湊判斷是否真正變更，只在後台進程池中重新生成受影響的報告。
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import os
+from pathlib import Path
+import select
+import struct
+import threading
+import time
+
+from src.input_cache import content_hash
+from src.resource_governor import ResourceGovernor
+
+logger = logging.getLogger(__name__)
+
+# inotify 事件（見 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+INOTIFY_EVENT = struct.Struct('iIII')
+
+# 生成的報告檔名（見 InputWatcher.output_path_for 和拆分輸出的 <檔名>_partNN.xlsx）
+OUTPUT_PATTERNS = ('*_report.xlsx', '*_report_part[0-9]*.xlsx')
+
+
+def _regenerate(input_path, output_path, options):
+    """在工作進程中重新生成一份報告"""
+    import main
+
+    return str(main.main(input_path, output_path, **options))
+
+
+class InotifyBackend:
+    """以 inotify 監視目錄"""
+
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory (Path): 監視目錄
+
+        Raises:
+            OSError: 平台不支援 inotify 或初始化失敗
+        """
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            init, add_watch = libc.inotify_init1, libc.inotify_add_watch
+        except (OSError, AttributeError) as e:
+            raise OSError(f"inotify 不可用: {e}") from None
+
+        self.fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失敗")
+        if add_watch(self.fd, os.fsencode(directory), self.MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch 失敗: {directory}")
+
+    def wait(self, timeout):
+        """
+        等待事件
+
+        Args:
+            timeout (float): 最長等待秒數
+
+        Returns:
+            set: 有變化的檔名
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        names = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingBackend:
+    """定時比較目錄內檔案的大小和修改時間"""
+
+    def __init__(self, directory, interval=1.0):
+        """
+        Args:
+            directory (Path): 監視目錄
+            interval (float): 輪詢間隔（秒）
+        """
+        self.directory = directory
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                stat = entry.stat()
+                snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = {name for name, sig in snapshot.items()
+                   if self._snapshot.get(name) != sig}
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+class InputWatcher:
+    """監視輸入目錄並在工作簿變更時重新生成報告"""
+
+    def __init__(self, input_dir, output_dir, debounce=None, max_workers=None,
+                 poll_interval=None, use_polling=False, patterns=('*.xlsx', '*.xls'),
+                 **options):
+        """
+        初始化監視器
+
+        Args:
+            input_dir (str): 輸入目錄
+            output_dir (str): 輸出目錄，報告名為 <輸入檔名>_report.xlsx
+            debounce (float): 防抖時間（秒），最後一次寫入後靜止這麼久才重新生成，
+                預設取 config.settings.WATCH_DEBOUNCE_SECONDS
+            max_workers (int): 後台工作進程數，預設取 config.settings.WATCH_MAX_WORKERS；
+                受資源調控器的內存/CPU 預算約束
+            poll_interval (float): 輪詢間隔（秒），預設取 config.settings.WATCH_POLL_INTERVAL
+            use_polling (bool): 強制使用輪詢
+            patterns (tuple): 監視的檔名模式
+            **options: 傳給 main() 的參數，例如 title、encoding_profile
+        """
+        from config.settings import (
+            WATCH_DEBOUNCE_SECONDS, WATCH_MAX_WORKERS, WATCH_POLL_INTERVAL)
+
+        self.input_dir = Path(input_dir)
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.debounce = WATCH_DEBOUNCE_SECONDS if debounce is None else debounce
+        self.max_workers = ResourceGovernor().worker_limit(
+            requested=max_workers or WATCH_MAX_WORKERS)
+        self.poll_interval = poll_interval or WATCH_POLL_INTERVAL
+        self.use_polling = use_polling
+        self.patterns = patterns
+        self.options = options
+        self._output_in_input_dir = self.output_dir.resolve() == self.input_dir.resolve()
+
+        self._pending = {}  # 檔名 -> 最後一次事件時間
+        self._running = {}  # 檔名 -> Future
+        self._dirty = set()  # 生成期間再次變更的檔名
+        self._fingerprints = {}  # 檔名 -> 已生成報告對應的內容雜湊
+        self._stop = threading.Event()
+
+    def output_path_for(self, name):
+        """輸入檔名對應的報告路徑"""
+        return self.output_dir / f"{Path(name).stem}_report.xlsx"
+
+    def _matches(self, name):
+        # 忽略 Excel 鎖檔（~$xxx.xlsx）和隱藏/臨時檔案
+        if name.startswith(('~$', '.')):
+            return False
+        # 報告寫入監視目錄時，忽略生成的報告（及拆分輸出的部分），否則每份報告會觸發新的生成
+        if self._output_in_input_dir and any(
+                fnmatch.fnmatch(name, pattern) for pattern in OUTPUT_PATTERNS):
+            return False
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns)
+
+    def _create_backend(self):
+        if not self.use_polling:
+            try:
+                backend = InotifyBackend(self.input_dir)
+                logger.info(f"使用 inotify 監視: {self.input_dir}")
+                return backend
+            except OSError as e:
+                logger.info(f"{e}，改用輪詢")
+        logger.info(f"輪詢監視（每 {self.poll_interval}s）: {self.input_dir}")
+        return PollingBackend(self.input_dir, self.poll_interval)
+
+    def _initial_scan(self):
+        """啟動時為沒有報告或報告比輸入舊的檔案排程生成"""
+        now = time.monotonic()
+        for path in sorted(self.input_dir.iterdir()):
+            if not path.is_file() or not self._matches(path.name):
+                continue
+            output_path = self.output_path_for(path.name)
+            if output_path.exists() and output_path.stat().st_mtime >= path.stat().st_mtime:
+                self._fingerprints[path.name] = content_hash(path)
+            else:
+                self._pending[path.name] = now - self.debounce
+
+    def _schedule_ready(self, executor):
+        """提交已靜止超過防抖時間、且內容確實變化的檔案"""
+        now = time.monotonic()
+        for name, last_event in list(self._pending.items()):
+            if now - last_event < self.debounce:
+                continue
+            del self._pending[name]
+
+            path = self.input_dir / name
+            if not path.exists():
+                continue
+            if name in self._running:
+                self._dirty.add(name)
+                continue
+
+            try:
+                fingerprint = content_hash(path)
+            except OSError as e:
+                logger.warning(f"無法讀取 {name}: {e}")
+                continue
+            if self._fingerprints.get(name) == fingerprint:
+                logger.info(f"{name} 內容未變化，略過")
+                continue
+
+            self._fingerprints[name] = fingerprint
+            output_path = self.output_path_for(name)
+            logger.info(f"{name} 已變更，重新生成 {output_path.name}")
+            self._running[name] = executor.submit(
+                _regenerate, str(path), str(output_path), self.options)
+
+    def _collect_finished(self):
+        """處理已完成的生成任務；生成期間再次變更的檔案重新排程"""
+        for name, future in list(self._running.items()):
+            if not future.done():
+                continue
+            del self._running[name]
+            try:
+                logger.info(f"✓ 報告已更新: {future.result()}")
+            except Exception as e:
+                # 下一次變更（即使內容相同）會重試
+                self._fingerprints.pop(name, None)
+                logger.error(f"✗ {name} 生成失敗: {e}")
+            if name in self._dirty:
+                self._dirty.discard(name)
+                self._pending[name] = time.monotonic() - self.debounce
+
+    def _next_timeout(self):
+        if self._running:
+            return min(0.2, self.poll_interval)
+        if not self._pending:
+            return self.poll_interval
+        now = time.monotonic()
+        return max(0.0, min(last + self.debounce for last in self._pending.values()) - now)
+
+    def _step(self, backend, executor, timeout):
+        """等待一輪事件，排程靜止的變更並收集已完成的任務"""
+        changed = backend.wait(timeout)
+        now = time.monotonic()
+        for name in changed:
+            if self._matches(name):
+                self._pending[name] = now
+        self._schedule_ready(executor)
+        self._collect_finished()
+
+    def run(self):
+        """監視直到 stop() 被調用或 KeyboardInterrupt"""
+        backend = self._create_backend()
+        self._initial_scan()
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                while not self._stop.is_set():
+                    self._step(backend, executor, self._next_timeout())
+                for future in self._running.values():
+                    future.cancel()
+        except KeyboardInterrupt:
+            logger.info("停止監視")
+        finally:
+            backend.close()
+
+    def stop(self):
+        """停止監視（可從其他線程調用）"""
+        self._stop.set()
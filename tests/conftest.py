@@ -0,0 +1,30 @@
+"""
+共用的測試夾具
+"""
+
+import pandas as pd
+import pytest
+
+
+def write_milestones(path, rows=120, days=400, seed=0):
+    """寫入包含日期和事件兩列的輸入 Excel（含同日期事件）"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2026-01-01') + pd.to_timedelta(rng.integers(0, days, rows), unit='D')
+    pd.DataFrame({
+        '日期': dates.strftime('%Y-%m-%d'),
+        '事件': [f"里程碑 {i}" for i in range(rows)],
+    }).to_excel(path, index=False)
+    return path
+
+
+@pytest.fixture
+def milestones_xlsx(tmp_path):
+    return write_milestones(tmp_path / 'milestones.xlsx')
+
+
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    """main 在導入時於當前目錄建立日誌檔案，測試在臨時目錄中執行"""
+    monkeypatch.chdir(tmp_path)
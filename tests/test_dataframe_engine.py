@@ -0,0 +1,67 @@
+"""
+數據框引擎一致性測試：polars 引擎的合併結果、統計字典和分頁邊界須與 pandas 引擎完全相同
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_processor import DataProcessor
+
+pytest.importorskip('polars')
+
+
+def make_data(rows, days, duplicate_ratio=0.05, seed=0):
+    """生成隨機里程碑數據（含重複行，日期未排序）"""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2020-01-01') + \
+        pd.to_timedelta(rng.integers(0, days, rows), unit='D')
+    events = pd.array([f"事件 {i % (rows // 3 + 1)}" for i in range(rows)], dtype='str')
+    df = pd.DataFrame({'date': dates.astype('datetime64[us]'), 'event': events})
+
+    n_dup = int(rows * duplicate_ratio)
+    if n_dup:
+        df = pd.concat([df, df.sample(n_dup, random_state=seed)], ignore_index=True)
+    return df
+
+
+BASE = pd.DataFrame({
+    'date': pd.to_datetime(['2026-03-01', '2026-01-15', '2026-03-01', '2026-03-01', '2026-02-28']),
+    'event': pd.array(['評審', '啟動', '確認', '評審', '交付'], dtype='str'),
+})
+
+CASES = {
+    '同日期合併與去重': lambda: BASE,
+    '單行': lambda: BASE.iloc[:1],
+    '全部重複': lambda: pd.concat([BASE.iloc[:1]] * 5, ignore_index=True),
+    '事件含分隔符': lambda: BASE.assign(
+        event=pd.array(['評審, 會議', '啟動', '確認, 簽核', '評審, 會議', '交付'], dtype='str')),
+    **{f'隨機 seed={seed}': (lambda seed=seed: make_data(5000, 400, duplicate_ratio=0.2, seed=seed))
+       for seed in range(5)},
+}
+
+
+def page_bounds(pages):
+    """每頁的 (首個日期, 最後日期, 行數)"""
+    return [(page['date'].iloc[0], page['date'].iloc[-1], len(page)) for page in pages]
+
+
+@pytest.mark.parametrize('per_page', [2, 50])
+@pytest.mark.parametrize('case', list(CASES))
+def test_polars_matches_pandas(case, per_page):
+    df = CASES[case]()
+    merged_pd, stats_pd, pages_pd = DataProcessor(
+        milestones_per_page=per_page, engine='pandas').process_all(df)
+    merged_pl, stats_pl, pages_pl = DataProcessor(
+        milestones_per_page=per_page, engine='polars').process_all(df)
+
+    pd.testing.assert_frame_equal(merged_pl, merged_pd)
+    assert stats_pl == stats_pd
+    assert page_bounds(pages_pl) == page_bounds(pages_pd)
+
+
+def test_merge_counts_events_per_date():
+    for engine in ('pandas', 'polars'):
+        merged = DataProcessor(engine=engine).process_all(CASES['事件含分隔符']())[0]
+        assert merged['count'].tolist() == [1, 1, 2]
+        assert merged['event'].iat[2] == '評審, 會議, 確認, 簽核'
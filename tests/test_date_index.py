@@ -0,0 +1,77 @@
+"""
+日期索引測試：多個進程同時建立同一個索引
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import pandas as pd
+import pytest
+
+from src.date_index import DateIndex
+
+ROWS = 50_000
+
+
+def merged_frame(rows=ROWS):
+    return pd.DataFrame({
+        'date': pd.date_range('2000-01-01', periods=rows, freq='D'),
+        'event': [f"事件 {i}" for i in range(rows)],
+        'count': 1,
+    })
+
+
+def build_index(root, input_path):
+    store = DateIndex(root).build_from_frame(merged_frame(), input_path)
+    return len(store), int(store.counts.sum()), store.event(ROWS - 1)
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    path = tmp_path / 'input.xlsx'
+    path.write_bytes(b'placeholder')
+    return path
+
+
+def test_concurrent_builds_publish_one_index(tmp_path, input_file):
+    root = tmp_path / 'index'
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(build_index, [root] * 8, [str(input_file)] * 8))
+
+    assert results == [(ROWS, ROWS, f"事件 {ROWS - 1}")] * 8
+    assert os.listdir(root) == [DateIndex(root).path_for(input_file).name]
+    assert len(DateIndex(root).open(input_file)) == ROWS
+
+
+def test_valid_index_is_not_replaced(tmp_path, input_file):
+    index = DateIndex(tmp_path / 'index')
+    reader = index.build_from_frame(merged_frame(), input_file)
+    inode = os.stat(index.path_for(input_file)).st_ino
+
+    store = index.build_from_frame(merged_frame(10), input_file)
+
+    assert len(store) == ROWS
+    assert os.stat(index.path_for(input_file)).st_ino == inode
+    assert reader.event(0) == "事件 0"
+
+
+def test_stale_index_is_rebuilt(tmp_path, input_file):
+    index = DateIndex(tmp_path / 'index')
+    index.build_from_frame(merged_frame(10), input_file)
+    input_file.write_bytes(b'changed contents')
+
+    assert index.open(input_file) is None
+    assert len(index.build_from_frame(merged_frame(), input_file)) == ROWS
+    assert os.listdir(index.root) == [index.path_for(input_file).name]
+
+
+def test_failed_build_leaves_no_temp_dir(tmp_path, input_file):
+    index = DateIndex(tmp_path / 'index')
+
+    def write(tmp_dir, meta):
+        tmp_dir.mkdir(parents=True)
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        index._build(input_file, write)
+    assert not index.root.exists() or os.listdir(index.root) == []
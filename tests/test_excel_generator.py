@@ -0,0 +1,60 @@
+"""
+Excel 生成測試：內容相同的圖片只寫入一個 xl/media 部件
+
+_DedupExcelWriter 覆寫了 openpyxl ExcelWriter 的私有方法，升級 openpyxl 後此測試應先確認仍然通過
+"""
+
+import io
+import re
+import zipfile
+
+import openpyxl
+import pandas as pd
+from PIL import Image
+
+from src.data_processor import DataProcessor
+from src.excel_generator import ExcelGenerator
+
+
+def png_bytes(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 32), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def stats():
+    df = pd.DataFrame({'date': pd.to_datetime(['2026-01-01', '2026-02-01']), 'event': ['a', 'b']})
+    return DataProcessor().calculate_statistics(df)
+
+
+def test_duplicate_images_share_one_media_part(tmp_path):
+    image = png_bytes('red')
+    output = ExcelGenerator(profile='fast').save_encoded_excel(
+        [image, image], tmp_path / 'dedup.xlsx', stats(), title='去重')
+
+    with zipfile.ZipFile(output) as archive:
+        assert archive.testzip() is None
+        media = [name for name in archive.namelist() if name.startswith('xl/media/')]
+        assert len(media) == 1
+        assert archive.read(media[0]) == image
+        with Image.open(io.BytesIO(archive.read(media[0]))) as opened:
+            opened.verify()
+
+        # 兩個圖片錨點都引用同一個媒體部件
+        rels = ''.join(archive.read(name).decode('utf-8') for name in archive.namelist()
+                       if name.startswith('xl/drawings/_rels/'))
+        targets = re.findall(r'Target="([^"]*media/[^"]+)"', rels)
+        assert len(targets) == 2 and len(set(targets)) == 1
+
+    sheet = openpyxl.load_workbook(output)['時間線']
+    assert len(sheet._images) == 2
+
+
+def test_distinct_images_are_all_written(tmp_path):
+    images = [png_bytes('red'), png_bytes('blue'), png_bytes('red')]
+    output = ExcelGenerator(profile='fast').save_encoded_excel(
+        images, tmp_path / 'distinct.xlsx', stats(), title='去重')
+
+    with zipfile.ZipFile(output) as archive:
+        media = sorted(name for name in archive.namelist() if name.startswith('xl/media/'))
+        assert sorted(archive.read(name) for name in media) == sorted(set(images))
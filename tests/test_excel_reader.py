@@ -0,0 +1,29 @@
+"""
+Excel 讀取測試：按項目分組列拆分時不丟棄分組為空白的行
+"""
+
+import logging
+
+import pandas as pd
+
+from src.excel_reader import UNGROUPED_PROJECT, ExcelReader
+
+
+def test_blank_project_rows_go_to_named_bucket(tmp_path, caplog):
+    path = tmp_path / 'pmo_flat.xlsx'
+    pd.DataFrame({
+        '日期': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03',
+                              '2024-01-04', '2024-01-05', '2024-01-06']),
+        '事件': ['A1', 'B1', '無項目1', 'A2', '無項目2', 'B2'],
+        '項目': ['A', 'B', None, 'A', '  ', 'B'],
+    }).to_excel(path, index=False)
+
+    with caplog.at_level(logging.WARNING, logger='src.excel_reader'):
+        projects = dict(ExcelReader(path).iter_projects(group_col=2))
+
+    assert list(projects) == ['A', 'B', UNGROUPED_PROJECT]
+    assert projects['A']['event'].tolist() == ['A1', 'A2']
+    assert projects['B']['event'].tolist() == ['B1', 'B2']
+    assert projects[UNGROUPED_PROJECT]['event'].tolist() == ['無項目1', '無項目2']
+    assert sum(len(df) for df in projects.values()) == 6
+    assert '2 行項目分組為空' in caplog.text
@@ -0,0 +1,77 @@
+"""
+輸入快取測試：元數據鍵命中、按內容找回、並發寫入和讀取時被淘汰
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import pandas as pd
+import pytest
+
+from src import input_cache
+from src.input_cache import InputCache
+
+OPTIONS = {'sheet_name': 0, 'date_col': 0, 'event_col': 1}
+
+
+def frame(rows=1000):
+    return pd.DataFrame({
+        'date': pd.date_range('2020-01-01', periods=rows, freq='D'),
+        'event': [f"事件 {i}" for i in range(rows)],
+    })
+
+
+def store_entry(root, input_path):
+    cache = InputCache(root)
+    cache.store(frame(), input_path, OPTIONS)
+    return len(cache.load(input_path, OPTIONS))
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    path = tmp_path / 'input.xlsx'
+    path.write_bytes(b'contents')
+    return path
+
+
+def test_hit_does_not_hash_contents(tmp_path, input_file, monkeypatch):
+    InputCache(tmp_path / 'cache').store(frame(), input_file, OPTIONS)
+
+    def fail(path):
+        raise AssertionError('命中時不應讀取檔案內容')
+
+    monkeypatch.setattr(input_cache, 'content_hash', fail)
+    df = InputCache(tmp_path / 'cache').load(input_file, OPTIONS)
+    pd.testing.assert_frame_equal(df, frame())
+
+
+def test_touched_file_hits_by_content(tmp_path, input_file):
+    cache = InputCache(tmp_path / 'cache')
+    cache.store(frame(), input_file, OPTIONS)
+    os.utime(input_file, ns=(1, 1))
+
+    assert InputCache(tmp_path / 'cache').load(input_file, OPTIONS) is not None
+    assert [e['key'] for e in cache.entries()] == [cache.key(input_file, OPTIONS)]
+
+    input_file.write_bytes(b'changed!')
+    assert InputCache(tmp_path / 'cache').load(input_file, OPTIONS) is None
+
+
+def test_concurrent_stores_keep_one_entry(tmp_path, input_file):
+    root = tmp_path / 'cache'
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(store_entry, [root] * 8, [str(input_file)] * 8))
+
+    assert results == [1000] * 8
+    assert os.listdir(root) == [InputCache(root).key(input_file, OPTIONS)]
+
+
+def test_evicted_entry_is_a_miss(tmp_path, input_file, monkeypatch):
+    cache = InputCache(tmp_path / 'cache')
+    cache.store(frame(), input_file, OPTIONS)
+
+    def evicted(self, start=0, end=None):
+        raise FileNotFoundError('evicted')
+
+    monkeypatch.setattr(input_cache.MilestoneStore, 'to_frame', evicted)
+    assert cache.load(input_file, OPTIONS) is None
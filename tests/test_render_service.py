@@ -0,0 +1,116 @@
+"""
+渲染服務測試：在本機回環地址上啟動服務，並發發送相同和不同的請求
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import io
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import zipfile
+
+import openpyxl
+import pytest
+
+from src.render_service import RenderServiceClient, create_server
+from tests.conftest import write_milestones
+
+OPTIONS = {'render_engine': 'pil', 'encoding_profile': 'fast', 'use_input_cache': False}
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = create_server(host='127.0.0.1', port=0, workers=1, output_dir=tmp_path / 'service')
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.service.shutdown()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+
+
+def base_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def post(server, payload, raw=None):
+    """返回 (狀態碼, 回應標頭, 回應內容)"""
+    body = raw if raw is not None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    request = urllib.request.Request(
+        f"{base_url(server)}/render", data=body,
+        headers={'Content-Type': 'application/json'}, method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_concurrent_requests_are_deduplicated(server, tmp_path):
+    input_path = str(write_milestones(tmp_path / 'input.xlsx'))
+    same = {'input_path': input_path, 'title': '相同', **OPTIONS}
+    other = {'input_path': input_path, 'title': '不同', **OPTIONS}
+
+    # 佔住唯一的工作進程，使並發請求在渲染開始前全部到達
+    server.service._executor.submit(time.sleep, 2)
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        responses = list(executor.map(lambda payload: post(server, payload),
+                                      [same] * 4 + [other] * 2))
+
+    assert [status for status, _, _ in responses] == [200] * 6
+    same_responses, other_responses = responses[:4], responses[4:]
+    assert len({headers['X-Render-Key'] for _, headers, _ in same_responses}) == 1
+    assert len({body for _, _, body in same_responses}) == 1
+    assert len({body for _, _, body in other_responses}) == 1
+    assert same_responses[0][1]['X-Render-Key'] != other_responses[0][1]['X-Render-Key']
+
+    body = same_responses[0][2]
+    assert int(same_responses[0][1]['Content-Length']) == len(body)
+    with zipfile.ZipFile(io.BytesIO(body)) as archive:
+        assert any(name.startswith('xl/media/') for name in archive.namelist())
+    workbook = openpyxl.load_workbook(io.BytesIO(body))
+    assert workbook.active['A1'].value == '相同'
+
+    stats = RenderServiceClient(base_url(server)).stats()
+    assert stats['requests'] == 6
+    assert stats['deduplicated'] == 4  # 每個請求鍵只渲染一次
+    assert stats['completed'] == 6 and stats['failed'] == 0
+    assert stats['queue_depth'] == 0 and stats['waiting_requests'] == 0
+    latency = stats['latency_ms']
+    assert 0 < latency['p50'] <= latency['p90'] <= latency['p99']
+
+
+def test_client_saves_report(server, tmp_path):
+    input_path = write_milestones(tmp_path / 'input.xlsx')
+    output = RenderServiceClient(base_url(server)).render(
+        input_path, tmp_path / 'out' / 'report.xlsx', title='客戶端', **OPTIONS)
+    assert openpyxl.load_workbook(output).active['A1'].value == '客戶端'
+
+
+def test_error_responses(server, tmp_path):
+    bad_input = tmp_path / 'bad.xlsx'
+    bad_input.write_bytes(b'not an excel file')
+
+    status, _, _ = post(server, {'input_path': str(tmp_path / 'missing.xlsx')})
+    assert status == 404
+    assert post(server, None, raw=b'{not json')[0] == 400
+    assert post(server, {'title': '缺少 input_path'})[0] == 400
+    assert post(server, {'input_path': str(bad_input), 'shell': 'rm -rf /'})[0] == 400
+
+    status, _, body = post(server, {'input_path': str(bad_input), **OPTIONS})
+    assert status == 500
+    assert json.loads(body)['error']
+
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        urllib.request.urlopen(f"{base_url(server)}/nope", timeout=10)
+    assert excinfo.value.code == 404
+
+    stats = RenderServiceClient(base_url(server)).stats()
+    assert stats['failed'] == 1 and stats['completed'] == 0
+    with pytest.raises(RuntimeError, match='404'):
+        RenderServiceClient(base_url(server)).render(tmp_path / 'missing.xlsx', tmp_path / 'x.xlsx')
@@ -0,0 +1,60 @@
+"""
+拆分輸出測試：舊的部分工作簿只在本次全部寫入成功後刪除
+"""
+
+import pytest
+
+from src import report_splitter
+from src.data_processor import DataProcessor
+from src.excel_reader import ExcelReader
+from src.report_splitter import ReportSplitter
+from tests.conftest import write_milestones
+
+
+@pytest.fixture
+def processed(tmp_path):
+    input_path = write_milestones(tmp_path / 'input.xlsx', rows=300, days=900)
+    df = ExcelReader(input_path).read_milestone_data()
+    merged_df, stats, pages = DataProcessor(milestones_per_page=50).process_all(df)
+    assert len(pages) >= 4
+    return merged_df, stats, pages
+
+
+def split(processed, output, split_size, **kwargs):
+    splitter = ReportSplitter('pages', split_size, max_workers=1, render_engine='pil',
+                              encoding_profile='fast', **kwargs)
+    return splitter.run(*processed, output)
+
+
+def part_names(directory):
+    return sorted(path.name for path in directory.glob('report_part*'))
+
+
+def test_stale_parts_removed_after_success(tmp_path, processed):
+    output = tmp_path / 'out' / 'report.xlsx'
+    (tmp_path / 'out').mkdir()
+    (tmp_path / 'out' / 'report_partial.xlsx').write_bytes(b'keep')
+
+    split(processed, output, 1)
+    pages = len(processed[2])
+    assert len(part_names(output.parent)) == pages + 1
+
+    split(processed, output, pages)
+    assert part_names(output.parent) == ['report_part01.xlsx', 'report_partial.xlsx']
+
+    split(processed, output, pages, as_sheets=True)
+    assert part_names(output.parent) == ['report_partial.xlsx']
+
+
+def test_failed_run_keeps_previous_parts(tmp_path, processed, monkeypatch):
+    output = tmp_path / 'report.xlsx'
+    split(processed, output, 1)
+    before = part_names(tmp_path)
+
+    def fail(job):
+        raise RuntimeError('worker failed')
+
+    monkeypatch.setattr(report_splitter, '_write_part', fail)
+    with pytest.raises(RuntimeError):
+        split(processed, output, 2)
+    assert part_names(tmp_path) == before
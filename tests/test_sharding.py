@@ -0,0 +1,101 @@
+"""
+分片渲染測試：多個本機進程共用一個目錄渲染分片，合併結果與不分片的報告逐頁相同
+"""
+
+import json
+import os
+from pathlib import Path
+import shutil
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+from src.sharding import ShardedReport, shard_ranges
+from tests.conftest import write_milestones
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+OPTIONS = {'render_engine': 'pil', 'encoding_profile': 'fast'}
+SHARDS = 3
+
+
+def page_images(xlsx_path):
+    """工作簿中按頁序排列的圖片位元組"""
+    with zipfile.ZipFile(xlsx_path) as archive:
+        names = [name for name in archive.namelist() if name.startswith('xl/media/')]
+        names.sort(key=lambda name: int(''.join(filter(str.isdigit, name))))
+        return [archive.read(name) for name in names]
+
+
+def run_shard_workers(directory, shards):
+    """以獨立進程渲染各分片"""
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    workers = [
+        subprocess.Popen(
+            [sys.executable, '-m', 'src.sharding', 'render', '--dir', str(directory),
+             '--shard', f"{idx}/{shards}"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        for idx in range(1, shards + 1)
+    ]
+    for worker in workers:
+        _, stderr = worker.communicate(timeout=300)
+        assert worker.returncode == 0, stderr.decode('utf-8', 'replace')
+
+
+@pytest.fixture
+def planned(tmp_path):
+    input_path = write_milestones(tmp_path / 'input.xlsx', rows=400, days=1000)
+    report = ShardedReport(tmp_path / 'shared')
+    manifest = report.plan(input_path, title='分片', **OPTIONS)
+    assert manifest['page_count'] >= SHARDS
+    return input_path, report, manifest
+
+
+def test_parallel_shards_merge_to_unsharded_report(tmp_path, planned):
+    import main
+
+    input_path, report, manifest = planned
+    run_shard_workers(report.directory, SHARDS)
+    assert len(list(report.shards_dir.iterdir())) == SHARDS
+
+    merged = report.merge(tmp_path / 'merged.xlsx')
+    direct = main.main(str(input_path), str(tmp_path / 'direct.xlsx'), title='分片',
+                       use_input_cache=False, **OPTIONS)
+
+    merged_pages = page_images(merged)
+    assert len(merged_pages) == manifest['page_count']
+    assert merged_pages == page_images(direct)
+
+
+def test_merge_rejects_missing_shard(tmp_path, planned):
+    _, report, manifest = planned
+    ranges = shard_ranges(manifest['page_count'], SHARDS)
+    for first, last in ranges[:-1]:
+        report.render(first, last)
+
+    first, last = ranges[-1]
+    with pytest.raises(ValueError, match=f"缺少 {last - first + 1} 頁"):
+        report.merge(tmp_path / 'merged.xlsx')
+
+
+def test_merge_rejects_config_hash_mismatch(tmp_path, planned):
+    _, report, manifest = planned
+    report.render(1, manifest['page_count'])
+
+    tampered = dict(manifest, config_hash='0' * 64)
+    report.manifest_path.write_text(json.dumps(tampered), encoding='utf-8')
+    with pytest.raises(ValueError, match='配置雜湊'):
+        report.merge(tmp_path / 'merged.xlsx')
+
+
+def test_merge_rejects_shard_from_other_plan(tmp_path, planned):
+    input_path, report, manifest = planned
+    report.render(1, manifest['page_count'])
+    old_shards = tmp_path / 'old_shards'
+    shutil.copytree(report.shards_dir, old_shards)
+
+    report.plan(input_path, title='另一份', **OPTIONS)
+    shutil.copytree(old_shards, report.shards_dir)
+    with pytest.raises(ValueError, match='另一份分片計劃'):
+        report.merge(tmp_path / 'merged.xlsx')
@@ -0,0 +1,115 @@
+"""
+監視模式測試：檔名過濾（含輸出目錄即監視目錄的情況）和防抖排程
+"""
+
+from concurrent.futures import Future
+import time
+
+import pytest
+
+from src.watcher import InputWatcher, PollingBackend
+
+DEBOUNCE = 0.3
+
+
+class RecordingExecutor:
+    """記錄提交的任務，不實際生成報告"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, input_path, output_path, options):
+        self.submitted.append((input_path, output_path))
+        future = Future()
+        future.set_result(output_path)
+        return future
+
+
+@pytest.fixture
+def watch_dir(tmp_path):
+    directory = tmp_path / 'planning'
+    directory.mkdir()
+    return directory
+
+
+def make_watcher(watch_dir, output_dir):
+    return InputWatcher(watch_dir, output_dir, debounce=DEBOUNCE, max_workers=1,
+                        poll_interval=0.01, use_polling=True)
+
+
+def step(watcher, backend, executor):
+    watcher._step(backend, executor, 0)
+
+
+def test_filters_lock_hidden_and_unrelated_files(watch_dir, tmp_path):
+    watcher = make_watcher(watch_dir, tmp_path / 'output')
+    assert watcher._matches('plan.xlsx')
+    assert watcher._matches('plan.xls')
+    assert not watcher._matches('~$plan.xlsx')
+    assert not watcher._matches('.plan.xlsx.123.tmp')
+    assert not watcher._matches('notes.txt')
+    # 輸出目錄不同時，名稱像報告的輸入仍然會被監視
+    assert watcher._matches('plan_report.xlsx')
+
+
+def test_ignores_generated_reports_when_output_is_watch_dir(watch_dir):
+    watcher = make_watcher(watch_dir, watch_dir / '.')
+    assert watcher._matches('plan.xlsx')
+    assert not watcher._matches('plan_report.xlsx')
+    assert not watcher._matches('plan_report_part01.xlsx')
+    assert not watcher._matches('plan_report_report.xlsx')
+
+    backend = PollingBackend(watch_dir, interval=0.01)
+    executor = RecordingExecutor()
+    watcher.output_path_for('plan.xlsx').write_bytes(b'report')
+    (watch_dir / 'plan_report_part01.xlsx').write_bytes(b'part')
+    step(watcher, backend, executor)
+    assert watcher._pending == {}
+
+    time.sleep(DEBOUNCE * 1.5)
+    step(watcher, backend, executor)
+    assert executor.submitted == []
+
+
+def test_debounce_and_content_fingerprint(watch_dir, tmp_path):
+    watcher = make_watcher(watch_dir, tmp_path / 'output')
+    backend = PollingBackend(watch_dir, interval=0.01)
+    executor = RecordingExecutor()
+    input_path = watch_dir / 'plan.xlsx'
+
+    # 連續寫入只在靜止超過防抖時間後觸發一次生成
+    for i in range(3):
+        input_path.write_bytes(b'version-1' + b'.' * i)
+        step(watcher, backend, executor)
+    assert list(watcher._pending) == ['plan.xlsx']
+    assert executor.submitted == []
+
+    time.sleep(DEBOUNCE * 1.5)
+    step(watcher, backend, executor)
+    assert executor.submitted == [
+        (str(input_path), str(tmp_path / 'output' / 'plan_report.xlsx'))]
+    assert watcher._pending == {}
+    assert watcher._running == {}
+
+    # 只更新修改時間、內容不變：略過
+    input_path.write_bytes(input_path.read_bytes())
+    step(watcher, backend, executor)
+    assert list(watcher._pending) == ['plan.xlsx']
+    time.sleep(DEBOUNCE * 1.5)
+    step(watcher, backend, executor)
+    assert len(executor.submitted) == 1
+
+    # 內容變化：再次生成
+    input_path.write_bytes(b'version-2')
+    step(watcher, backend, executor)
+    time.sleep(DEBOUNCE * 1.5)
+    step(watcher, backend, executor)
+    assert len(executor.submitted) == 2
+
+
+def test_initial_scan_skips_own_reports(watch_dir):
+    (watch_dir / 'plan.xlsx').write_bytes(b'input')
+    (watch_dir / 'old_report.xlsx').write_bytes(b'report')
+    watcher = make_watcher(watch_dir, watch_dir)
+    watcher._initial_scan()
+    assert list(watcher._pending) == ['plan.xlsx']